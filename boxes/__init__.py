@@ -26,7 +26,7 @@ import re
 import sys
 from argparse import ArgumentParser
 from contextlib import contextmanager
-from functools import wraps
+from functools import cached_property, lru_cache, wraps
 from shlex import quote
 from typing import Any
 from xml.sax.saxutils import quoteattr
@@ -35,13 +35,15 @@ import qrcode
 from shapely.geometry import *
 from shapely.ops import split
 
-from boxes import edges, formats, gears, parts, pulley
+from boxes import drawing, edges, fill, formats, gears, limits, parts, profiler, pulley
 from boxes.Color import *
 from boxes.qrcode_factory import BoxesQrCodeFactory
 from boxes.vectors import kerf
 
 ### Helpers
 
+_cleandoc = lru_cache(maxsize=None)(inspect.cleandoc)
+
 def dist(dx, dy):
     """
     Return distance
@@ -312,6 +314,7 @@ Values:
   * fill_pattern :        "no fill" : style of hole pattern
   * hole_style :          "round" : style of holes (does not apply to fill patterns 'vbar' and 'hbar')
   * max_random :          1000 : maximum number of random holes
+  * random_seed :         0 : seed for the random pattern - 0 for a different pattern each time
   * bar_length :          50 : maximum length of bars
   * hole_max_radius :     12.0 : maximum radius of generated holes (in mm)
   * hole_min_radius :     4.0 : minimum radius of generated holes (in mm)
@@ -324,6 +327,7 @@ Values:
         "fill_pattern":        ("no fill", "hex", "square", "random", "hbar", "vbar"),
         "hole_style":          ("round", "triangle", "square", "hexagon", "octagon"),
         "max_random":          1000,
+        "random_seed":         0,
         "bar_length":          50,
         "hole_max_radius":     3.0,
         "hole_min_radius":     0.5,
@@ -344,12 +348,22 @@ class Boxes:
 
     description: str = ""  # Markdown syntax is supported
 
+    _defaultActions: list[argparse.Action] | None = None
+    # set to measure the turtle graphics methods and edges, see boxes.profiler
+    _profiler: profiler.Profiler | None = None
+    # resources rendering may use, see boxes.limits - None: from the environment
+    limits: limits.ResourceLimits | None = None
+    # segments kept in memory before finished parts are moved to a
+    # temporary file, see Surface.spill_after - None: from the environment
+    spill_after: int | None = None
+
     def __init__(self) -> None:
         self.formats = formats.Formats()
         self.ctx = None
-        description: str = ""
+        short_description: str = ""
         if self.__doc__:
-            description = inspect.cleandoc(self.__doc__)
+            short_description = _cleandoc(self.__doc__)
+        description: str = short_description
         if self.description:
             description += "\n\n" + self.description
         self.argparser = ArgumentParser(description=description)
@@ -357,9 +371,6 @@ class Boxes:
         self.non_default_args: dict[Any, Any] = {}
         self.translations = gettext.NullTranslations()
 
-        short_description: str = ""
-        if self.__doc__:
-            short_description = inspect.cleandoc(self.__doc__)
         self.metadata = {
             "name": self.__class__.__name__,
             "short_description": short_description,
@@ -379,33 +390,46 @@ class Boxes:
         self.argparser._action_groups[1].title = self.__class__.__name__ + " Settings"
         defaultgroup = self.argparser.add_argument_group(
                         "Default Settings")
-        defaultgroup.add_argument(
+        # Copy the prepared actions instead of running add_argument() each time
+        for action in self._defaultArguments():
+            defaultgroup._add_action(edges.copyAction(action))
+
+    @staticmethod
+    def _defaultArguments() -> list[argparse.Action]:
+        """Actions of the "Default Settings" group
+
+        Created only once and shared (as copies) by all instances.
+        """
+        if Boxes._defaultActions is not None:
+            return Boxes._defaultActions
+        parser = argparse.ArgumentParser(add_help=False)
+        parser.add_argument(
             "--thickness", action="store", type=float, default=3.0,
             help="thickness of the material (in mm) [\U0001F6C8](https://florianfesti.github.io/boxes/html/usermanual.html#thickness)")
-        defaultgroup.add_argument(
+        parser.add_argument(
             "--burn", action="store", type=float, default=0.1,
             help='burn correction (in mm)(bigger values for tighter fit) [\U0001F6C8](https://florianfesti.github.io/boxes/html/usermanual.html#burn)')
-        defaultgroup.add_argument(
+        parser.add_argument(
             "--format", action="store", type=str, default="svg",
-            choices=self.formats.getFormats(),
+            choices=formats.Formats().getFormats(),
             help="format of resulting file [\U0001F6C8](https://florianfesti.github.io/boxes/html/usermanual.html#format)")
-        defaultgroup.add_argument(
+        parser.add_argument(
             "--labels", action="store", type=boolarg, default=True,
             help="label the parts (where available)")
-        defaultgroup.add_argument(
+        parser.add_argument(
             "--reference", action="store", type=float, default=100.0,
             help="print reference rectangle with given length (in mm)(zero to disable) [\U0001F6C8](https://florianfesti.github.io/boxes/html/usermanual.html#reference)")
-        defaultgroup.add_argument(
+        parser.add_argument(
             "--tabs", action="store", type=float, default=0.0,
             help="width of tabs holding the parts in place (in mm)(not supported everywhere) [\U0001F6C8](https://florianfesti.github.io/boxes/html/usermanual.html#tabs)")
-        defaultgroup.add_argument(
+        parser.add_argument(
             "--qr_code", action="store", type=boolarg, default=False,
             help="Add a QR Code with link or command line to the generated output")
-        defaultgroup.add_argument(
+        parser.add_argument(
             "--inner_corners", action="store", type=str, default="loop",
             choices=["loop", "corner", "backarc"],
             help="style for inner corners [\U0001F6C8](https://florianfesti.github.io/boxes/html/usermanual.html#inner-corners)")
-        defaultgroup.add_argument(
+        parser.add_argument(
             "--output", action="store", type=str, default="box.svg",
             help="name of resulting file")
         def spacing_type(x):
@@ -413,12 +437,14 @@ class Boxes:
                 return (float(x), 0.)
             except ValueError:
                 return tuple(float(v.strip()) for v in x.split(":"))
-        defaultgroup.add_argument(
+        parser.add_argument(
             "--spacing", action="store", type=spacing_type, default="0.5",
             help='spacing around parts (multiples of thickness [: extra space in mm]) [\U0001F6C8](https://florianfesti.github.io/boxes/html/usermanual.html#spacing)')
-        defaultgroup.add_argument(
+        parser.add_argument(
             "--debug", action="store", type=boolarg, default=False,
             help="print surrounding boxes for some structures [\U0001F6C8](https://florianfesti.github.io/boxes/html/usermanual.html#debug)")
+        Boxes._defaultActions = parser._actions
+        return Boxes._defaultActions
 
     @contextmanager
     def saved_context(self):
@@ -432,6 +458,54 @@ class Boxes:
         finally:
             cr.restore()
 
+    def drawCached(self, key, draw, *args, **kw):
+        """
+        Call draw(*args, **kw) or replay what an earlier call with the same key drew
+
+        Burn, tabs, debug, color, line width and current point are
+        added to the key. The rest of what the drawing depends on needs
+        to be covered by key. Unhashable keys disable the cache.
+
+        :param key: hashable description of the drawing
+        :param draw: callable drawing relative to the current position
+        """
+        key = (key, self.burn, self.tabs, self.debug,
+               self.ctx.get_source_rgb(), self.ctx.get_line_width(),
+               self.ctx.get_current_point())
+        try:
+            template = self._templates.get(key)
+        except TypeError:
+            draw(*args, **kw)
+            return
+        if template is None:
+            self.ctx.record()
+            draw(*args, **kw)
+            template = self.ctx.stop_recording()
+            if template is not None:
+                self._templates[key] = template
+        else:
+            self.ctx.replay(template)
+            if self._profiler is not None:
+                self._profiler.replayed += 1
+
+    def _drawPartCached(self, key, edgeList, draw, *args):
+        """
+        Draw a part with drawCached() if all its edges support that
+
+        :param key: hashable description of the part apart from its edges
+        :param edgeList: edge objects used by the part
+        :param draw: callable drawing the part relative to the current position
+        """
+        keys = []
+        for e in edgeList:
+            k = e.cacheKey() if isinstance(e, edges.BaseEdge) else None
+            if k is None:
+                draw(*args)
+                return
+            keys.append(k)
+        self.drawCached((key, tuple(keys), self.thickness, self.spacing),
+                        draw, *args)
+
     def set_source_color(self, color):
         """
         Sets the color of the pen.
@@ -459,6 +533,17 @@ class Boxes:
 
         self.bedBoltSettings = (3, 5.5, 2, 20, 15)  # d, d_nut, h_nut, l, l1
         self.surface, self.ctx = self.formats.getSurface(self.format)
+        if self.limits is None:
+            self.limits = limits.ResourceLimits.fromEnvironment()
+        self.surface.set_limits(self.limits)
+        if self.spill_after is None:
+            self.spill_after = drawing.spill_after_from_environment()
+        self.surface.spill_after = self.spill_after
+        self._templates = {}
+        if self._profiler is None:
+            self._profiler = profiler.Profiler.fromEnvironment()
+        if self._profiler is not None:
+            self._profiler.instrument(self)
 
         if self.format == 'svg_Ponoko':
             self.ctx.set_line_width(0.01)
@@ -614,6 +699,87 @@ class Boxes:
         if args is None:
             args = sys.argv[1:]
 
+        self._setArgs(vars(self.argparser.parse_args(args=args)), args)
+
+    def parseDict(self, values, strict=True):
+        """
+        Set parameters from a dict instead of command line strings
+
+        Values may already have the final type (e.g. float for
+        --thickness) or be strings that are converted like on the
+        command line. Errors are reported the same way as by parseArgs()
+
+        :param values: dict mapping parameter names (without leading "--") to values
+        :param strict:  (Default value = True) complain about unknown parameters - ignore them otherwise
+        :return: list of the ignored parameter names
+        """
+        parser = self.argparser
+        actions = parser._option_string_actions
+        unknown = [k for k in values if "--" + k not in actions]
+        if unknown and strict:
+            parser.error("unrecognized arguments: " + " ".join(
+                f"--{k}={v}" for k, v in values.items() if k in unknown))
+
+        args = [f"--{k}={v}" for k, v in values.items() if k not in unknown]
+        if type(self).parseArgs is not Boxes.parseArgs:
+            # Generator post processes the arguments - take the long way
+            self.parseArgs(args)
+            return unknown
+
+        given = {}
+        for key, value in values.items():
+            if key in unknown:
+                continue
+            action = actions["--" + key]
+            try:
+                given[action.dest] = self._convertArg(action, value)
+            except argparse.ArgumentError as e:
+                parser.error(str(e))
+
+        # Same order and conversion of defaults as ArgumentParser.parse_args()
+        namespace = {}
+        for action in parser._actions:
+            if action.dest is argparse.SUPPRESS or action.default is argparse.SUPPRESS:
+                continue
+            if action.dest in given:
+                namespace[action.dest] = given[action.dest]
+            elif isinstance(action.default, str):
+                namespace[action.dest] = parser._get_value(action, action.default)
+            else:
+                namespace[action.dest] = action.default
+        for dest, default in parser._defaults.items():
+            namespace.setdefault(dest, default)
+
+        self._setArgs(namespace, args)
+        return unknown
+
+    def configure(self, **values):
+        """
+        Set parameters given as keyword arguments. See parseDict()
+        """
+        self.parseDict(values)
+
+    def _convertArg(self, action, value):
+        """Convert and check a single value for an argparse action"""
+        if action.nargs == 0: # flags like "store_true"
+            return action.const if value else action.default
+        t = action.type
+        if t is not None and (type(value) is t or (
+                isinstance(t, BoolArg) and type(value) is bool)):
+            pass
+        elif t is float and type(value) is int:
+            value = float(value)
+        else:
+            value = self.argparser._get_value(action, str(value))
+        self.argparser._check_value(action, value)
+        return value
+
+    def _setArgs(self, namespace, args):
+        """Store parsed arguments and fill metadata
+
+        :param namespace: dict of the parsed parameters
+        :param args: parameters as command line strings
+        """
         def cliQuote(s: str) -> str:
             s = s.replace('\r', '')
             s = s.replace('\n', "\\n")
@@ -622,7 +788,7 @@ class Boxes:
         self.metadata["cli"] = "boxes " + self.__class__.__name__ + " " + " ".join(cliQuote(arg) for arg in args)
         self.metadata["cli"] = self.metadata["cli"].strip()
 
-        for key, value in vars(self.argparser.parse_args(args=args)).items():
+        for key, value in namespace.items():
             default = self.argparser.get_default(key)
 
             # treat edge settings separately
@@ -665,71 +831,95 @@ class Boxes:
     fingerHolesAt : Any
 
     def _buildObjects(self):
-        """Add default edges and parts"""
-        self.edges = {}
-        self.addPart(edges.Edge(self, None))
-        self.addPart(edges.OutSetEdge(self, None))
-        edges.GripSettings(self.thickness).edgeObjects(self)
+        """Add default edges and parts
+
+        The edges are only created when they are looked up. The same
+        goes for the parts (see below).
+        """
+        # drop parts created for an earlier open() - they use the old
+        # context and settings
+        for name in self._lazyParts:
+            self.__dict__.pop(name, None)
+        self.edges = edges.EdgeRegistry()
+        self.edges.register("eE", lambda: [edges.Edge(self, None),
+                                           edges.OutSetEdge(self, None)])
+        self.edges.register("g", lambda: edges.GripSettings(self.thickness).edgeObjects(self, add=False))
 
         # Finger joints
         # Share settings object
         s = edges.FingerJointSettings(self.thickness, True,
                 **self.edgesettings.get("FingerJoint", {}))
-        s.edgeObjects(self)
+        self.edges.register("fFh", lambda: s.edgeObjects(self, add=False))
         self.addPart(edges.FingerHoles(self, s), name="fingerHolesAt")
+
+        def register(chars, settings, name):
+            self.edges.register(chars, lambda: settings(
+                self.thickness, True, **self.edgesettings.get(name, {})
+            ).edgeObjects(self, add=False))
+
         # Stackable
-        edges.StackableSettings(self.thickness, True,
-            **self.edgesettings.get("Stackable", {})).edgeObjects(self)
+        register("sSšŠ", edges.StackableSettings, "Stackable")
         # Dove tail joints
-        edges.DoveTailSettings(self.thickness, True,
-            **self.edgesettings.get("DoveTail", {})).edgeObjects(self)
+        register("dD", edges.DoveTailSettings, "DoveTail")
         # Flex
-        s = edges.FlexSettings(self.thickness, True,
-                **self.edgesettings.get("Flex", {}))
-        self.addPart(edges.FlexEdge(self, s))
+        self.edges.register("X", lambda: [edges.FlexEdge(self, edges.FlexSettings(
+            self.thickness, True, **self.edgesettings.get("Flex", {})))])
         # Clickable
-        edges.ClickSettings(self.thickness, True,
-                **self.edgesettings.get("Click", {})).edgeObjects(self)
+        register("cC", edges.ClickSettings, "Click")
         # Hinges
-        edges.HingeSettings(self.thickness, True,
-                **self.edgesettings.get("Hinge", {})).edgeObjects(self)
-        edges.ChestHingeSettings(self.thickness, True,
-                **self.edgesettings.get("ChestHinge", {})).edgeObjects(self)
-        edges.CabinetHingeSettings(self.thickness, True,
-                **self.edgesettings.get("CabinetHinge", {})).edgeObjects(self)
+        register("iIjJkK", edges.HingeSettings, "Hinge")
+        register("oOpPqQ", edges.ChestHingeSettings, "ChestHinge")
+        register("uUvV", edges.CabinetHingeSettings, "CabinetHinge")
         # Sliding Lid
-        edges.SlideOnLidSettings(self.thickness, True,
-                **self.edgesettings.get("SlideOnLid", {})).edgeObjects(self)
+        register("lLnmNM", edges.SlideOnLidSettings, "SlideOnLid")
         # Rounded Triangle Edge
-        edges.RoundedTriangleEdgeSettings(self.thickness, True,
-                **self.edgesettings.get("RoundedTriangleEdge", {})).edgeObjects(self)
+        register("tT", edges.RoundedTriangleEdgeSettings, "RoundedTriangleEdge")
         # Grooved Edge
-        edges.GroovedSettings(self.thickness, True,
-                              **self.edgesettings.get("Grooved", {})).edgeObjects(self)
+        register("zZ", edges.GroovedSettings, "Grooved")
         # Mounting Edge
-        edges.MountingSettings(self.thickness, True,
-                              **self.edgesettings.get("Mounting", {})).edgeObjects(self)
+        register("G", edges.MountingSettings, "Mounting")
         # Handle Edge
-        edges.HandleEdgeSettings(self.thickness, True,
-                              **self.edgesettings.get("HandleEdge", {})).edgeObjects(self)
-        # HexHoles
-        self.hexHolesSettings = HexHolesSettings(self.thickness, True,
-                **self.edgesettings.get("HexHoles", {}))
-        # Lids
+        register("yY", edges.HandleEdgeSettings, "HandleEdge")
+        # Gears
+        self.edges.register("R", lambda: [edges.RackEdge(self, edges.GearSettings(
+            self.thickness, True, **self.edgesettings.get("Gear", {})))])
+
+    # Parts - created on first use
+
+    _lazyParts = ("hexHolesSettings", "lidSettings", "lid", "nutHole",
+                  "gears", "pulley", "parts")
+
+    @cached_property
+    def hexHolesSettings(self):
+        return HexHolesSettings(self.thickness, True,
+                                **self.edgesettings.get("HexHoles", {}))
+
+    @cached_property
+    def lidSettings(self):
         from . import lids
-        self.lidSettings = lids.LidSettings(self.thickness, True,
-                                       **self.edgesettings.get("Lid", {}))
-        self.lid = lids.Lid(self, self.lidSettings)
+        return lids.LidSettings(self.thickness, True,
+                                **self.edgesettings.get("Lid", {}))
 
-        # Nuts
-        self.addPart(NutHole(self, None))
-        # Gears
-        self.addPart(gears.Gears(self))
-        s = edges.GearSettings(self.thickness, True,
-                **self.edgesettings.get("Gear", {}))
-        self.addPart(edges.RackEdge(self, s))
-        self.addPart(pulley.Pulley(self))
-        self.addPart(parts.Parts(self))
+    @cached_property
+    def lid(self):
+        from . import lids
+        return lids.Lid(self, self.lidSettings)
+
+    @cached_property
+    def nutHole(self):
+        return NutHole(self, None)
+
+    @cached_property
+    def gears(self):
+        return gears.Gears(self)
+
+    @cached_property
+    def pulley(self):
+        return pulley.Pulley(self)
+
+    @cached_property
+    def parts(self):
+        return parts.Parts(self)
 
     def adjustSize(self, l, e1=True, e2=True):
         # Char to edge object
@@ -826,11 +1016,31 @@ class Boxes:
         self.surface.set_metadata(self.metadata)
 
         self.surface.flush()
-        data = self.surface.finish(self.inner_corners)
+        try:
+            if self._profiler is not None:
+                self._profiler.countSegments(self.surface)
+                data = self._profiler.call("finish", None, self.surface.finish, self.inner_corners)
+            else:
+                data = self.surface.finish(self.inner_corners)
 
-        data = self.formats.convert(data, self.format)
+            data = self.formats.convert(data, self.format, self.surface.budget.timeLeft())
+            self.surface.budget.check(self.surface.count, data.getbuffer().nbytes)
+            if self._profiler is not None:
+                self._profiler.finish()
+        finally:
+            self.stopProfiling()
         return data
 
+    def stopProfiling(self) -> None:
+        """Undo the instrumentation of the profiler without writing a report
+
+        close() does this. Call it if open() or render() raise so the
+        edge classes do not stay instrumented.
+        """
+        if self._profiler is not None:
+            self._profiler.restore()
+            self._profiler = None
+
     ############################################################
     ### Turtle graphics commands
     ############################################################
@@ -877,13 +1087,6 @@ class Boxes:
             self.corner(lang/2., radius)
             return
 
-        if ((radius > 0.5* self.burn and abs(degrees) > 36) or
-            (abs(degrees) > 100)):
-            steps = int(abs(degrees)/ 36.) + 1
-            for i in range(steps):
-                self.corner(float(degrees)/steps, radius)
-            return
-
         if degrees > 0:
             self.ctx.arc(0, radius + self.burn, radius + self.burn,
                          -0.5 * math.pi, rad - 0.5 * math.pi)
@@ -1392,7 +1595,9 @@ class Boxes:
         :param y: y position
         :param r: radius
         """
+        self._hole(x, y, r, d, tabs)
 
+    def _hole(self, x, y, r=0.0, d=0.0, tabs=0):
         if not r:
             r = d / 2.0
         if r < self.burn:
@@ -1415,6 +1620,9 @@ class Boxes:
         :param center_x:  (Default value = True) if True, x position is the center, else the start
         :param center_y:  (Default value = True) if True, y position is the center, else the start
         """
+        self._rectangularHole(x, y, dx, dy, r, center_x, center_y)
+
+    def _rectangularHole(self, x, y, dx, dy, r=0, center_x=True, center_y=True):
         r = min(r, dx/2., dy/2.)
         x_start = x if center_x else x + dx / 2.0
         y_start = y - dy / 2.0 if center_y else y
@@ -1424,6 +1632,54 @@ class Boxes:
             self.corner(-90, r)
             self.edge(d - 2 * r)
 
+    @restore
+    @holeCol
+    def holesAt(self, positions, r=0.0, d=0.0, tabs=0):
+        """
+        Draw round holes of the same size at many positions
+
+        Same holes as calling hole() for each position but with only
+        one color switch and the circle calculated only once. Holes with
+        tabs are stroked together as one path.
+
+        :param positions: list of (x, y) tuples or numpy array of shape (n, 2)
+        :param r: radius
+        :param d: diameter
+        :param tabs:  (Default value = 0)
+        """
+        if tabs:
+            for x, y in positions:
+                self.ctx.save()
+                self._hole(x, y, r, d, tabs)
+                self.ctx.restore()
+            return
+        if not r:
+            r = d / 2.0
+        if r < self.burn:
+            r = self.burn + 1E-9
+        self.ctx.circles(positions, r - self.burn)
+
+    @restore
+    @holeCol
+    def rectangularHolesAt(self, positions, dx, dy, r=0, center_x=True, center_y=True):
+        """
+        Draw rectangular holes of the same size at many positions
+
+        Same holes as calling rectangularHole() for each position but
+        with only one color switch and stroked together as one path.
+
+        :param positions: list of (x, y) tuples or numpy array of shape (n, 2)
+        :param dx: width
+        :param dy: height
+        :param r:  (Default value = 0) radius of the corners
+        :param center_x:  (Default value = True) if True, x position is the center, else the start
+        :param center_y:  (Default value = True) if True, y position is the center, else the start
+        """
+        for x, y in positions:
+            self.ctx.save()
+            self._rectangularHole(x, y, dx, dy, r, center_x, center_y)
+            self.ctx.restore()
+
     @restore
     @holeCol
     def dHole(self, x, y, r=None, d=None, w=None, rel_w=0.75, angle=0):
@@ -1648,13 +1904,22 @@ class Boxes:
                           y * 0.5 * holedistance,
                           0.5 * diameter)
 
-    def drawPoints(self, lines, kerfdir=1, close=True):
+    def drawPoints(self, lines, kerfdir=1, close=True, miter_limit=None):
+        """Draw a polyline
 
-        if not lines:
+        :param lines: list of (x, y) tuples or numpy array of shape (n, 2)
+        :param kerfdir:  (Default value = 1) direction to compensate the burn, 0 for none
+        :param close:  (Default value = True) connect the last point to the first one
+        :param miter_limit:  (Default value = None) limit how far sharp vertices are moved by the burn compensation - in multiples of burn
+        """
+        if len(lines) == 0:
             return
 
         if kerfdir != 0:
-            lines = kerf(lines, self.burn*kerfdir, closed=close)
+            lines = kerf(lines, self.burn*kerfdir, closed=close, miter_limit=miter_limit)
+
+        if hasattr(lines, "tolist"):  # numpy array
+            lines = lines.tolist()
 
         self.ctx.save()
         self.ctx.move_to(*lines[0])
@@ -1705,7 +1970,7 @@ class Boxes:
 
     @restore
     @holeCol
-    def fillHoles(self, pattern, border, max_radius, hspace=3, bspace=0, min_radius=0.5, style="round", bar_length=50, max_random=1000):
+    def fillHoles(self, pattern, border, max_radius, hspace=3, bspace=0, min_radius=0.5, style="round", bar_length=50, max_random=1000, seed=None):
         """
         fill a polygon defined by its outline with holes
 
@@ -1718,6 +1983,7 @@ class Boxes:
         :param style:       defines hole style - currently one of "round", "triangle", "square", "hexagon" or "octagon"
         :param bar_length:  maximum bar length
         :param max_random:  maximum number of random holes
+        :param seed:        seed for the "random" pattern - None for a different pattern every time
         """
         if pattern not in ["random", "hex", "square", "hbar", "vbar"]:
             return
@@ -1756,174 +2022,23 @@ class Boxes:
             if self.debug:
                 self.showBorderPoly(border, color=Color.MAGENTA)
 
-        row = 0
-        i = 0
-
         # calc the next smaller radius to fit an 'optimum' number of circles
-        # for x direction
-        nx = math.ceil((max_x - min_x - 2 * bspace + hspace) / (2 * max_radius + hspace))
-        max_radius_x = (max_x - min_x - 2 * bspace - (nx - 1) * hspace) / nx / 2
-
-        # for y direction
-        if pattern == "hex":
-            ny = math.ceil((max_y - min_y - 2 * bspace - 2 * max_radius) / (math.sqrt(3) / 2 * (2 * max_radius + hspace)))
-            max_radius_y = (max_y - min_y - 2 * bspace - math.sqrt(3) / 2 * ny * hspace) / (math.sqrt(3) * ny + 2 )
-        else:
-            ny = math.ceil((max_y - min_y - 2 * bspace + hspace) / (2 * max_radius + hspace))
-            max_radius_y = (max_y - min_y - 2 * bspace - (ny - 1) * hspace) / ny / 2
+        max_radius_x, max_radius_y = fill.gridRadius(pattern, (min_x, min_y, max_x, max_y), max_radius, hspace, bspace)
 
         if pattern == "random":
-            grid = {}
-            misses = 0 # in a row
-            while i < max_random and misses < 20:
-                i += 1
-                misses += 1
-                # random new point
-                x = random.randrange(math.floor(min_x + bspace), math.ceil(max_x - bspace)) # randomness takes longer to compute
-                y = random.randrange(math.floor(min_y + bspace), math.ceil(max_y - bspace)) # but generates a new pattern for each run
-                pt = Point(x, y).buffer(min_radius + bspace)
-                # check if point is within border
-                if borderPoly.contains(pt):
-                    pt1 = Point(x, y)
-                    grid_x = int(x//(2*max_radius+hspace))
-                    grid_y = int(y//(2*max_radius+hspace))
-                    # compute distance between hole and border
-                    bdist = borderPoly.exterior.distance(pt1) - bspace
-                    # compute minimum distance to all other holes
-                    hdist = max_radius
-                    try: # learned from https://medium.com/techtofreedom/5-ways-to-break-out-of-nested-loops-in-python-4c505d34ace7
-                        for gx in (-1, 0, 1):
-                            for gy in (-1, 0, 1):
-                                for pt2 in grid.get((grid_x+gx, grid_y+gy), []):
-                                    pt3 = Point(pt2.x, pt2.y)
-                                    hdist = min(hdist, pt1.distance(pt3) - pt2.z - hspace)
-                                    if hdist < min_radius:
-                                        hdist = 0
-                                        raise StopIteration
-                    except StopIteration:
-                        pass
-                    # find maximum radius depending on distances
-                    r = min(bdist, hdist)
-                    # if too small, dismiss cycle
-                    if r < min_radius:
-                        continue
-                    # if too large, limit to max size
-                    if r > max_radius:
-                        r = max_radius
-                    # store in grid with radius as z value
-                    grid.setdefault((grid_x, grid_y), []).append(
-                        Point(x, y, r))
-                    misses = 0
-                    # and finally paint the hole
-                    self.regularPolygonHole(x, y, r=r, n=n, a=a)
-                    # rinse and repeat
+            for x, y, r in fill.randomHoles(border, max_radius, hspace, bspace, min_radius,
+                                            max_random, seed=seed):
+                self.regularPolygonHole(x, y, r=r, n=n, a=a)
 
         elif pattern in ("square", "hex"):
-            # use 'optimum' hole size
-            max_radius = min(max_radius_x, max_radius_y)
-
-            # check if at least one line fits (we do horizontal filling)
-            if (max_y - min_y) < (2 * max_radius + 2 * bspace):
-                return
-
-            # make cutPolys a little wider to avoid
-            # overlapping with lines to be cut
-            outerCutPoly = borderPoly.buffer(-1 * (bspace - 0.000001),
-                                             join_style=2)
-            outerTestPoly = borderPoly.buffer(-1 * (bspace - 0.01),
-                                              join_style=2)
-            # shrink original polygon to get place for full size polygons
-            innerCutPoly = borderPoly.buffer(-1 * (bspace + max_radius - 0.0001), join_style=2)
-            innerTestPoly = borderPoly.buffer(-1 * (bspace + max_radius - 0.001), join_style=2)
-
-            # get left and right boundaries of cut polygon
-            x_cpl, y_cpl, x_cpr, y_cpr = outerCutPoly.bounds
-
             if self.debug:
-                self.showBorderPoly(list(outerCutPoly.exterior.coords))
-                self.showBorderPoly(list(innerCutPoly.exterior.coords))
-
-            # set startpoint
-            y = min_y + bspace + max_radius_y
-
-            while y < (max_y - bspace - max_radius_y):
-                if pattern == "square" or row % 2 == 0:
-                    xs = min_x + bspace + max_radius_x
-                else:
-                    xs = min_x + max_radius_x * 2 + hspace / 2 + bspace
-
-                # create line segments cut by the polygons
-                line_complete = LineString([(x_cpl, y), (max_x + 1, y)])
-                # cut accurate
-                outer_line_split = split(line_complete, outerCutPoly)
-                line_complete = LineString([(x_cpl, y), (max_x + 1, y)])
-                inner_line_split = split(line_complete, innerCutPoly)
-                inner_line_index = 0
-
-                if self.debug and False:
-                    for line in inner_line_split.geoms:
-                        self.hole(line.bounds[0], line.bounds[1], 1.1)
-                        self.hole(line.bounds[2], line.bounds[3], .9)
-
-                # process each line
-                for line_this in outer_line_split.geoms:
-
-                    if self.debug and False:  # enable to debug missing lines
-                        x_start, y_start, x_end, y_end = line_this.bounds
-                        with self.saved_context():
-                            self.moveTo(x_start, y_start ,0)
-                            self.hole(0, 0, 0.5)
-                            self.edge(x_end - x_start)
-                        with self.saved_context():
-                            self.moveTo(x_start, y_start ,0)
-                            self.text(str(outerTestPoly.contains(line_this)), 0, 0, fontsize=2, color=Color.ANNOTATIONS)
-                        with self.saved_context():
-                            self.moveTo(x_end, y_end ,0)
-                            self.hole(0, 0, 0.5)
-
-                    if not outerTestPoly.contains(line_this):
-                        continue
-                    x_start, y_start , x_end, y_end = line_this.bounds
-                    #initialize walking x coordinate
-                    xw = (math.ceil((x_start - xs) / (2 * max_radius_x + hspace)) * (2 * max_radius_x + hspace)) + xs
-
-                    # look up matching inner line
-                    while (inner_line_index < len(inner_line_split.geoms) and
-                           (inner_line_split.geoms[inner_line_index].bounds[2] <  xw
-                            or not innerTestPoly.contains(inner_line_split.geoms[inner_line_index]))):
-                        inner_line_index += 1
-
-                    # and process line
-                    while not xw > x_end:
-                        # are we in inner polygon already?
-                        if (len(inner_line_split.geoms) > inner_line_index and
-                            xw > inner_line_split.geoms[inner_line_index].bounds[0]):
-                            # place inner, full size polygons
-                            while xw < inner_line_split.geoms[inner_line_index].bounds[2]:
-                                self.regularPolygonHole(xw, y, r=max_radius, n=n, a=a)
-                                xw += (2 * max_radius_x + hspace)
-                            # forward to next inner line
-                            while (inner_line_index < len(inner_line_split.geoms) and
-                                   (inner_line_split.geoms[inner_line_index].bounds[0] <  xw
-                                    or not innerTestPoly.contains(inner_line_split.geoms[inner_line_index]))):
-                                inner_line_index += 1
-                            if xw > x_end:
-                                break
-
-                        # Check distance to border to size the polygon
-                        pt = Point(xw, y)
-                        r = min(borderPoly.exterior.distance(pt) - bspace,
-                                max_radius)
-                        # if too small, dismiss
-                        if r >= min_radius:
-                            self.regularPolygonHole(xw, y, r=r, n=n, a=a)
-                        xw += (2 * max_radius_x + hspace)
-
-                row += 1
-                if pattern == "square":
-                    y += 2 * max_radius_y + hspace - 0.0001
-                else:
-                    y += (math.sqrt(3) / 2 * (2 * max_radius_y + hspace)) - 0.0001
+                r = min(max_radius_x, max_radius_y)
+                for poly in (borderPoly.buffer(-1 * (bspace - 0.000001), join_style=2),
+                             borderPoly.buffer(-1 * (bspace + r - 0.0001), join_style=2)):
+                    if isinstance(poly, Polygon) and not poly.is_empty:
+                        self.showBorderPoly(list(poly.exterior.coords))
+            for x, y, r in fill.gridHoles(pattern, border, max_radius, hspace, bspace, min_radius):
+                self.regularPolygonHole(x, y, r=r, n=n, a=a)
 
         elif pattern == "hbar":
             # 'optimum' hole size to be used
@@ -2040,7 +2155,7 @@ class Boxes:
         else:
            raise ValueError("fillHoles - unknown hole pattern: %s)" % pattern)
 
-    def hexHolesRectangle(self, x, y, settings=None, skip=None):
+    def hexHolesRectangle(self, x, y, settings=None, skip=None, mask=None):
         """Fills a rectangle with holes in a hex pattern.
 
         Settings have:
@@ -2053,36 +2168,21 @@ class Boxes:
         :param settings:  (Default value = None)
         :param skip:  (Default value = None) function to check if hole should be present
                gets x, y, r, b, posx, posy
+        :param mask:  (Default value = None) vectorized version of skip
+               gets x, y, r, b and the numpy arrays posx, posy and returns a bool array - True for the holes to be drawn
         """
 
         if settings is None:
             settings = self.hexHolesSettings
         r, b, style = settings.diameter/2, settings.distance, settings.style
 
-        w = r + b / 2.0
-        dist = w * math.cos(math.pi / 6.0)
-
-        # how many half circles do fit
-        cx = int((x - 2 * r) // (w)) + 2
-        cy = int((y - 2 * r) // (dist)) + 2
-
-        # what's left on the sides
-        lx = (x - (2 * r + (cx - 2) * w)) / 2.0
-        ly = (y - (2 * r + ((cy // 2) * 2) * dist - 2 * dist)) / 2.0
-
-        for i in range(cy // 2):
-            for j in range((cx - (i % 2)) // 2):
-                px = 2 * j * w + r + lx
-                py = i * 2 * dist + r + ly
-                if i % 2:
-                    px += w
-                if skip and skip(x, y, r, b, px, py):
-                    continue
-                self.hole(px, py, r=r)
-
-    def __skipcircle(self, x, y, r, b, posx, posy):
-        cx, cy = x / 2.0, y / 2.0
-        return (dist(posx - cx, posy - cy) > (cx - r))
+        points = fill.hexGrid(x, y, r, b)
+        if mask:
+            points = points[mask(x, y, r, b, points[:, 0], points[:, 1])]
+        if skip:
+            points = [(px, py) for px, py in points.tolist()
+                      if not skip(x, y, r, b, px, py)]
+        self.holesAt(points, r)
 
     def hexHolesCircle(self, d, settings=None):
         """
@@ -2091,8 +2191,7 @@ class Boxes:
         :param d: diameter of the circle
         :param settings:  (Default value = None)
         """
-        d2 = d / 2.0
-        self.hexHolesRectangle(d, d, settings=settings, skip=self.__skipcircle)
+        self.hexHolesRectangle(d, d, settings=settings, mask=fill.circleMask)
 
     def hexHolesPlate(self, x, y, rc, settings=None):
         """
@@ -2103,27 +2202,7 @@ class Boxes:
         :param rc: radius of the corners
         :param settings:  (Default value = None)
         """
-
-        def skip(x, y, r, b, posx, posy):
-            """
-            :param x:
-            :param y:
-            :param r:
-            :param b:
-            :param posx:
-            :param posy:
-            """
-            posx = abs(posx - (x / 2.0))
-            posy = abs(posy - (y / 2.0))
-
-            wx = 0.5 * x - rc - r
-            wy = 0.5 * y - rc - r
-
-            if (posx <= wx) or (posy <= wx):
-                return 0
-            return dist(posx - wx, posy - wy) > rc
-
-        self.hexHolesRectangle(x, y, settings, skip=skip)
+        self.hexHolesRectangle(x, y, settings, mask=fill.plateMask(rc))
 
     def hexHolesHex(self, h, settings=None, grow=None):
         """
@@ -2151,12 +2230,12 @@ class Boxes:
         dist = w * math.cos(math.pi / 6.0)
 
         self.moveTo(h / 2.0 - (cy // 2) * 2 * w, h / 2.0)
-        for j in range(cy):
-            self.hole(2 * j * w, 0, r)
-        for i in range(1, cy / 2 + 1):
+        points = [(2 * j * w, 0) for j in range(cy)]
+        for i in range(1, cy // 2 + 1):
             for j in range(cy - i):
-                self.hole(j * 2 * w + i * w, i * 2 * dist, r)
-                self.hole(j * 2 * w + i * w, -i * 2 * dist, r)
+                points.append((j * 2 * w + i * w, i * 2 * dist))
+                points.append((j * 2 * w + i * w, -i * 2 * dist))
+        self.holesAt(points, r)
 
     def flex2D(self, x, y, width=1):
         """
@@ -2526,6 +2605,22 @@ class Boxes:
         if self.move(overallwidth, overallheight, move, before=True):
             return
 
+        if callback is None and holesMargin is None and not bedBolts:
+            # front/back, left/right, ... are often identical
+            self._drawPartCached(
+                ("rectangularWall", x, y, tuple(ignore_widths)),
+                edges[:4] + [self.edges["e"]],
+                self._rectangularWall, x, y, edges, ignore_widths)
+        else:
+            self._rectangularWall(x, y, edges, ignore_widths, holesMargin,
+                                  holesSettings, bedBolts, bedBoltSettings,
+                                  callback)
+
+        self.move(overallwidth, overallheight, move, label=label)
+
+    def _rectangularWall(self, x, y, edges, ignore_widths,
+                         holesMargin=None, holesSettings=None,
+                         bedBolts=None, bedBoltSettings=None, callback=None):
         if 7 not in ignore_widths:
             self.moveTo(edges[-1].spacing())
         self.moveTo(0, edges[0].margin())
@@ -2551,8 +2646,6 @@ class Boxes:
                         holesMargin + edges[0].startWidth())
             self.hexHolesRectangle(x - 2 * holesMargin, y - 2 * holesMargin, settings=holesSettings)
 
-        self.move(overallwidth, overallheight, move, label=label)
-
     def flangedWall(self, x, y, edges="FFFF", flanges=None, r=0.0,
                callback=None, move=None, label=""):
         """Rectangular wall with flanges extending the regular size
@@ -2712,6 +2805,16 @@ class Boxes:
         if self.move(overallwidth, overallheight, move, before=True):
             return
 
+        if callback is None:
+            self._drawPartCached(("trapezoidWall", w, h0, h1),
+                                 edges + [self.edges["e"]],
+                                 self._trapezoidWall, w, h0, h1, edges)
+        else:
+            self._trapezoidWall(w, h0, h1, edges, callback)
+
+        self.move(overallwidth, overallheight, move, label=label)
+
+    def _trapezoidWall(self, w, h0, h1, edges, callback=None):
         a = math.degrees(math.atan((h1-h0)/w))
         l = ((h0-h1)**2+w**2)**0.5
 
@@ -2731,8 +2834,6 @@ class Boxes:
         edges[3](h0)
         self.edgeCorner(edges[-1], edges[0], 90)
 
-        self.move(overallwidth, overallheight, move, label=label)
-
     def trapezoidSideWall(self, w, h0, h1, edges="eeee",
                           radius=0.0, callback=None, move=None,
                           label=""):
@@ -2934,20 +3035,31 @@ class Boxes:
         except TypeError:
             edges = [self.edges.get(edge, edge)]
 
-        t = self.thickness # XXX edge.margin()
-
         borders = self._closePolygon(borders)
 
         minx, miny, maxx, maxy = self._polygonWallExtend(borders, edges)
 
         tw, th = maxx - minx, maxy - miny
 
-        if not turtle:
-            if self.move(tw, th, move, True):
-                return
+        if turtle:
+            self._polygonWall(borders, edges, correct_corners, callback)
+            return
 
-            self.moveTo(-minx, -miny)
+        if self.move(tw, th, move, True):
+            return
+
+        self.moveTo(-minx, -miny)
+        if callback is None:
+            self._drawPartCached(("polygonWall", tuple(borders), correct_corners),
+                                 edges, self._polygonWall, borders, edges,
+                                 correct_corners)
+        else:
+            self._polygonWall(borders, edges, correct_corners, callback)
+
+        self.move(tw, th, move, label=label)
 
+    def _polygonWall(self, borders, edges, correct_corners, callback=None):
+        t = self.thickness # XXX edge.margin()
         length_correction = 0.
         for i in range(0, len(borders), 2):
             self.cc(callback, i // 2)
@@ -2966,9 +3078,6 @@ class Boxes:
             self.edge(length_correction)
             self.corner(next_angle, tabs=1)
 
-        if not turtle:
-            self.move(tw, th, move, label=label)
-
     @restore
     def polygonWalls(self, borders, h, bottom="F", top="F", symmetrical=True):
         if not borders:
@@ -3095,7 +3204,9 @@ class Boxes:
                 kw["move"] = "down only"
                 for i in range(rows):
                     part(*l, **kw)
-        # draw matrix
+        # draw matrix - all parts are the same, so record the first one
+        # and replay it for the others
+        template = None
         for i in range(rows):
             with self.saved_context():
                 for j in range(width):
@@ -3104,7 +3215,12 @@ class Boxes:
                     if width*i+j >= n:
                         break
                     kw["move"] = "right"
-                    part(*l, **kw)
+                    if template is None:
+                        self.ctx.record()
+                        part(*l, **kw)
+                        template = self.ctx.stop_recording()
+                    else:
+                        self.ctx.replay(template)
             kw["move"] = "up only"
             part(*l, **kw)
 
@@ -0,0 +1,186 @@
+# Copyright (C) 2026 Florian Festi
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Output targets for jobs creating many files"""
+from __future__ import annotations
+
+import io
+import os
+import tarfile
+import time
+import zipfile
+from collections.abc import Iterable, Iterator
+
+_TAR_MODES = {
+    ".tar": "w|",
+    ".tar.gz": "w|gz",
+    ".tgz": "w|gz",
+    ".tar.bz2": "w|bz2",
+    ".tbz2": "w|bz2",
+    ".tar.xz": "w|xz",
+    ".txz": "w|xz",
+}
+
+
+def checkName(name: str) -> str:
+    """Make sure name is a relative path not leaving the output
+
+    :raises ValueError: for absolute paths and ".." components
+    """
+    parts = name.replace("\\", "/").split("/")
+    if not name or name.startswith(("/", "\\")) or os.path.isabs(name) or \
+       os.path.splitdrive(name)[0] or ".." in parts or "" in parts:
+        raise ValueError(f"Invalid file name: {name!r}")
+    return name
+
+
+def safeComponent(value) -> str:
+    """value as string usable as (part of) a file name - no path separators"""
+    value = str(value).replace("/", "_").replace("\\", "_")
+    return "_" if value in (".", "..") else value
+
+
+class DirectoryWriter:
+    """Write each file into a directory"""
+
+    def __init__(self, path) -> None:
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def add(self, name: str, data: bytes) -> str:
+        """Store data under name and return where it ended up
+
+        :raises ValueError: if name would end up outside the directory
+        """
+        root = os.path.realpath(self.path)
+        fn = os.path.realpath(os.path.join(root, checkName(name)))
+        if os.path.commonpath([root, fn]) != root or fn == root:
+            raise ValueError(f"Invalid file name: {name!r}")
+        os.makedirs(os.path.dirname(fn), exist_ok=True)
+        with open(fn, "wb") as f:
+            f.write(data)
+        return fn
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class ZipWriter(DirectoryWriter):
+    """Add each file to a zip archive as soon as it is available
+
+    path may also be a (binary) file object.
+    """
+
+    def __init__(self, path) -> None:
+        self.path = path
+        self.zipfile = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED)
+
+    def add(self, name: str, data: bytes) -> str:
+        self.zipfile.writestr(checkName(name), data)
+        return f"{self.path}:{name}"
+
+    def close(self) -> None:
+        self.zipfile.close()
+
+
+class TarWriter(DirectoryWriter):
+    """Add each file to a (compressed) tar archive as soon as it is available"""
+
+    def __init__(self, path, mode: str = "w|") -> None:
+        self.path = path
+        self.tarfile = tarfile.open(os.fspath(path), mode)
+
+    def add(self, name: str, data: bytes) -> str:
+        info = tarfile.TarInfo(checkName(name))
+        info.size = len(data)
+        info.mtime = int(time.time())
+        self.tarfile.addfile(info, io.BytesIO(data))
+        return f"{self.path}:{name}"
+
+    def close(self) -> None:
+        self.tarfile.close()
+
+
+def _tarMode(path) -> str | None:
+    path = str(path).lower()
+    for suffix, mode in _TAR_MODES.items():
+        if path.endswith(suffix):
+            return mode
+    return None
+
+
+def isArchive(path) -> bool:
+    """Check if path names a supported archive format"""
+    return str(path).lower().endswith(".zip") or _tarMode(path) is not None
+
+
+def openOutput(path) -> DirectoryWriter:
+    """Return a writer for path
+
+    A zip or tar archive if path ends with .zip, .tar, .tar.gz, .tgz,
+    .tar.bz2, .tbz2, .tar.xz or .txz - a directory otherwise
+    """
+    if str(path).lower().endswith(".zip"):
+        return ZipWriter(path)
+    mode = _tarMode(path)
+    if mode is not None:
+        return TarWriter(path, mode)
+    return DirectoryWriter(path)
+
+
+class _ChunkBuffer:
+    """Write only file object handing out what was written so far"""
+
+    def __init__(self) -> None:
+        self.chunks: list[bytes] = []
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def pop(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def iterZip(entries: Iterable[tuple[str, bytes]]) -> Iterator[bytes]:
+    """Create a zip archive on the fly
+
+    Each entry is compressed and handed out as soon as it is
+    available so only one file needs to be kept in memory. Suitable
+    as WSGI response.
+
+    :param entries: (name, data) tuples - e.g. a generator rendering the files one after the other
+    """
+    buf = _ChunkBuffer()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:  # type: ignore[call-overload]
+        for name, data in entries:
+            zf.writestr(name, data)
+            chunk = buf.pop()
+            if chunk:
+                yield chunk
+    # central directory
+    chunk = buf.pop()
+    if chunk:
+        yield chunk
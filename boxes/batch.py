@@ -0,0 +1,182 @@
+# Copyright (C) 2026 Florian Festi
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Render one generator for many parameter sets
+
+A sweep maps parameter names to lists of values. Every combination of
+the values is rendered. Work is spread over a pool of worker processes
+that import the generators only once. The results are written to a
+directory or zip archive as soon as they are done.
+
+Spec files for ``boxes --batch`` are YAML::
+
+    generator: TypeTray
+    format: svg                        # optional
+    name: "{generator}_{x}_{thickness}" # optional, must stay inside the output
+    args:                              # optional, used for all files
+      h: 40
+    sweep:
+      x: [100, 150, 200]
+      thickness: [3, 4, 6]
+"""
+from __future__ import annotations
+
+import itertools
+import multiprocessing
+import os
+from typing import Any
+
+import boxes.generators
+from boxes import archive
+
+
+class BatchError(ValueError):
+    pass
+
+
+def getGenerator(name: str) -> type[boxes.Boxes]:
+    """Look up a generator class by its (case insensitive) name"""
+    for cls in boxes.generators.getAllBoxGenerators().values():
+        if cls.__name__.lower() == name.lower():
+            return cls
+    raise BatchError(f"Unknown generator '{name}'")
+
+
+def sweepPoints(sweep: dict[str, Any]) -> list[dict[str, Any]]:
+    """All combinations of the values of the sweep
+
+    :param sweep: maps parameter names to lists of values (single values are used as is)
+    """
+    keys = list(sweep)
+    values = [v if isinstance(v, (list, tuple)) else [v] for v in sweep.values()]
+    return [dict(zip(keys, combination)) for combination in itertools.product(*values)]
+
+
+def defaultName(sweep: dict[str, Any]) -> str:
+    """File name template using the swept parameters"""
+    return "_".join(["{generator}"] + [f"{k}{{{k}}}" for k in sweep
+                                       if isinstance(sweep[k], (list, tuple))])
+
+
+def render(cls: type[boxes.Boxes], values: dict[str, Any]) -> tuple[bytes, str]:
+    """Render a single box
+
+    :return: data and file extension
+    """
+    box = cls()
+    try:
+        box.parseDict(values)
+    except SystemExit:
+        raise BatchError(f"Invalid parameters for {cls.__name__}: {values}") from None
+    box.metadata["reproducible"] = True
+    try:
+        box.open()
+        box.render()
+        data = box.close()
+    finally:
+        box.stopProfiling()
+    return data.getvalue(), box.format.split("_")[0]
+
+
+_workerGenerator: type[boxes.Boxes] | None = None
+
+
+def _initWorker(name: str) -> None:
+    global _workerGenerator
+    _workerGenerator = getGenerator(name)
+
+
+def _renderPoint(job: tuple[str, dict[str, Any]]) -> tuple[str, bytes, str]:
+    name, values = job
+    assert _workerGenerator is not None
+    data, ext = render(_workerGenerator, values)
+    return name, data, ext
+
+
+def renderBatch(generator: str, sweep: dict[str, Any], output, args: dict[str, Any] | None = None,
+                name: str | None = None, jobs: int | None = None, callback=None) -> list[str]:
+    """Render the generator for all combinations of the sweep
+
+    :param generator: name of the generator
+    :param sweep: dict mapping parameter names to lists of values
+    :param output: directory or path of a zip archive (or an archive writer)
+    :param args:  (Default value = None) parameters used for all files
+    :param name:  (Default value = None) file name template - gets the parameters, "generator" and "index" as fields
+    :param jobs:  (Default value = None) number of worker processes, defaults to number of CPUs
+    :param callback:  (Default value = None) called with the name of each file written
+    :return: list of the files written
+    """
+    cls = getGenerator(generator)
+    args = args or {}
+    name = name or defaultName(sweep)
+
+    points = []
+    for index, point in enumerate(sweepPoints(sweep)):
+        values = dict(args)
+        values.update(point)
+        # values must not introduce directories - numbers keep their format specs
+        fields = {k: archive.safeComponent(v) if isinstance(v, str) else v
+                  for k, v in values.items()}
+        try:
+            fn = name.format(generator=cls.__name__, index=index, **fields)
+            archive.checkName(fn)
+        except KeyError as e:
+            raise BatchError(f"Unknown field {e} in name template '{name}'") from None
+        except ValueError as e:
+            raise BatchError(f"{e} - check the name template '{name}'") from None
+        points.append((fn, values))
+
+    if points:
+        # Check the parameters once in the main process to fail early
+        try:
+            cls().parseDict(points[0][1])
+        except SystemExit:
+            raise BatchError(f"Invalid parameters for {cls.__name__}: {points[0][1]}") from None
+
+    jobs = jobs or os.cpu_count() or 1
+    jobs = min(jobs, len(points))
+
+    writer = output if isinstance(output, archive.DirectoryWriter) else archive.openOutput(output)
+    written = []
+    try:
+        if jobs <= 1:
+            for fn, values in points:
+                data, ext = render(cls, values)
+                written.append(writer.add(f"{fn}.{ext}", data))
+                if callback:
+                    callback(written[-1])
+        else:
+            with multiprocessing.Pool(jobs, initializer=_initWorker, initargs=(cls.__name__,)) as pool:
+                for fn, data, ext in pool.imap_unordered(_renderPoint, points):
+                    written.append(writer.add(f"{fn}.{ext}", data))
+                    if callback:
+                        callback(written[-1])
+    finally:
+        if writer is not output:
+            writer.close()
+    return written
+
+
+def renderSpec(spec: dict[str, Any], output, jobs: int | None = None, callback=None) -> list[str]:
+    """Render a batch described by a dict as read from a spec file
+
+    See module doc string for the format.
+    """
+    if "generator" not in spec:
+        raise BatchError("generator must be provided")
+    args = dict(spec.get("args") or {})
+    if "format" in spec:
+        args["format"] = spec["format"]
+    return renderBatch(spec["generator"], spec.get("sweep") or {}, output, args=args,
+                       name=spec.get("name"), jobs=jobs, callback=callback)
@@ -3,13 +3,18 @@ from __future__ import annotations
 import codecs
 import io
 import math
+import os
+import pickle
 import re
-from typing import Any
+import tempfile
+from typing import Any, NamedTuple
 from xml.etree import ElementTree as ET
 
-from affine import Affine
+import numpy
+from affine import Affine, cos_sin_deg
 
 from boxes.extents import Extents
+from boxes.limits import ResourceLimits
 
 EPS = 1e-4
 PADDING = 10
@@ -34,21 +39,196 @@ def points_equal(x1, y1, x2, y2):
     return abs(x1 - x2) < EPS and abs(y1 - y2) < EPS
 
 
+# Transformation matrices used while drawing are plain tuples
+# (a, b, c, d, e, f) - the first six values of an Affine. The
+# calculations are the same as in the affine package to give the very
+# same results, but without creating Affine objects all the time.
+
+IDENTITY = (1.0, 0.0, 0, 0.0, 1.0, 0)
+
+
+def mul_matrix(m, n):
+    """Matrix product m * n of two transformations"""
+    sa, sb, sc, sd, se, sf = m
+    oa, ob, oc, od, oe, of = n
+    return (sa * oa + sb * od, sa * ob + sb * oe, sa * oc + sb * of + sc,
+            sd * oa + se * od, sd * ob + se * oe, sd * oc + se * of + sf)
+
+
+def transform_point(m, x, y):
+    """Apply the transformation m to the point x, y"""
+    a, b, c, d, e, f = m
+    return (x * a + y * b + c, x * d + y * e + f)
+
+
 def pdiff(p1, p2):
     x1, y1 = p1
     x2, y2 = p2
     return (x1 - x2, y1 - y2)
 
 
+# "A" path commands are ("A", x, y, xc, yc, radius, angle1, angle2, m)
+# with x, y being the end point in final coordinates and the rest of
+# the arc given in the local coordinates it was drawn in. m is the
+# transformation from these local to the final coordinates. The arc runs
+# from angle1 to angle2 (radians) - counter clockwise if angle2 > angle1.
+
+def is_conformal(m):
+    """True if m keeps circles circles - only rotates, mirrors, moves and scales uniformly"""
+    a, b, _, d, e, _ = m[:6]
+    tolerance = 1e-9 * (abs(a) + abs(b) + abs(d) + abs(e))
+    return ((abs(a - e) <= tolerance and abs(b + d) <= tolerance) or
+            (abs(a + e) <= tolerance and abs(b - d) <= tolerance))
+
+
+def split_arc(c, n):
+    """Split an "A" path command into n "A" commands of the same angle"""
+    if n <= 1:
+        return [c]
+    _, x, y, xc, yc, radius, angle1, angle2, m = c
+    result = []
+    for i in range(1, n + 1):
+        a1 = angle1 + (angle2 - angle1) * (i - 1) / n
+        a2 = angle1 + (angle2 - angle1) * i / n
+        if i < n:
+            x, y = transform_point(m[:6], radius * math.cos(a2) + xc, radius * math.sin(a2) + yc)
+        else:
+            x, y = c[1:3]
+        result.append(["A", x, y, xc, yc, radius, a1, a2, m])
+    return result
+
+
+def arc_to_curves(c):
+    """Convert an "A" path command into "C" commands approximating it
+
+    Arcs of more than 36 degrees are split into several curves.
+    """
+    sweep = abs(math.degrees(c[7] - c[6]))
+    curves = []
+    for _, x, y, xc, yc, radius, angle1, angle2, m in split_arc(
+            c, int(sweep / 36.) + 1 if sweep > 36 else 1):
+        x1, y1 = radius * math.cos(angle1) + xc, radius * math.sin(angle1) + yc
+        x4, y4 = radius * math.cos(angle2) + xc, radius * math.sin(angle2) + yc
+        ax = x1 - xc
+        ay = y1 - yc
+        bx = x4 - xc
+        by = y4 - yc
+        q1 = ax * ax + ay * ay
+        q2 = q1 + ax * bx + ay * by
+        k2 = 4/3 * ((2 * q1 * q2)**0.5 - q2) / (ax * by - ay * bx)
+
+        p2 = transform_point(m[:6], xc + ax - k2 * ay, yc + ay + k2 * ax)
+        p3 = transform_point(m[:6], xc + bx + k2 * by, yc + by - k2 * bx)
+        curves.append(("C", x, y, *p2, *p3))
+    return curves
+
+
+def arc_center(c):
+    """Center, radius and angles in degrees of an "A" path command in final coordinates
+
+    Only valid if the transformation is_conformal().
+
+    :return: xc, yc, radius, angle1, angle2, counter clockwise
+    """
+    _, x, y, xc, yc, radius, angle1, angle2, m = c
+    m = m[:6]
+    cx, cy = transform_point(m, xc, yc)
+    sx, sy = transform_point(m, radius * math.cos(angle1) + xc, radius * math.sin(angle1) + yc)
+    a, b, _, d, e, _ = m
+    ccw = (angle2 > angle1) != (a * e - b * d < 0)
+    r = math.hypot(sx - cx, sy - cy)
+    a1 = math.degrees(math.atan2(sy - cy, sx - cx))
+    a2 = math.degrees(math.atan2(y - cy, x - cx))
+    return cx, cy, r, a1, a2, ccw
+
+
+def arc_points(c):
+    """Points that need to be within the extents of an "A" path command
+
+    The end point and the points of the arc furthest left, right, up and down.
+    """
+    points = [c[1:3]]
+    if not is_conformal(c[8]):
+        for curve in arc_to_curves(c):
+            points.extend((curve[1:3], curve[3:5], curve[5:7]))
+        return points
+    cx, cy, r, a1, _, ccw = arc_center(c)
+    sweep = math.degrees(abs(c[7] - c[6]))
+    for angle, dx, dy in ((0, r, 0), (90, 0, r), (180, -r, 0), (270, 0, -r)):
+        if ((angle - a1) if ccw else (a1 - angle)) % 360 <= sweep:
+            points.append((cx + dx, cy + dy))
+    return points
+
+
+class TextStyle(NamedTuple):
+    """Font parameters of texts - shared by all texts using the same"""
+    ff: Any  # (style, bold, italic)
+    fs: float
+    rgb: tuple
+    align: str = "left"
+    font: str = "Arial"
+
+
+def spill_after_from_environment() -> int | None:
+    """Surface.spill_after set by the BOXES_SPILL_AFTER environment variable
+
+    boxes --spill-after and boxesserver --spill_after set it, too.
+    """
+    value = os.environ.get("BOXES_SPILL_AFTER")
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"BOXES_SPILL_AFTER must be a number, not {value!r}")
+
+
+def text_extents(x, y, m, text, style):
+    """Estimated extents of a text drawn at x, y with matrix m"""
+    e = Extents()
+    e.add(x, y)
+    h = style.fs
+    l = len(text) * h * 0.7
+    start, end = {
+        'left' : (0, 1),
+        'middle' : (-0.5, 0.5),
+        'end' : (-1, 0),
+        }[style.align]
+    for x in (start*l, end*l):
+        for y in (0, h):
+            x_, y_ = m * (x, y)
+            e.add(x_, y_)
+    return e
+
+
 class Surface:
 
     scale = 1.0
     invert_y = False
+    # False drops all texts - for outputs only used for cutting
+    draw_texts = True
+    # Number of segments kept in memory. Finished parts beyond that are
+    # moved to a temporary file. None (the default) keeps everything in
+    # memory. Only SVG and PS benefit - LBRN2 builds the whole XML tree
+    # in memory anyway. Set by Boxes.open(), see spill_after_from_environment()
+    spill_after: int | None = None
 
     def __init__(self) -> None:
         self.parts: list[Any] = []
-        self._p = self.new_part("default")
+        self._spill_file: Any = None
         self.count = 0
+        self._spilled = 0  # value of count at the last spill
+        self.set_limits(ResourceLimits())
+        self._p = self.new_part("default")
+
+    def set_limits(self, limits):
+        """Start the budget for rendering - see boxes.limits"""
+        self.budget = limits.start()
+        self._next_check = self.budget.nextCheck(self.count)
+
+    def _check_limits(self, output=0):
+        self.budget.check(self.count, output)
+        self._next_check = self.budget.nextCheck(self.count)
 
     def set_metadata(self, metadata):
         self.metadata = metadata
@@ -87,20 +267,60 @@ class Surface:
         for p in self.parts:
             p.transform(f, m, invert_y)
 
+    def iter_parts(self, f=None):
+        """Parts in their current coordinates - loading spilled ones one at a time
+
+        :param f: output file - checked against the size limit
+        """
+        for p in self.parts:
+            self._check_limits(f.tell() if f is not None else 0)
+            yield p.load()
+
     def new_part(self, name="part"):
-        if self.parts and len(self.parts[-1].pathes) == 0:
+        if self.parts and self._p.empty():
             return self._p
+        if (self.spill_after is not None and
+                self.count - self._spilled > self.spill_after):
+            self._spill()
+        self.budget.checkParts(len(self.parts) + 1)
         p = Part(name)
         self.parts.append(p)
         self._p = p
         return p
 
+    def _spill(self):
+        """Move the finished parts to the temporary file"""
+        if self._spill_file is None:
+            self._spill_file = tempfile.TemporaryFile()
+        f = self._spill_file
+        f.seek(0, io.SEEK_END)
+        for i, part in enumerate(self.parts):
+            if isinstance(part, Part) and (part.pathes or part.texts) and not part.path:
+                offset = f.tell()
+                pickle.dump(part, f, pickle.HIGHEST_PROTOCOL)
+                self.parts[i] = SpilledPart(f, offset, part.extents())
+        self._spilled = self.count
+
+    def _close_spill_file(self):
+        """Remove the temporary file - once the output is written"""
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+
     def append(self, *path):
         self.count += 1
-        if self.count > 100000:
-            raise ValueError("Too many lines")
+        if self.count > self._next_check:
+            self._check_limits()
         self._p.append(*path)
 
+    def add_text(self, x, y, m, text, style):
+        if not self.draw_texts:
+            return
+        self.count += 1
+        if self.count > self._next_check:
+            self._check_limits()
+        self._p.add_text(x, y, m, text, style)
+
     def stroke(self, **params):
         return self._p.stroke(**params)
 
@@ -117,27 +337,63 @@ class Part:
     def __init__(self, name) -> None:
         self.pathes: list[Any] = []
         self.path: list[Any] = []
+        # [index of the next path, x, y, matrix, text, TextStyle]
+        self.texts: list[Any] = []
+        self._text_extents: Extents | None = None
+        self._stroked_texts = 0  # texts before the last stroke()
+
+    def load(self):
+        return self
+
+    def empty(self):
+        """Nothing stroked yet - texts count when a stroke followed them"""
+        return not self.pathes and not self._stroked_texts
 
     def extents(self):
-        if not self.pathes:
+        extents = [p.extents() for p in self.pathes]
+        if self.texts:
+            if self._text_extents is None:
+                self._text_extents = sum(text_extents(*t[1:]) for t in self.texts)
+            extents.append(self._text_extents)
+        if not extents:
             return Extents()
-        return sum([p.extents() for p in self.pathes])
+        return sum(extents)
 
     def transform(self, f, m, invert_y=False):
         assert(not self.path)
         for p in self.pathes:
             p.transform(f, m, invert_y)
+        for t in self.texts:
+            t[1], t[2] = m * (t[1], t[2])
+            t[3] = m * t[3]
+            if invert_y:
+                t[3] *= Affine.scale(1, -1)
+        self._text_extents = None
 
     def append(self, *path):
         self.path.append(list(path))
 
+    def add_text(self, x, y, m, text, style):
+        self.texts.append([len(self.pathes), x, y, m, text, style])
+        self._text_extents = None
+
+    def texts_by_path(self):
+        """Texts to write before each path and after the last one
+
+        List of len(pathes) + 1 lists of (matrix, text, style)
+        """
+        result: list[list[Any]] = [[] for _ in range(len(self.pathes) + 1)]
+        for t in self.texts:
+            result[min(t[0], len(self.pathes))].append(t[3:])
+        return result
+
     def stroke(self, **params):
+        self._stroked_texts = len(self.texts)
         if len(self.path) == 0:
             return
         # search for path ending at new start coordinates to append this path to
         xy0 = self.path[0][1:3]
-        if (not points_equal(*xy0, *self.path[-1][1:3]) and
-            not self.path[0][0] == "T"):
+        if not points_equal(*xy0, *self.path[-1][1:3]):
             for p in reversed(self.pathes):
                 xy1 = p.path[-1][1:3]
                 if points_equal(*xy0, *xy1) and p.params == params:
@@ -160,6 +416,43 @@ class Part:
                 self.path.append(["M", *xy])
 
 
+class SpilledPart:
+    """Finished Part stored in a temporary file by Surface
+
+    Keeps its extents and transformations to apply when loaded.
+    """
+
+    def __init__(self, f, offset, extents) -> None:
+        self.file = f
+        self.offset = offset
+        self._extents = extents
+        self.transformations: list[Any] = []
+        self.path: list[Any] = []
+
+    @property
+    def pathes(self):
+        return self.load().pathes
+
+    @property
+    def texts(self):
+        return self.load().texts
+
+    def extents(self):
+        e = self._extents
+        return Extents(e.xmin, e.ymin, e.xmax, e.ymax)
+
+    def transform(self, f, m, invert_y=False):
+        self.transformations.append((f, m, invert_y))
+
+    def load(self):
+        """Read the Part back and apply the transformations"""
+        self.file.seek(self.offset)
+        part = pickle.load(self.file)
+        for args in self.transformations:
+            part.transform(*args)
+        return part
+
+
 class Path:
     def __init__(self, path, params) -> None:
         self.path = path
@@ -177,20 +470,9 @@ class Path:
         e = Extents()
         for p in self.path:
             e.add(*p[1:3])
-            if p[0] == 'T':
-                m, text, params = p[3:]
-                h = params['fs']
-                l = len(text) * h * 0.7
-                align = params.get('align', 'left')
-                start, end = {
-                    'left' : (0, 1),
-                    'middle' : (-0.5, 0.5),
-                    'end' : (-1, 0),
-                    }[align]
-                for x in (start*l, end*l):
-                    for y in (0, h):
-                        x_, y_ = m * (x, y)
-                        e.add(x_, y_)
+            if p[0] == "A":
+                for point in arc_points(p):
+                    e.add(*point)
         return e
 
     def transform(self, f, m, invert_y=False):
@@ -201,17 +483,17 @@ class Path:
             if C == 'C':
                 c[3], c[4] = m * (c[3], c[4])
                 c[5], c[6] = m * (c[5], c[6])
-            if C == "T":
-                c[3] = m * c[3]
-                if invert_y:
-                    c[3] *= Affine.scale(1, -1)
+            if C == 'A':
+                c[8] = mul_matrix(tuple(m)[:6], c[8])
 
     def faster_edges(self, inner_corners):
         if inner_corners == "backarc":
             return
 
         for (i, p) in enumerate(self.path):
-            if p[0] == "C" and i > 1 and i < len(self.path) - 1:
+            if p[0] == "A" and abs(p[7] - p[6]) > math.radians(100):
+                continue  # no corner
+            if p[0] in ("C", "A") and i > 1 and i < len(self.path) - 1:
                 if self.path[i - 1][0] == "L" and self.path[i + 1][0] == "L":
                     p11 = self.path[i - 2][1:3]
                     p12 = self.path[i - 1][1:3]
@@ -231,6 +513,73 @@ class Path:
         if len(self.path) > 1: # no need to find duplicates if only one element in path
             self.path = [p for n, p in enumerate(self.path) if p != self.path[n-1]]
 
+class Template:
+    """Drawing commands recorded by Context.record()
+
+    Points are stored in the local coordinates they were drawn in
+    together with the index of the transformation matrix that was
+    active. Matrices are stored as the transformation applied to an
+    earlier one - index 0 being the matrix at the start of the
+    recording. This way Context.replay() can redo the very same
+    calculations the original drawing did - resulting in the very
+    same coordinates.
+    """
+
+    def __init__(self, xy) -> None:
+        self.matrices: list[Any] = []  # (parent index, transformation)
+        self.commands: list[Any] = []
+        self.cur = 0  # index of the current matrix
+        self.mxy: Any = None  # current point, None for the one at the start
+        self.stack: list[Any] = []
+        self.valid = True
+        self.start_xy = xy
+        # state at the end of the recording
+        self.xy = xy
+        self.lw = 0
+        self.rgb = (0, 0, 0)
+
+    def point(self, x, y):
+        return (self.cur, x, y)
+
+    def transform(self, m):
+        self.matrices.append((self.cur, m))
+        self.cur = len(self.matrices)
+
+    def save(self):
+        self.stack.append((self.cur, self.mxy))
+
+    def restore(self):
+        if not self.stack:
+            # restoring state from before the recording
+            self.valid = False
+            return
+        self.cur, self.mxy = self.stack.pop()
+
+    def extend(self, template, mapping, mxy):
+        """Add the commands of a template replayed within this recording
+
+        :param mapping: index of the matrices of template in this recording
+        :param mxy: current point at the start of the replay
+        """
+        def point(p):
+            return mxy if p is None else (mapping[p[0]], p[1], p[2])
+
+        for c in template.commands:
+            C = c[0]
+            if C in "MLC":
+                self.commands.append((C, *(point(p) for p in c[1:])))
+            elif C == "A":
+                self.commands.append(("A", point(c[1]), *c[2:7], mapping[c[7]]))
+            elif C == "T":
+                self.commands.append(("T", point(c[1]), mapping[c[2]], *c[3:]))
+            elif C == "O":
+                self.commands.append(("O", *c[1:5], mapping[c[5]]))
+            else:
+                self.commands.append(c)
+        self.cur = mapping[template.cur]
+        self.mxy = point(template.mxy)
+
+
 class Context:
     def __init__(self, surface, *al, **ad) -> None:
         self._renderer = self._dwg = surface
@@ -239,14 +588,16 @@ class Context:
         self._padding = PADDING
 
         self._stack: list[Any] = []
-        self._m = Affine.translation(0, 0)
+        self._m = IDENTITY  # see mul_matrix()
         self._xy = (0, 0)
-        self._mxy = self._m * self._xy
+        self._mxy = transform_point(self._m, 0, 0)
         self._lw = 0
         self._rgb = (0, 0, 0)
         self._ff = "sans-serif"
         self._fs = 10
+        self._text_styles: dict[Any, TextStyle] = {}
         self._last_path = None
+        self._recorders: list[Template] = []
 
     def _update_bounds_(self, mx, my):
         self._bounds.update(mx, my)
@@ -256,6 +607,8 @@ class Context:
             (self._m, self._xy, self._lw, self._rgb, self._mxy, self._last_path)
         )
         self._xy = (0, 0)
+        for rec in self._recorders:
+            rec.save()
 
     def restore(self):
         (
@@ -266,18 +619,30 @@ class Context:
             self._mxy,
             self._last_path,
         ) = self._stack.pop()
+        for rec in self._recorders:
+            rec.restore()
 
     ## transformations
 
+    def _transform(self, m):
+        self._m = mul_matrix(self._m, m)
+        for rec in self._recorders:
+            rec.transform(m)
+
     def translate(self, x, y):
-        self._m *= Affine.translation(x, y)
+        self._transform((1.0, 0.0, x, 0.0, 1.0, y))
         self._xy = (0, 0)
 
     def scale(self, sx, sy):
-        self._m *= Affine.scale(sx, sy)
+        self._transform((sx, 0.0, 0.0, 0.0, sy, 0.0))
 
     def rotate(self, r):
-        self._m *= Affine.rotation(180 * r / math.pi)
+        ca, sa = cos_sin_deg(180 * r / math.pi)
+        self._transform((ca, -sa, 0.0, sa, ca, 0.0))
+
+    def get_matrix(self):
+        """Current transformation as Affine"""
+        return Affine(*self._m)
 
     def set_line_width(self, lw):
         self._lw = lw
@@ -285,22 +650,38 @@ class Context:
     def set_source_rgb(self, r, g, b):
         self._rgb = (r, g, b)
 
+    def get_line_width(self):
+        return self._lw
+
+    def get_source_rgb(self):
+        return self._rgb
+
     ## path methods
 
     def _line_to(self, x, y):
         self._add_move()
         x1, y1 = self._mxy
         self._xy = x, y
-        x2, y2 = self._mxy = self._m * self._xy
+        a, b, c, d, e, f = self._m
+        x2, y2 = self._mxy = (x * a + y * b + c, x * d + y * e + f)
+        for rec in self._recorders:
+            rec.mxy = rec.point(x, y)
         if not points_equal(x1, y1, x2, y2):
             self._dwg.append("L", x2, y2)
+            for rec in self._recorders:
+                rec.commands.append(("L", rec.mxy))
 
     def _add_move(self):
         self._dwg.move_to(*self._mxy)
+        for rec in self._recorders:
+            rec.commands.append(("M", rec.mxy))
 
     def move_to(self, x, y):
         self._xy = (x, y)
-        self._mxy = self._m * self._xy
+        a, b, c, d, e, f = self._m
+        self._mxy = (x * a + y * b + c, x * d + y * e + f)
+        for rec in self._recorders:
+            rec.mxy = rec.point(x, y)
 
     def line_to(self, x, y):
         self._line_to(x, y)
@@ -308,33 +689,17 @@ class Context:
     def _arc(self, xc, yc, radius, angle1, angle2, direction):
         if abs(angle1 - angle2) < EPS or radius < EPS:
             return
-        x1, y1 = radius * math.cos(angle1) + xc, radius * math.sin(angle1) + yc
         x4, y4 = radius * math.cos(angle2) + xc, radius * math.sin(angle2) + yc
+        mx4, my4 = transform_point(self._m, x4, y4)
 
-        # XXX direction seems not needed for small arcs
-        ax = x1 - xc
-        ay = y1 - yc
-        bx = x4 - xc
-        by = y4 - yc
-        q1 = ax * ax + ay * ay
-        q2 = q1 + ax * bx + ay * by
-        k2 = 4/3 * ((2 * q1 * q2)**0.5 - q2) / (ax * by - ay * bx)
-
-        x2 = xc + ax - k2 * ay
-        y2 = yc + ay + k2 * ax
-        x3 = xc + bx + k2 * by
-        y3 = yc + by - k2 * bx
-
-        mx1, my1 = self._m * (x1, y1)
-        mx2, my2 = self._m * (x2, y2)
-        mx3, my3 = self._m * (x3, y3)
-        mx4, my4 = self._m * (x4, y4)
-        mxc, myc = self._m * (xc, yc)
-
+        # Writers output the arc as it is or convert it - see arc_to_curves()
         self._add_move()
-        self._dwg.append("C", mx4, my4, mx2, my2, mx3, my3)
+        self._dwg.append("A", mx4, my4, xc, yc, radius, angle1, angle2, self._m)
         self._xy = (x4, y4)
         self._mxy = (mx4, my4)
+        for rec in self._recorders:
+            rec.mxy = rec.point(x4, y4)
+            rec.commands.append(("A", rec.mxy, xc, yc, radius, angle1, angle2, rec.cur))
 
     def arc(self, xc, yc, radius, angle1, angle2):
         self._arc(xc, yc, radius, angle1, angle2, 1)
@@ -342,20 +707,127 @@ class Context:
     def arc_negative(self, xc, yc, radius, angle1, angle2):
         self._arc(xc, yc, radius, angle1, angle2, -1)
 
+    def circles(self, centers, radius):
+        """Draw one closed circle per center, each as a path of its own
+
+        Circles start at angle 0 and run clockwise as one arc - the same
+        path Boxes.corner(-360, ...) creates.
+
+        :param centers: list of (x, y) tuples or numpy array of shape (n, 2)
+        :param radius: radius of the circles
+        """
+        if radius < EPS or len(centers) == 0:
+            return
+        self._circles(centers, radius, self._m, self._rgb, self._lw)
+        self._xy = (0, 0)
+        for rec in self._recorders:
+            rec.commands.append(("O", centers, radius, self._rgb, self._lw, rec.cur))
+
+    def _circles(self, centers, radius, m, rgb, lw):
+        centers = numpy.asarray(centers, dtype=float)
+        # start and end points in global coordinates
+        a, b, c, d, e, f = m[:6]
+        x, y = centers[:, 0] + radius, centers[:, 1]
+        starts = numpy.column_stack((x * a + y * b + c, x * d + y * e + f)).tolist()
+
+        dwg = self._dwg
+        for (xc, yc), (x, y) in zip(centers.tolist(), starts):
+            dwg.move_to(x, y)
+            dwg.append("A", x, y, xc, yc, radius, 0.0, -2 * math.pi, m)
+            self._last_path = dwg.stroke(rgb=rgb, lw=lw)
+
+    ## instancing
+
+    def record(self):
+        """Start recording all drawing commands into a Template
+
+        Drawing continues as normal. Recordings can be nested.
+        """
+        self._recorders.append(Template(self._xy))
+
+    def stop_recording(self):
+        """Stop recording and return the Template
+
+        Returns None if the recorded commands can't be replayed as
+        save() and restore() calls were not balanced.
+        """
+        template = self._recorders.pop()
+        template.xy, template.lw, template.rgb = self._xy, self._lw, self._rgb
+        if template.stack or not template.valid:
+            return None
+        return template
+
+    def replay(self, template):
+        """Draw a Template again at the current position
+
+        Results in the same coordinates and state (current point, line
+        width and color) as executing the original drawing commands.
+        The current point needs to be the same as at the start of the
+        recording.
+        """
+        ms = [self._m]
+        for parent, m in template.matrices:
+            ms.append(mul_matrix(ms[parent], m))
+        mxy0 = self._mxy
+
+        def point(p):
+            if p is None:
+                return mxy0
+            a, b, c, d, e, f = ms[p[0]]
+            x, y = p[1], p[2]
+            return (x * a + y * b + c, x * d + y * e + f)
+
+        dwg = self._dwg
+        for c in template.commands:
+            C = c[0]
+            if C == "M":
+                dwg.move_to(*point(c[1]))
+            elif C == "L":
+                dwg.append("L", *point(c[1]))
+            elif C == "A":
+                dwg.append("A", *point(c[1]), *c[2:7], ms[c[7]])
+            elif C == "C":
+                dwg.append("C", *point(c[1]), *point(c[2]), *point(c[3]))
+            elif C == "S":
+                self._last_path = dwg.stroke(rgb=c[1], lw=c[2])
+            elif C == "T":
+                dwg.add_text(*point(c[1]), Affine(*ms[c[2]]), c[3], c[4])
+            elif C == "O":
+                self._circles(c[1], c[2], ms[c[5]], c[3], c[4])
+            elif C == "P":
+                dwg.new_part()
+
+        for rec in self._recorders:
+            mapping = [rec.cur]
+            for parent, m in template.matrices:
+                rec.matrices.append((mapping[parent], m))
+                mapping.append(len(rec.matrices))
+            rec.extend(template, mapping, rec.mxy)
+
+        self._m = ms[template.cur]
+        self._xy = template.xy
+        self._mxy = point(template.mxy)
+        self._lw, self._rgb = template.lw, template.rgb
+
     def curve_to(self, x1, y1, x2, y2, x3, y3):
-        # mx0,my0 = self._m*self._xy
-        mx1, my1 = self._m * (x1, y1)
-        mx2, my2 = self._m * (x2, y2)
-        mx3, my3 = self._m * (x3, y3)
+        a, b, c, d, e, f = self._m
+        mx1, my1 = (x1 * a + y1 * b + c, x1 * d + y1 * e + f)
+        mx2, my2 = (x2 * a + y2 * b + c, x2 * d + y2 * e + f)
+        mx3, my3 = (x3 * a + y3 * b + c, x3 * d + y3 * e + f)
         self._add_move()
         self._dwg.append("C", mx3, my3, mx1, my1, mx2, my2)  # destination first!
         self._xy = (x3, y3)
         self._mxy = (mx3, my3)
+        for rec in self._recorders:
+            rec.mxy = rec.point(x3, y3)
+            rec.commands.append(("C", rec.mxy, rec.point(x1, y1), rec.point(x2, y2)))
 
     def stroke(self):
         # print('stroke stack-level=',len(self._stack),'lastpath=',self._last_path,)
         self._last_path = self._dwg.stroke(rgb=self._rgb, lw=self._lw)
         self._xy = (0, 0)
+        for rec in self._recorders:
+            rec.commands.append(("S", self._rgb, self._lw))
 
     def fill(self):
         self._xy = (0, 0)
@@ -370,11 +842,16 @@ class Context:
         self._fs = fs
 
     def show_text(self, text, **args):
-        params = {"ff": self._ff, "fs": self._fs, "lw": self._lw, "rgb": self._rgb}
+        params = {"ff": self._ff, "fs": self._fs, "rgb": self._rgb}
         params.update(args)
-        mx0, my0 = self._m * self._xy
-        m = self._m
-        self._dwg.append("T", mx0, my0, m, text, params)
+        params["rgb"] = tuple(params["rgb"])
+        style = TextStyle(**params)
+        # 6 == 6.0 but the font size is written as given
+        style = self._text_styles.setdefault((style, type(style.fs)), style)
+        mx0, my0 = transform_point(self._m, *self._xy)
+        self._dwg.add_text(mx0, my0, self.get_matrix(), text, style)
+        for rec in self._recorders:
+            rec.commands.append(("T", rec.point(*self._xy), rec.cur, text, style))
 
     def text_extents(self, text):
         fs = self._fs
@@ -404,6 +881,8 @@ class Context:
     ## additional methods
     def new_part(self):
         self._dwg.new_part()
+        for rec in self._recorders:
+            rec.commands.append(("P",))
 
 
 class SVGSurface(Surface):
@@ -510,18 +989,30 @@ class SVGSurface(Surface):
         for name, value in nsmap.items():
             svg.set(f"xmlns:{name}", value)
         svg.text = "\n"
-        tree = ET.ElementTree(svg)
 
         self._add_metadata(svg)
 
-        for i, part in enumerate(self.parts):
-            if not part.pathes:
+        # The parts are written one by one to not keep all of them in memory
+        reorder_attributes(svg)
+        head = ET.tostring(svg, encoding="unicode")
+        f = io.BytesIO()
+        f.write(b"<?xml version='1.0' encoding='utf-8'?>\n")
+        f.write(head[:-len("</svg>")].encode("utf-8"))
+        g = None
+
+        for i, part in enumerate(self.iter_parts(f)):
+            if not (part.pathes or part.texts):
                 continue
-            g = ET.SubElement(svg, "g", id=f"p-{i}",
-                              style="fill:none;stroke-linecap:round;stroke-linejoin:round;")
+            if g is not None:
+                self._write_element(f, g)
+            g = ET.Element("g", id=f"p-{i}",
+                           style="fill:none;stroke-linecap:round;stroke-linejoin:round;")
             g.text = "\n  "
             g.tail = "\n"
+            texts = part.texts_by_path()
             for j, path in enumerate(part.pathes):
+                for text in texts[j]:
+                    t = self._add_text(g, *text)
                 p = []
                 x, y = 0, 0
                 start = None
@@ -548,24 +1039,8 @@ class SVGSurface(Surface):
                         p.append(
                             f"C {x1:.3f} {y1:.3f} {x2:.3f} {y2:.3f} {x:.3f} {y:.3f}"
                         )
-                    elif C == "T":
-                        m, text, params = c[3:]
-                        m = m * Affine.translation(0, -params['fs'])
-                        tm = " ".join(f"{m[i]:.3f}" for i in (0, 3, 1, 4, 2, 5))
-                        font, bold, italic = params['ff']
-                        fontweight = ("normal", "bold")[bool(bold)]
-                        fontstyle = ("normal", "italic")[bool(italic)]
-
-                        style = f"font-family: {font} ; font-weight: {fontweight}; font-style: {fontstyle}; fill: {rgb_to_svg_color(*params['rgb'])}"
-                        t = ET.SubElement(g, "text",
-                                          #x=f"{x:.3f}", y=f"{y:.3f}",
-                                          transform=f"matrix( {tm} )",
-                                          style=style)
-                        t.text = text
-                        t.set("font-size", f"{params['fs']}px")
-                        t.set("text-anchor", params.get('align', 'left'))
-                        t.set("dominant-baseline", 'hanging')
-                        t.tail = "\n  "
+                    elif C == "A":
+                        self._add_arc(p, c)
                     else:
                         print("Unknown", c)
 
@@ -581,17 +1056,61 @@ class SVGSurface(Surface):
                 )
                 if p and p[-1][0] == "M":
                     p.pop()
-                if p:  # might be empty if only contains text
+                if p:
                     t = ET.SubElement(g, "path", d=" ".join(p), stroke=color)
                     t.set("stroke-width", f'{path.params["lw"]:.2f}')
                     t.tail = "\n  "
+            for text in texts[-1]:
+                t = self._add_text(g, *text)
             t.tail = "\n"
-        reorder_attributes(tree)
-        f = io.BytesIO()
-        tree.write(f, encoding="utf-8", xml_declaration=True, method="xml")
+        if g is not None:
+            self._write_element(f, g)
+        f.write(b"</svg>")
+        self._close_spill_file()
         f.seek(0)
         return f
 
+    @staticmethod
+    def _add_arc(p, c):
+        """Append an "A" path command to the SVG path data p"""
+        if not is_conformal(c[8]):
+            for _, x, y, x1, y1, x2, y2 in arc_to_curves(c):
+                p.append(f"C {x1:.3f} {y1:.3f} {x2:.3f} {y2:.3f} {x:.3f} {y:.3f}")
+            return
+        a, b, _, d, e, _ = c[8][:6]
+        det = a * e - b * d
+        r = c[5] * abs(det) ** 0.5
+        sweep = int((c[7] > c[6]) != (det < 0))
+        # SVG arcs are given by their end points only. Close to 180
+        # degrees the rounded end points no longer define the arc well,
+        # so split into pieces of no more than 120 degrees
+        for arc in split_arc(c, math.ceil(abs(c[7] - c[6]) / (2 / 3 * math.pi) - 1e-9)):
+            p.append(f"A {r:.3f} {r:.3f} 0 0 {sweep} {arc[1]:.3f} {arc[2]:.3f}")
+
+    def _add_text(self, g, m, text, style):
+        m = m * Affine.translation(0, -style.fs)
+        tm = " ".join(f"{m[i]:.3f}" for i in (0, 3, 1, 4, 2, 5))
+        font, bold, italic = style.ff
+        fontweight = ("normal", "bold")[bool(bold)]
+        fontstyle = ("normal", "italic")[bool(italic)]
+
+        css = f"font-family: {font} ; font-weight: {fontweight}; font-style: {fontstyle}; fill: {rgb_to_svg_color(*style.rgb)}"
+        t = ET.SubElement(g, "text",
+                          #x=f"{x:.3f}", y=f"{y:.3f}",
+                          transform=f"matrix( {tm} )",
+                          style=css)
+        t.text = text
+        t.set("font-size", f"{style.fs}px")
+        t.set("text-anchor", style.align)
+        t.set("dominant-baseline", 'hanging')
+        t.tail = "\n  "
+        return t
+
+    @staticmethod
+    def _write_element(f, element):
+        reorder_attributes(element)
+        f.write(ET.tostring(element, encoding="unicode").encode("utf-8"))
+
 class PSSurface(Surface):
 
     scale = 72 / 25.4 # 72 dpi
@@ -680,10 +1199,13 @@ class PSSurface(Surface):
         # dwg['width']=f'{w:.2f}mm'
         # dwg['height']=f'{h:.2f}mm'
 
-        for i, part in enumerate(self.parts):
-            if not part.pathes:
+        for i, part in enumerate(self.iter_parts(data)):
+            if not (part.pathes or part.texts):
                 continue
+            texts = part.texts_by_path()
             for j, path in enumerate(part.pathes):
+                for text in texts[j]:
+                    self._write_text(f, *text)
                 p = []
                 x, y = 0, 0
                 path.faster_edges(inner_corners)
@@ -700,33 +1222,18 @@ class PSSurface(Surface):
                         p.append(
                             f"{x1:.3f} {y1:.3f} {x2:.3f} {y2:.3f} {x:.3f} {y:.3f} curveto"
                         )
-                    elif C == "T":
-                        m, text, params = c[3:]
-                        tm = " ".join(f"{m[i]:.3f}" for i in (0, 3, 1, 4, 2, 5))
-                        text = text.replace("(", r"\(").replace(")", r"\)")
-                        color = " ".join(f"{c:.2f}" for c in params["rgb"])
-                        align = params.get('align', 'left')
-                        f.write(f"/{self.fonts[params['ff']]}-Latin1 findfont\n")
-                        f.write(f"{params['fs']} scalefont\n")
-                        f.write("setfont\n")
-                        #f.write(f"currentfont /Encoding  ISOLatin1Encoding put\n")
-                        f.write(f"{color} setrgbcolor\n")
-                        f.write("matrix currentmatrix") # save current matrix
-                        f.write(f"[ {tm} ] concat\n")
-                        if align == "left":
-                            f.write(f"0.0\n")
-                        else:
-                            f.write(f"({text}) stringwidth pop ")
-                            if align == "middle":
-                                f.write(f"-0.5 mul\n")
-                            else: # end
-                                f.write(f"neg\n")
-                        # offset y by descender
-                        f.write("currentfont dup /FontBBox get 1 get \n")
-                        f.write("exch /FontMatrix get 3 get mul neg moveto \n")
-
-                        f.write(f"({text}) show\n") # text created by dup above
-                        f.write("setmatrix\n\n") # restore matrix
+                    elif C == "A" and not is_conformal(c[8]):
+                        for _, x, y, x1, y1, x2, y2 in arc_to_curves(c):
+                            p.append(
+                                f"{x1:.3f} {y1:.3f} {x2:.3f} {y2:.3f} {x:.3f} {y:.3f} curveto"
+                            )
+                    elif C == "A":
+                        # equal start and end angles would draw nothing
+                        for arc in split_arc(c, math.ceil(abs(c[7] - c[6]) / math.pi - 1e-9)):
+                            xc, yc, r, a1, a2, ccw = arc_center(arc)
+                            p.append(
+                                f"{xc:.3f} {yc:.3f} {r:.3f} {a1:.3f} {a2:.3f} {'arc' if ccw else 'arcn'}"
+                            )
                     else:
                         print("Unknown", c)
                 color = (
@@ -734,7 +1241,7 @@ class PSSurface(Surface):
                     if RANDOMIZE_COLORS
                     else rgb_to_svg_color(*path.params["rgb"])
                 )
-                if p:  # todo: might be empty since text is not implemented yet
+                if p:
                     color = " ".join(f"{c:.2f}" for c in path.params["rgb"])
                     f.write("newpath\n")
                     f.write("\n".join(p))
@@ -742,6 +1249,8 @@ class PSSurface(Surface):
                     f.write(f"{path.params['lw']} setlinewidth\n")
                     f.write(f"{color} setrgbcolor\n")
                     f.write("stroke\n\n")
+            for text in texts[-1]:
+                self._write_text(f, *text)
         f.write(
             """
 showpage
@@ -749,9 +1258,36 @@ showpage
 %%EOF
 """
         )
+        self._close_spill_file()
         data.seek(0)
         return data
 
+    def _write_text(self, f, m, text, style):
+        tm = " ".join(f"{m[i]:.3f}" for i in (0, 3, 1, 4, 2, 5))
+        text = text.replace("(", r"\(").replace(")", r"\)")
+        color = " ".join(f"{c:.2f}" for c in style.rgb)
+        f.write(f"/{self.fonts[style.ff]}-Latin1 findfont\n")
+        f.write(f"{style.fs} scalefont\n")
+        f.write("setfont\n")
+        #f.write(f"currentfont /Encoding  ISOLatin1Encoding put\n")
+        f.write(f"{color} setrgbcolor\n")
+        f.write("matrix currentmatrix") # save current matrix
+        f.write(f"[ {tm} ] concat\n")
+        if style.align == "left":
+            f.write(f"0.0\n")
+        else:
+            f.write(f"({text}) stringwidth pop ")
+            if style.align == "middle":
+                f.write(f"-0.5 mul\n")
+            else: # end
+                f.write(f"neg\n")
+        # offset y by descender
+        f.write("currentfont dup /FontBBox get 1 get \n")
+        f.write("exch /FontMatrix get 3 get mul neg moveto \n")
+
+        f.write(f"({text}) show\n") # text created by dup above
+        f.write("setmatrix\n\n") # restore matrix
+
 class LBRN2Surface(Surface):
 
 
@@ -829,9 +1365,9 @@ class LBRN2Surface(Surface):
         name     = ET.SubElement(cs, "name",     Value="T1")        # tool layer do not support names
         priority = ET.SubElement(cs, "priority", Value="7")         # is not cut at all
 
-        for i, part in enumerate(self.parts):
+        for i, part in enumerate(self.iter_parts()):
             if self.dbg: print ("7", num)
-            if not part.pathes:
+            if not (part.pathes or part.texts):
                 continue
             gp = ET.SubElement(svg, "Shape", Type="Group")
             gp.text = "\n  "
@@ -839,8 +1375,11 @@ class LBRN2Surface(Surface):
             children = ET.SubElement(gp, "Children")
             children.text = "\n  "
             children.tail = "\n"
+            texts = part.texts_by_path()
 
             for j, path in enumerate(part.pathes):
+                for text in texts[j]:
+                    self._add_text(children, *text, txtOffset)
                 myColor = self.lbrn2_colors[4*int(path.params["rgb"][0])+2*int(path.params["rgb"][1])+int(path.params["rgb"][2])]
 
                 p = []
@@ -849,6 +1388,7 @@ class LBRN2Surface(Surface):
                 start = None
                 last = None
                 path.faster_edges(inner_corners)
+                path.path = self._add_circles(children, path.path, myColor)
                 num = 0
                 cnt = 1
                 end = len(path.path) - 1
@@ -858,11 +1398,9 @@ class LBRN2Surface(Surface):
                         num += 1
                     num = 0
 
-                c = path.path[num]
-                C, x, y = c[0:3]
                 if self.dbg:
                     print("end:", end)
-                while num < end or (C == "T" and num <= end):  # len(path.path):
+                while num < end:  # len(path.path):
                     if self.dbg:
                         print("0", num)
                     c = path.path[num]
@@ -897,9 +1435,6 @@ class LBRN2Surface(Surface):
                                 cnt = 1
                                 if self.dbg: print ("next, because M")
                                 done = True
-                            elif C == "T":
-                                if self.dbg: print ("next, because T")
-                                done = True
                             else:
                                 if C == "L":
                                     vl.text+=(f"V{x:.3f} {y:.3f}c0x1c1x1")
@@ -924,78 +1459,12 @@ class LBRN2Surface(Surface):
                                     pl.text += f"L{cnt-1} 0"
                         start = c
                         if self.dbg: print ("2", num)
-                    elif C == "T":
-                        cnt = 1
-                        #C = ""
-                        if self.dbg: print ("3", num)
-                        m, text, params = c[3:]
-                        m = m * Affine.translation(0, params['fs'])
-                        if self.dbg: print ("T: ",x, y, c)
-                        num += 1
-                        font, bold, italic = params['ff']
-                        if params.get('font', 'Arial')=='Arial':
-                            f = self.fonts[font]
-                        else:
-                            f = params.get('font', 'Arial')
-                        fontColor = self.lbrn2_colors[4*int(params["rgb"][0])+2*int(params["rgb"][1])+int(params["rgb"][2])]
-
-                        #alignment can be left|middle|end
-                        if params.get('align', 'left')=='middle':
-                            hor = '1'
-                        else:
-                            if params.get('align', 'left')=='end':
-                                hor = '2'
-                            else:
-                                hor = '0'
-                        ver = 1 # vertical is always bottom, text is shifted in box class
-
-                        pos = text.find('%')
-                        offs = 0
-                        if pos >- 1:
-                            if self.dbg: print ("p: ", pos, text[pos+1:pos+3])
-                            texttype = '2'
-                            if self.dbg: print("l ", len(text[pos+1:pos+3]))
-                            if text[pos+1:pos+2].isnumeric():
-                                if self.dbg: print ("t0", text[pos+1:pos+3])
-                                if text[pos+1:pos+3].isnumeric() and len(text[pos+1:pos+3]) == 2:
-                                    if self.dbg: print ("t1")
-                                    if text[pos:pos+3] in txtOffset:
-                                        if self.dbg: print ("t2")
-                                        offs = txtOffset[text[pos:pos+3]] + 1
-                                    else:
-                                        if self.dbg: print ("t3")
-                                        offs = 0
-                                    txtOffset[text[pos:pos+3]] = offs
-                                else:
-                                    if self.dbg: print ("t4")
-                                    if text[pos:pos+2] in txtOffset:
-                                        if self.dbg: print ("t5")
-                                        offs = txtOffset[text[pos:pos+2]] + 1
-                                    else:
-                                        offs = 0
-                                        if self.dbg: print ("t6")
-                                    txtOffset[text[pos:pos+2]] = offs
-                            else:
-                                if self.dbg: print ("t7")
-                                texttype = '0'
-                        else:
-                            texttype = '0'
-                            if self.dbg: print ("t8")
-                        if self.dbg: print ("o: ", text, txtOffset, offs)
-
-                        if not text:
-                            if self.dbg: print ("T: text with empty string - ",x, y, c)
-                        else:
-                            sh = ET.SubElement(children, "Shape", Type="Text", CutIndex=str(fontColor), Font=f"{f}", H=f"{(params['fs']*1.75*0.6086434):.3f}", Str=f"{text}", Bold=f"{'1' if bold else '0'}", Italic=f"{'1' if italic else '0'}", Ah=f"{str(hor)}", Av=f"{str(ver)}", Eval=f"{texttype}", VariableOffset=f"{str(offs)}")  # 1mm = 1.75 Lightburn H units
-                            sh.text = "\n  "
-                            sh.tail = "\n"
-                            xf = ET.SubElement(sh, "XForm")
-                            xf.text = " ".join(f"{m[i]:.3f}" for i in (0, 3, 1, 4, 2, 5))
-                            xf.tail = "\n"
                     else:
                         if self.dbg: print ("4", num)
                         print ("next, because not M")
                         num += 1
+            for text in texts[-1]:
+                self._add_text(children, *text, txtOffset)
 
         url = self.metadata["url"].replace("&render=1", "") # remove render argument to get web form again
 
@@ -1004,11 +1473,104 @@ class LBRN2Surface(Surface):
         pl.tail = "\n"
 
         if self.dbg: print ("5", num)
+        self._close_spill_file()
         f = io.BytesIO()
         tree.write(f, encoding="utf-8", xml_declaration=True, method="xml")
         f.seek(0)
         return f
 
+    def _add_circles(self, children, path, color):
+        """Write full circles as Ellipse shapes
+
+        LightBurn paths only know lines and Bézier curves, so all other
+        arcs are converted into curves.
+
+        :return: the rest of path
+        """
+        result = []
+        for i, c in enumerate(path):
+            if c[0] != "A":
+                result.append(c)
+            elif (result and result[-1][0] == "M" and
+                  (i + 1 == len(path) or path[i + 1][0] == "M") and
+                  abs(abs(c[7] - c[6]) - 2 * math.pi) < 1e-9 and is_conformal(c[8])):
+                result.pop()
+                xc, yc, r = arc_center(c)[:3]
+                sh = ET.SubElement(children, "Shape", Type="Ellipse", CutIndex=str(color),
+                                   Rx=f"{r:.3f}", Ry=f"{r:.3f}")
+                sh.text = "\n  "
+                sh.tail = "\n"
+                xf = ET.SubElement(sh, "XForm")
+                xf.text = f"1 0 0 1 {xc:.3f} {yc:.3f}"
+                xf.tail = "\n"
+            else:
+                result.extend(arc_to_curves(c))
+        return result
+
+    def _add_text(self, children, m, text, style, txtOffset):
+        m = m * Affine.translation(0, style.fs)
+        if self.dbg: print ("T: ", m, text)
+        font, bold, italic = style.ff
+        if style.font == 'Arial':
+            f = self.fonts[font]
+        else:
+            f = style.font
+        fontColor = self.lbrn2_colors[4*int(style.rgb[0])+2*int(style.rgb[1])+int(style.rgb[2])]
+
+        #alignment can be left|middle|end
+        if style.align == 'middle':
+            hor = '1'
+        else:
+            if style.align == 'end':
+                hor = '2'
+            else:
+                hor = '0'
+        ver = 1 # vertical is always bottom, text is shifted in box class
+
+        pos = text.find('%')
+        offs = 0
+        if pos >- 1:
+            if self.dbg: print ("p: ", pos, text[pos+1:pos+3])
+            texttype = '2'
+            if self.dbg: print("l ", len(text[pos+1:pos+3]))
+            if text[pos+1:pos+2].isnumeric():
+                if self.dbg: print ("t0", text[pos+1:pos+3])
+                if text[pos+1:pos+3].isnumeric() and len(text[pos+1:pos+3]) == 2:
+                    if self.dbg: print ("t1")
+                    if text[pos:pos+3] in txtOffset:
+                        if self.dbg: print ("t2")
+                        offs = txtOffset[text[pos:pos+3]] + 1
+                    else:
+                        if self.dbg: print ("t3")
+                        offs = 0
+                    txtOffset[text[pos:pos+3]] = offs
+                else:
+                    if self.dbg: print ("t4")
+                    if text[pos:pos+2] in txtOffset:
+                        if self.dbg: print ("t5")
+                        offs = txtOffset[text[pos:pos+2]] + 1
+                    else:
+                        offs = 0
+                        if self.dbg: print ("t6")
+                    txtOffset[text[pos:pos+2]] = offs
+            else:
+                if self.dbg: print ("t7")
+                texttype = '0'
+        else:
+            texttype = '0'
+            if self.dbg: print ("t8")
+        if self.dbg: print ("o: ", text, txtOffset, offs)
+
+        if not text:
+            if self.dbg: print ("T: text with empty string - ", m)
+        else:
+            sh = ET.SubElement(children, "Shape", Type="Text", CutIndex=str(fontColor), Font=f"{f}", H=f"{(style.fs*1.75*0.6086434):.3f}", Str=f"{text}", Bold=f"{'1' if bold else '0'}", Italic=f"{'1' if italic else '0'}", Ah=f"{str(hor)}", Av=f"{str(ver)}", Eval=f"{texttype}", VariableOffset=f"{str(offs)}")  # 1mm = 1.75 Lightburn H units
+            sh.text = "\n  "
+            sh.tail = "\n"
+            xf = ET.SubElement(sh, "XForm")
+            xf.text = " ".join(f"{m[i]:.3f}" for i in (0, 3, 1, 4, 2, 5))
+            xf.tail = "\n"
+
 from random import random
 
 
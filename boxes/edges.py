@@ -15,6 +15,7 @@
 from __future__ import annotations
 
 import argparse
+import copy
 import inspect
 import math
 import re
@@ -158,6 +159,26 @@ class Bolts(BoltPolicy):
 ### Settings
 #############################################################################
 
+# argparse actions created by Settings.parserArguments(), shared by all parsers
+_parserActions: dict[Any, Any] = {}
+
+
+def copyAction(action: argparse.Action) -> argparse.Action:
+    """Copy of an argparse action - a lot faster than copy.deepcopy()
+
+    Mutable choices and defaults are copied so changing them does not
+    affect other parsers.
+    """
+    new = object.__new__(type(action))
+    new.__dict__.update(action.__dict__)
+    new.option_strings = list(action.option_strings)
+    for name in ("choices", "default"):
+        value = getattr(action, name)
+        if isinstance(value, (list, dict, set)):
+            setattr(new, name, copy.copy(value))
+    return new
+
+
 class Settings:
     """Generic Settings class
 
@@ -180,6 +201,29 @@ class Settings:
     def parserArguments(cls, parser, prefix=None, **defaults):
         prefix = prefix or cls.__name__[:-len("Settings")]
 
+        key = (cls, prefix, tuple(sorted(defaults.items())))
+        try:
+            cached = _parserActions.get(key)
+        except TypeError:  # unhashable default - don't cache
+            key = None
+            cached = None
+        if cached is None:
+            cached = cls._buildParserActions(prefix, **defaults)
+            if key is not None:
+                _parserActions[key] = cached
+        title, actions = cached
+
+        group = parser.add_argument_group(title)
+        group.prefix = prefix
+        for action in actions:
+            group._add_action(copyAction(action))
+
+    @classmethod
+    def _buildParserActions(cls, prefix, **defaults):
+        """Parse the doc string and create the argparse actions
+
+        Only called once per set of parameters. See parserArguments()
+        """
         lines = cls.__doc__.split("\n")
 
         # Parse doc string
@@ -190,8 +234,7 @@ class Settings:
             if m:
                 descriptions[m.group(1)] = m.group(2)
 
-        group = parser.add_argument_group(lines[0] or lines[1])
-        group.prefix = prefix
+        group = argparse.ArgumentParser(add_help=False)
         for name, default in (sorted(cls.absolute_params.items()) +
                               sorted(cls.relative_params.items())):
             # Handle choices
@@ -222,6 +265,7 @@ class Settings:
                                action="store", default=default,
                                choices=choices,
                                help=descriptions.get(name))
+        return lines[0] or lines[1], group._actions
 
     def __init__(self, thickness, relative: bool = True, **kw) -> None:
         self.values = {}
@@ -277,15 +321,22 @@ class Settings:
             factor = thickness
         for name, value in kw.items():
             if name in self.absolute_params:
-                self.values[name] = value
+                self._setValue(name, value)
             elif name in self.relative_params:
-                self.values[name] = value * factor
+                self._setValue(name, value * factor)
             elif hasattr(self, name):
                 setattr(self, name, value)
             else:
                 raise ValueError(f"Unknown parameter for {self.__class__.__name__}: {name}")
         self.checkValues()
 
+    def _setValue(self, name, value):
+        # update the copy stored as attribute by __getattr__ - but not
+        # attributes set otherwise (like thickness)
+        if name in self.__dict__ and self.__dict__[name] is self.values.get(name, self):
+            self.__dict__[name] = value
+        self.values[name] = value
+
     def checkValues(self) -> None:
         """
         Check if all values are in the right range. Raise ValueError if needed.
@@ -294,7 +345,9 @@ class Settings:
 
     def __getattr__(self, name):
         if "values" in self.__dict__ and name in self.values:
-            return self.values[name]
+            # store as attribute so further reads don't end up here
+            value = self.__dict__[name] = self.values[name]
+            return value
         raise AttributeError
 
 
@@ -303,19 +356,158 @@ class Settings:
 #############################################################################
 
 
+class EdgeRegistry(dict):
+    """Edges by their char - creating the default edges on first use
+
+    Factories are registered together with the chars of the edges they
+    create. They are called when one of these chars is looked up. Edges
+    set explicitly are never replaced by the ones created later.
+    Looking up an unknown char or iterating creates all edges so the
+    registry behaves like a dict filled in registration order.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._factories: list[Any] = []  # [chars, factory or None when done]
+        self._pending: dict[str, int] = {}  # char -> index in _factories
+
+    def register(self, chars: str, factory) -> None:
+        """Register a callable returning a list of edges with the given chars"""
+        self._factories.append([chars, factory])
+        for c in chars:
+            self._pending.setdefault(c, len(self._factories) - 1)
+
+    def _build(self, index: int) -> None:
+        chars, factory = self._factories[index]
+        self._factories[index][1] = None
+        for c in chars:
+            if self._pending.get(c) == index:
+                del self._pending[c]
+        for edge in factory():
+            if not dict.__contains__(self, edge.char):
+                dict.__setitem__(self, edge.char, edge)
+
+    def _buildAll(self) -> None:
+        if not self._factories:
+            return
+        for i, (chars, factory) in enumerate(self._factories):
+            if factory is not None:
+                self._build(i)
+        # restore the order the edges would have been created in
+        items = dict(dict.items(self))
+        dict.clear(self)
+        for chars, _ in self._factories:
+            for c in chars:
+                if c in items and not dict.__contains__(self, c):
+                    dict.__setitem__(self, c, items[c])
+        for c, edge in items.items():
+            if not dict.__contains__(self, c):
+                dict.__setitem__(self, c, edge)
+        self._factories = []
+        self._pending = {}
+
+    def _lookup(self, key) -> None:
+        """Create the edges needed to look up key"""
+        if dict.__contains__(self, key):
+            return
+        index = self._pending.get(key)
+        if index is not None:
+            self._build(index)
+        if isinstance(key, str) and not dict.__contains__(self, key):
+            self._buildAll()
+
+    def __missing__(self, key):
+        self._lookup(key)
+        if not dict.__contains__(self, key):
+            raise KeyError(key)
+        return dict.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        try:
+            self._lookup(key)
+        except TypeError:  # unhashable
+            return default
+        return dict.get(self, key, default)
+
+    def __contains__(self, key) -> bool:
+        try:
+            self._lookup(key)
+        except TypeError:  # unhashable
+            return False
+        return dict.__contains__(self, key)
+
+    def __delitem__(self, key) -> None:
+        self._lookup(key)
+        dict.__delitem__(self, key)
+
+    def pop(self, key, *default):
+        self._lookup(key)
+        return dict.pop(self, key, *default)
+
+    def setdefault(self, key, default=None):
+        self._lookup(key)
+        return dict.setdefault(self, key, default)
+
+    def __iter__(self):
+        self._buildAll()
+        return dict.__iter__(self)
+
+    def __len__(self) -> int:
+        self._buildAll()
+        return dict.__len__(self)
+
+    def __repr__(self) -> str:
+        self._buildAll()
+        return dict.__repr__(self)
+
+    def __eq__(self, other) -> bool:
+        self._buildAll()
+        return dict.__eq__(self, other)
+
+    __hash__ = None  # type: ignore
+
+    def keys(self):
+        self._buildAll()
+        return dict.keys(self)
+
+    def values(self):
+        self._buildAll()
+        return dict.values(self)
+
+    def items(self):
+        self._buildAll()
+        return dict.items(self)
+
+    def copy(self):
+        self._buildAll()
+        return dict(self)
+
+
 class BaseEdge(ABC):
     """Abstract base class for all Edges"""
     char: str | None = None
     description: str = "Abstract Edge Class"
 
+    # Turtle methods of the Boxes object used while drawing. They are
+    # stored in the instance on first use to not go through
+    # __getattr__ in the inner loops.
+    _boxesMethods = frozenset((
+        "edge", "corner", "polyline", "moveTo", "step", "hole",
+        "rectangularHole", "bedBoltHole", "curveTo", "saved_context"))
+
     def __init__(self, boxes, settings) -> None:
         self.boxes = boxes
         self.ctx = boxes.ctx
         self.settings = settings
+        if getattr(boxes, "_profiler", None) is not None:
+            boxes._profiler.instrumentEdge(self)
 
     def __getattr__(self, name):
         """Hack for using unalter code form Boxes class"""
-        return getattr(self.boxes, name)
+        value = getattr(self.boxes, name)
+        if name in self._boxesMethods:
+            self.__dict__[name] = value
+        return value
 
     @abstractmethod
     def __call__(self, length, **kw):
@@ -354,6 +546,14 @@ class BaseEdge(ABC):
         """Not yet supported"""
         return 0.0
 
+    def cacheKey(self):
+        """Hashable description of what the edge draws
+
+        Parts using only edges with a key are drawn once and replayed
+        afterwards. None (the default) disables that.
+        """
+        return None
+
 
 class Edge(BaseEdge):
     """Straight edge"""
@@ -361,6 +561,13 @@ class Edge(BaseEdge):
     description = "Straight Edge"
     positive = False
 
+    def cacheKey(self):
+        # sub classes may depend on other attributes
+        if (type(self) in (Edge, OutSetEdge) and
+                isinstance(self.settings, (int, float, type(None)))):
+            return (type(self), self.settings)
+        return None
+
     def __call__(self, length, bedBolts=None, bedBoltSettings=None, **kw):
         """Draw edge of length mm"""
         if bedBolts:
@@ -905,6 +1112,13 @@ Values:
 class FingerJointBase(ABC):
     """Abstract base class for finger joint."""
 
+    def settingsKey(self):
+        """Hashable snapshot of the settings - used as part of cache keys"""
+        settings = self.settings  # type: ignore
+        values = dict(settings.values)
+        values.update((k, v) for k, v in vars(settings).items() if k != "values")
+        return (type(settings), tuple(values.items()))
+
     def calcFingers(self, length: float, bedBolts) -> tuple[int, float]:
         space, finger = self.settings.space, self.settings.finger  # type: ignore
         fingers = int((length - (self.settings.surroundingspaces - 1) * space) // (space + finger))  # type: ignore
@@ -946,6 +1160,11 @@ class FingerJointEdge(BaseEdge, FingerJointBase):
     description = "Finger Joint"
     positive = True
 
+    def cacheKey(self):
+        if type(self) in (FingerJointEdge, FingerJointEdgeCounterPart):
+            return (type(self), self.positive, self.settingsKey())
+        return None
+
     def draw_finger(self, f, h, style, positive: bool = True, firsthalf: bool = True) -> None:
         t = self.settings.thickness
 
@@ -984,7 +1203,15 @@ class FingerJointEdge(BaseEdge, FingerJointBase):
             self.polyline(0, 90, h, -90, f, -90, h, 90)
 
     def __call__(self, length, bedBolts=None, bedBoltSettings=None, **kw):
+        if bedBolts:
+            self._draw(length, bedBolts, bedBoltSettings)
+        else:
+            # the same edges are drawn many times - replay if possible
+            self.boxes.drawCached(
+                (type(self), self.positive, length, self.settingsKey()),
+                self._draw, length)
 
+    def _draw(self, length, bedBolts=None, bedBoltSettings=None):
         positive = self.positive
         t = self.settings.thickness
 
@@ -1072,30 +1299,38 @@ class FingerHoles(FingerJointBase):
         """
         with self.boxes.saved_context():
             self.boxes.moveTo(x, y, angle)
-            s, f = self.settings.space, self.settings.finger
-            p = self.settings.play
-            b = self.boxes.burn
-            fingers, leftover = self.calcFingers(length, bedBolts)
+            if bedBolts:
+                self._draw(length, bedBolts, bedBoltSettings)
+            else:
+                self.boxes.drawCached(
+                    (type(self), length, self.settingsKey()),
+                    self._draw, length)
 
-            # not enough space for normal fingers - use small rectangular one
-            if (fingers == 0 and f and
-                    leftover > 0.75 * self.settings.thickness and leftover > 4 * p):
-                fingers = 1
-                f = leftover = leftover / 2.0
-                bedBolts = None
+    def _draw(self, length, bedBolts=None, bedBoltSettings=None):
+        s, f = self.settings.space, self.settings.finger
+        p = self.settings.play
+        b = self.boxes.burn
+        fingers, leftover = self.calcFingers(length, bedBolts)
 
-            if self.boxes.debug:
-                self.ctx.rectangle(b, -self.settings.width / 2 + b,
-                                   length - 2 * b, self.settings.width - 2 * b)
-            for i in range(fingers):
-                pos = leftover / 2.0 + i * (s + f)
+        # not enough space for normal fingers - use small rectangular one
+        if (fingers == 0 and f and
+                leftover > 0.75 * self.settings.thickness and leftover > 4 * p):
+            fingers = 1
+            f = leftover = leftover / 2.0
+            bedBolts = None
 
-                if bedBolts and bedBolts.drawBolt(i):
-                    d = (bedBoltSettings or self.boxes.bedBoltSettings)[0]
-                    self.boxes.hole(pos - 0.5 * s, 0, d * 0.5)
+        if self.boxes.debug:
+            self.ctx.rectangle(b, -self.settings.width / 2 + b,
+                               length - 2 * b, self.settings.width - 2 * b)
+        for i in range(fingers):
+            pos = leftover / 2.0 + i * (s + f)
+
+            if bedBolts and bedBolts.drawBolt(i):
+                d = (bedBoltSettings or self.boxes.bedBoltSettings)[0]
+                self.boxes.hole(pos - 0.5 * s, 0, d * 0.5)
 
-                self.boxes.rectangularHole(pos + 0.5 * f, 0,
-                                           f + p, self.settings.width + p)
+            self.boxes.rectangularHole(pos + 0.5 * f, 0,
+                                       f + p, self.settings.width + p)
 
 
 class FingerHoleEdge(BaseEdge):
@@ -1112,6 +1347,12 @@ class FingerHoleEdge(BaseEdge):
 
         self.fingerHoles = fingerHoles or boxes.fingerHolesAt
 
+    def cacheKey(self):
+        if (type(self) is FingerHoleEdge and type(self.fingerHoles) is FingerHoles
+                and self.settings is self.fingerHoles.settings):
+            return (type(self), self.fingerHoles.settingsKey())
+        return None
+
     def __call__(self, length, bedBolts=None, bedBoltSettings=None, **kw):
         dist = self.fingerHoles.settings.edge_width
         with self.saved_context():
@@ -0,0 +1,356 @@
+# Copyright (C) 2026 Florian Festi
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Placing holes inside of a polygon
+
+Pure geometry - the functions return hole positions and sizes and leave
+the drawing to the caller (see Boxes.fillHoles()).
+"""
+from __future__ import annotations
+
+import math
+
+import numpy
+from shapely.geometry import MultiPolygon, Polygon
+
+
+class PolygonIndex:
+    """Polygon prepared for point queries on many points at once
+
+    :param border: list of (x, y) tuples - closing the loop is optional
+    """
+
+    def __init__(self, border) -> None:
+        points = numpy.asarray(border, dtype=float)
+        if len(points) and numpy.array_equal(points[0], points[-1]):
+            points = points[:-1]
+        self.a = points
+        self.b = numpy.roll(points, -1, axis=0)
+        self.d = self.b - self.a
+        l2 = (self.d ** 2).sum(axis=1)
+        # avoid division by zero for duplicate points
+        self.l2 = numpy.where(l2 == 0.0, 1.0, l2)
+        self.bounds = (*points.min(axis=0), *points.max(axis=0))
+
+    def contains(self, points) -> numpy.ndarray:
+        """Even-odd test for an (n, 2) array of points - returns bool array"""
+        x = points[:, 0, None]
+        y = points[:, 1, None]
+        ax, ay = self.a[:, 0], self.a[:, 1]
+        bx, by = self.b[:, 0], self.b[:, 1]
+        crosses = (ay > y) != (by > y)
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            xi = ax + (y - ay) * (bx - ax) / (by - ay)
+        return ((crosses & (x < xi)).sum(axis=1) % 2) == 1
+
+    def distance(self, points) -> numpy.ndarray:
+        """Distance of an (n, 2) array of points to the outline"""
+        px = points[:, 0, None] - self.a[:, 0]
+        py = points[:, 1, None] - self.a[:, 1]
+        dx, dy = self.d[:, 0], self.d[:, 1]
+        t = numpy.clip((px * dx + py * dy) / self.l2, 0.0, 1.0)
+        return numpy.sqrt((px - t * dx) ** 2 + (py - t * dy) ** 2).min(axis=1)
+
+
+class HoleGrid:
+    """Holes already placed, sorted into square cells for neighbour look up
+
+    Cells are 2*max_radius+hspace wide. Holes further away than one
+    cell cannot limit the size of a new hole below max_radius, so only
+    the 3x3 surrounding cells need to be checked.
+
+    Cells are plain lists on purpose: they hold only a few holes each and
+    candidates are checked one by one as each placed hole changes the
+    space for the next one. numpy arrays per cell made packing about
+    twice as slow.
+    """
+
+    def __init__(self, max_radius, hspace) -> None:
+        self.max_radius = max_radius
+        self.hspace = hspace
+        self.cell = 2 * max_radius + hspace
+        self.cells: dict[tuple[int, int], list[tuple[float, float, float]]] = {}
+
+    def space(self, x, y, min_radius) -> float:
+        """Largest radius a hole at x, y may have - 0 if below min_radius"""
+        gx, gy = int(x // self.cell), int(y // self.cell)
+        r = self.max_radius
+        hspace = self.hspace
+        cells = self.cells
+        for cx in (gx - 1, gx, gx + 1):
+            for cy in (gy - 1, gy, gy + 1):
+                for x2, y2, r2 in cells.get((cx, cy), ()):
+                    r = min(r, math.hypot(x - x2, y - y2) - r2 - hspace)
+                    if r < min_radius:
+                        return 0
+        return r
+
+    def add(self, x, y, r) -> None:
+        self.cells.setdefault((int(x // self.cell), int(y // self.cell)), []).append((x, y, r))
+
+
+def randomHoles(border, max_radius, hspace=3, bspace=0, min_radius=0.5, max_random=1000, seed=None,
+                batch=256) -> list[tuple[float, float, float]]:
+    """Place holes of random size at random positions inside of a polygon
+
+    Holes are placed at integer coordinates and made as large as
+    possible - up to max_radius. Stops after max_random tries or 20
+    misses in a row.
+
+    :param border: list of (x, y) tuples of the polygon
+    :param max_radius: maximum hole radius
+    :param hspace: (Default value = 3) space between holes
+    :param bspace: (Default value = 0) space to border
+    :param min_radius: (Default value = 0.5) minimum hole radius
+    :param max_random: (Default value = 1000) maximum number of tries
+    :param seed: (Default value = None) seed for the random number generator - None for a different pattern every time
+    :param batch: (Default value = 256) number of candidates checked against the border at once
+    :return: list of (x, y, r) tuples
+    """
+    polygon = PolygonIndex(border)
+    min_x, min_y, max_x, max_y = polygon.bounds
+    x_lo, x_hi = math.floor(min_x + bspace), math.ceil(max_x - bspace)
+    y_lo, y_hi = math.floor(min_y + bspace), math.ceil(max_y - bspace)
+    if x_hi <= x_lo or y_hi <= y_lo:
+        return []
+
+    rng = numpy.random.default_rng(seed)
+    grid = HoleGrid(max_radius, hspace)
+    holes = []
+    tries = misses = 0
+
+    while tries < max_random and misses < 20:
+        n = min(batch, max_random - tries)
+        candidates = numpy.column_stack((rng.integers(x_lo, x_hi, n), rng.integers(y_lo, y_hi, n))).astype(float)
+        inside = polygon.contains(candidates)
+        # space to the border for all candidates at once
+        bdist = numpy.where(inside, polygon.distance(candidates) - bspace, -1.0)
+
+        for (x, y), b in zip(candidates.tolist(), bdist.tolist()):
+            tries += 1
+            misses += 1
+            if b >= min_radius:
+                r = min(b, grid.space(x, y, min_radius))
+                if r >= min_radius:
+                    grid.add(x, y, r)
+                    holes.append((x, y, r))
+                    misses = 0
+            if tries >= max_random or misses >= 20:
+                break
+
+    return holes
+
+
+def gridRadius(pattern, bounds, max_radius, hspace, bspace) -> tuple[float, float]:
+    """Next smaller radii to fit an 'optimum' number of holes in x and y direction
+
+    :param pattern: "hex" or any other grid
+    :param bounds: (min_x, min_y, max_x, max_y) of the area
+    """
+    min_x, min_y, max_x, max_y = bounds
+    # for x direction
+    nx = math.ceil((max_x - min_x - 2 * bspace + hspace) / (2 * max_radius + hspace))
+    max_radius_x = (max_x - min_x - 2 * bspace - (nx - 1) * hspace) / nx / 2
+
+    # for y direction
+    if pattern == "hex":
+        ny = math.ceil((max_y - min_y - 2 * bspace - 2 * max_radius) / (math.sqrt(3) / 2 * (2 * max_radius + hspace)))
+        max_radius_y = (max_y - min_y - 2 * bspace - math.sqrt(3) / 2 * ny * hspace) / (math.sqrt(3) * ny + 2 )
+    else:
+        ny = math.ceil((max_y - min_y - 2 * bspace + hspace) / (2 * max_radius + hspace))
+        max_radius_y = (max_y - min_y - 2 * bspace - (ny - 1) * hspace) / ny / 2
+    return max_radius_x, max_radius_y
+
+
+class Scanlines:
+    """Intersections of horizontal lines with a (multi) polygon
+
+    All edges are collected once. Each row is then intersected
+    analytically with all edges at once.
+    """
+
+    def __init__(self, geometry) -> None:
+        if isinstance(geometry, Polygon):
+            polygons = [geometry]
+        elif isinstance(geometry, MultiPolygon):
+            polygons = list(geometry.geoms)
+        else:
+            polygons = []
+        a, b = [], []
+        for polygon in polygons:
+            if polygon.is_empty:
+                continue
+            for ring in (polygon.exterior, *polygon.interiors):
+                coords = numpy.asarray(ring.coords, dtype=float)
+                a.append(coords[:-1])
+                b.append(coords[1:])
+        if a:
+            self.a = numpy.concatenate(a)
+            self.b = numpy.concatenate(b)
+        else:
+            self.a = self.b = numpy.zeros((0, 2))
+
+    def intervals(self, y) -> list[tuple[float, float]]:
+        """Sorted (x_start, x_end) pieces of the row y inside of the polygon"""
+        ay, by = self.a[:, 1], self.b[:, 1]
+        crossing = (ay > y) != (by > y)
+        ax, bx = self.a[crossing, 0], self.b[crossing, 0]
+        ay, by = ay[crossing], by[crossing]
+        xs = numpy.sort(ax + (y - ay) * (bx - ax) / (by - ay)).tolist()
+        return list(zip(xs[::2], xs[1::2]))
+
+
+def gridHoles(pattern, border, max_radius, hspace=3, bspace=0, min_radius=0.5) -> list[tuple[float, float, float]]:
+    """Place holes on a square or hex grid inside of a polygon
+
+    Holes that fully fit get the 'optimum' radius. Holes close to the
+    border are made smaller or left out if they would be smaller than
+    min_radius.
+
+    :param pattern: "square" or "hex"
+    :param border: list of (x, y) tuples of the polygon
+    :param max_radius: maximum hole radius
+    :param hspace: (Default value = 3) space between holes
+    :param bspace: (Default value = 0) space to border
+    :param min_radius: (Default value = 0.5) minimum hole radius
+    :return: list of (x, y, r) tuples
+    """
+    borderPoly = Polygon(border)
+    bounds = min_x, min_y, max_x, max_y = borderPoly.bounds
+    max_radius_x, max_radius_y = gridRadius(pattern, bounds, max_radius, hspace, bspace)
+    # use 'optimum' hole size
+    max_radius = min(max_radius_x, max_radius_y)
+
+    # check if at least one line fits (we do horizontal filling)
+    if (max_y - min_y) < (2 * max_radius + 2 * bspace):
+        return []
+
+    # make outer polygon a little wider to avoid
+    # overlapping with lines to be cut
+    outer = Scanlines(borderPoly.buffer(-1 * (bspace - 0.000001), join_style=2))
+    # shrink original polygon to get place for full size polygons
+    inner = Scanlines(borderPoly.buffer(-1 * (bspace + max_radius - 0.0001), join_style=2))
+
+    step = 2 * max_radius_x + hspace
+    holes: list[tuple[float, float, float]] = []
+    partial = [] # indices of holes sized by their distance to the border
+    row = 0
+    # set startpoint
+    y = min_y + bspace + max_radius_y
+
+    while y < (max_y - bspace - max_radius_y):
+        if pattern == "square" or row % 2 == 0:
+            xs = min_x + bspace + max_radius_x
+        else:
+            xs = min_x + max_radius_x * 2 + hspace / 2 + bspace
+
+        inner_lines = inner.intervals(y)
+        inner_line_index = 0
+
+        # process each line
+        for x_start, x_end in outer.intervals(y):
+            #initialize walking x coordinate
+            xw = (math.ceil((x_start - xs) / step) * step) + xs
+
+            # look up matching inner line
+            while (inner_line_index < len(inner_lines) and
+                   inner_lines[inner_line_index][1] < xw):
+                inner_line_index += 1
+
+            # and process line
+            while not xw > x_end:
+                # are we in inner polygon already?
+                if (len(inner_lines) > inner_line_index and
+                    xw > inner_lines[inner_line_index][0]):
+                    # place inner, full size polygons
+                    while xw < inner_lines[inner_line_index][1]:
+                        holes.append((xw, y, max_radius))
+                        xw += step
+                    # forward to next inner line
+                    while (inner_line_index < len(inner_lines) and
+                           inner_lines[inner_line_index][0] < xw):
+                        inner_line_index += 1
+                    if xw > x_end:
+                        break
+
+                # size the hole by the distance to the border later
+                partial.append(len(holes))
+                holes.append((xw, y, max_radius))
+                xw += step
+
+        row += 1
+        if pattern == "square":
+            y += 2 * max_radius_y + hspace - 0.0001
+        else:
+            y += (math.sqrt(3) / 2 * (2 * max_radius_y + hspace)) - 0.0001
+
+    if partial:
+        points = numpy.array([holes[i][:2] for i in partial])
+        radii = numpy.minimum(PolygonIndex(border).distance(points) - bspace, max_radius).tolist()
+        for i, r in zip(partial, radii):
+            holes[i] = (holes[i][0], holes[i][1], r)
+        holes = [h for h in holes if h[2] >= min_radius]
+    return holes
+
+
+def hexGrid(x, y, r, b) -> numpy.ndarray:
+    """Centers of holes with radius r and space b filling a x * y rectangle in a hex pattern
+
+    :return: numpy array of shape (n, 2) - row by row
+    """
+    w = r + b / 2.0
+    dist = w * math.cos(math.pi / 6.0)
+
+    # how many half circles do fit
+    cx = int((x - 2 * r) // (w)) + 2
+    cy = int((y - 2 * r) // (dist)) + 2
+
+    # what's left on the sides
+    lx = (x - (2 * r + (cx - 2) * w)) / 2.0
+    ly = (y - (2 * r + ((cy // 2) * 2) * dist - 2 * dist)) / 2.0
+
+    rows = []
+    for i in range(max(cy // 2, 0)):
+        n = max((cx - (i % 2)) // 2, 0)
+        px = 2 * numpy.arange(n) * w + r + lx
+        if i % 2:
+            px += w
+        py = numpy.full(n, i * 2 * dist + r + ly)
+        rows.append(numpy.column_stack((px, py)))
+    if not rows:
+        return numpy.zeros((0, 2))
+    return numpy.concatenate(rows)
+
+
+def circleMask(x, y, r, b, px, py) -> numpy.ndarray:
+    """Holes of a hexGrid() fully inside the circle inscribed into the x * y rectangle"""
+    cx, cy = x / 2.0, y / 2.0
+    dx, dy = px - cx, py - cy
+    return (dx * dx + dy * dy) ** 0.5 <= (cx - r)
+
+
+def plateMask(rc):
+    """Mask for holes of a hexGrid() fully inside a plate with corners of radius rc"""
+
+    def mask(x, y, r, b, px, py) -> numpy.ndarray:
+        posx = abs(px - (x / 2.0))
+        posy = abs(py - (y / 2.0))
+
+        wx = 0.5 * x - rc - r
+        wy = 0.5 * y - rc - r
+
+        dx, dy = posx - wx, posy - wy
+        return (posx <= wx) | (posy <= wx) | ((dx * dx + dy * dy) ** 0.5 <= rc)
+
+    return mask
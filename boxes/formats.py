@@ -20,6 +20,7 @@ import subprocess
 import tempfile
 import io
 from boxes.drawing import Context, LBRN2Surface, PSSurface, SVGSurface
+from boxes.limits import ResourceLimitExceeded
 
 
 class Formats:
@@ -53,15 +54,25 @@ class Formats:
         # "" : [('Content-type', '')],
     }
 
+    # Results of looking up the external tools - shared by all instances
+    _tools: dict[str, str | None] | None = None
+
     def __init__(self) -> None:
-        for cmd in self.pstoedit_candidates:
-            self.pstoedit = shutil.which(cmd)
-            if self.pstoedit:
-                break
-        for cmd in self.ps2pdf_candidates:
-            self.ps2pdf = shutil.which(cmd)
-            if self.ps2pdf:
-                break
+        if Formats._tools is None:
+            Formats._tools = {
+                "pstoedit": self._which(self.pstoedit_candidates),
+                "ps2pdf": self._which(self.ps2pdf_candidates),
+            }
+        self.pstoedit = Formats._tools["pstoedit"]
+        self.ps2pdf = Formats._tools["ps2pdf"]
+
+    @staticmethod
+    def _which(candidates):
+        for cmd in candidates:
+            path = shutil.which(cmd)
+            if path:
+                return path
+        return None
 
     def getFormats(self):
         if self.pstoedit:
@@ -79,7 +90,11 @@ class Formats:
         ctx = Context(surface)
         return surface, ctx
 
-    def convert(self, data, fmt):
+    def convert(self, data, fmt, timeout=None):
+        """Convert PostScript data into fmt with an external tool
+
+        :param timeout: seconds the tool may run - None for no limit
+        """
 
         if fmt not in self._BASE_FORMATS:
             fd, tmpfile = tempfile.mkstemp()
@@ -93,7 +108,12 @@ class Formats:
                         ps2pdf=self.ps2pdf,
                         input=tmpfile,
                         output=outfile).split()
-                    result = subprocess.run(cmd)
+                    try:
+                        result = subprocess.run(cmd, timeout=timeout)
+                    except subprocess.TimeoutExpired:
+                        raise ResourceLimitExceeded(
+                            f"Rendering took too long: converting to {fmt} did not "
+                            f"finish within {timeout:g} seconds")
 
                     if result.returncode:
                         # XXX show stderr output
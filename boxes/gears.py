@@ -35,11 +35,19 @@
 # 			AttributeError: 'module' object inkex has no attribute 'uutounit
 # 			Fixed https://github.com/jnweiger/inkscape-gears-dev
 
+from __future__ import annotations
+
+import dataclasses
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
 from math import acos, asin, ceil, cos, degrees, pi, radians, sin, sqrt, tan
 from os import devnull  # for debugging
 
 two_pi = 2 * pi
 import argparse
+from typing import Any
+
+import numpy
 
 from boxes.vectors import vdiff, vlength
 
@@ -194,46 +202,69 @@ def generate_rack_points(tooth_count, pitch, addendum, pressure_angle,
 
 def generate_spur_points(teeth, base_radius, pitch_radius, outer_radius, root_radius, accuracy_involute, accuracy_circular):
     """ given a set of core gear params
-        - generate the svg path for the gear
+        - generate the outline of the gear as numpy array of shape (n, 2)
+        - only one tooth is calculated, it is then rotated into
+          all positions at once
     """
+    step = two_pi / teeth
     half_thick_angle = two_pi / (4.0 * teeth ) #?? = pi / (2.0 * teeth)
     pitch_to_base_angle  = involute_intersect_angle( base_radius, pitch_radius )
-    pitch_to_outer_angle = involute_intersect_angle( base_radius, outer_radius ) - pitch_to_base_angle
 
-    start_involute_radius = max(base_radius, root_radius)
-    radii = linspace(start_involute_radius, outer_radius, accuracy_involute)
-    angles = [involute_intersect_angle(base_radius, r) for r in radii]
-
-    centers = [(x * two_pi / float( teeth) ) for x in range( teeth ) ]
-    points = []
-
-    for c in centers:
-    # Angles
-        pitch1 = c - half_thick_angle
-        base1  = pitch1 - pitch_to_base_angle
-        offsetangles1 = [ base1 + x for x in angles]
-        points1 = [ point_on_circle( radii[i], offsetangles1[i]) for i in range(0,len(radii)) ]
-
-        pitch2 = c + half_thick_angle
-        base2  = pitch2 + pitch_to_base_angle
-        offsetangles2 = [ base2 - x for x in angles]
-        points2 = [ point_on_circle( radii[i], offsetangles2[i]) for i in range(0,len(radii)) ]
-
-        points_on_outer_radius = [ point_on_circle(outer_radius, x) for x in linspace(offsetangles1[-1], offsetangles2[-1], accuracy_circular) ]
-
-        if root_radius > base_radius:
-            pitch_to_root_angle = pitch_to_base_angle - involute_intersect_angle(base_radius, root_radius )
-            root1 = pitch1 - pitch_to_root_angle
-            root2 = pitch2 + pitch_to_root_angle
-            points_on_root = [point_on_circle (root_radius, x) for x in linspace(root2, root1+(two_pi/float(teeth)), accuracy_circular) ]
-            p_tmp = points1 + points_on_outer_radius[1:-1] + points2[::-1] + points_on_root[1:-1] # [::-1] reverses list; [1:-1] removes first and last element
-        else:
-            points_on_root = [point_on_circle (root_radius, x) for x in linspace(base2, base1+(two_pi/float(teeth)), accuracy_circular) ]
-            p_tmp = points1 + points_on_outer_radius[1:-1] + points2[::-1] + points_on_root # [::-1] reverses list
+    def linspace(a, b, n):
+        # same rounding as the plain Python linspace() above
+        return a + numpy.arange(n) * (b - a) / (n - 1)
 
-        points.extend( p_tmp )
+    def on_circle(radius, angles):
+        return numpy.column_stack((radius * numpy.cos(angles), radius * numpy.sin(angles)))
 
-    return (points)
+    start_involute_radius = max(base_radius, root_radius)
+    radii = linspace(start_involute_radius, outer_radius, accuracy_involute)
+    angles = numpy.sqrt(radii**2 - base_radius**2) / base_radius - numpy.arccos(base_radius / radii)
+
+    # Angles of the tooth centered at angle 0
+    pitch1 = -half_thick_angle
+    base1  = pitch1 - pitch_to_base_angle
+    offsetangles1 = base1 + angles
+    points1 = on_circle(radii, offsetangles1)
+
+    pitch2 = half_thick_angle
+    base2  = pitch2 + pitch_to_base_angle
+    offsetangles2 = base2 - angles
+    points2 = on_circle(radii, offsetangles2)
+
+    points_on_outer_radius = on_circle(outer_radius, linspace(offsetangles1[-1], offsetangles2[-1], accuracy_circular))
+
+    if root_radius > base_radius:
+        pitch_to_root_angle = pitch_to_base_angle - involute_intersect_angle(base_radius, root_radius )
+        root1 = pitch1 - pitch_to_root_angle
+        root2 = pitch2 + pitch_to_root_angle
+        points_on_root = on_circle(root_radius, linspace(root2, root1 + step, accuracy_circular))[1:-1] # [1:-1] removes first and last element
+    else:
+        points_on_root = on_circle(root_radius, linspace(base2, base1 + step, accuracy_circular))
+    tooth = numpy.concatenate((points1, points_on_outer_radius[1:-1], points2[::-1], points_on_root)) # [::-1] reverses
+
+    # Rotate the tooth into all positions
+    centers = numpy.arange(teeth) * step
+    cos_c = numpy.cos(centers)[:, None]
+    sin_c = numpy.sin(centers)[:, None]
+    x, y = tooth[:, 0], tooth[:, 1]
+    points = numpy.stack((x * cos_c - y * sin_c, x * sin_c + y * cos_c), axis=-1)
+    return points.reshape(-1, 2)
+
+
+@lru_cache(maxsize=64)
+def spur_gear_points(teeth, pitch, angle, clearance=0, ring_gear=False, profile_shift=0.,
+                     accuracy_involute=20, accuracy_circular=9):
+    """ Memoized outline of a spur or ring gear
+        - same parameters as gear_calculations() and generate_spur_points()
+        - returns a read only numpy array of shape (n, 2)
+    """
+    (pitch_radius, base_radius, addendum, dedendum,
+     outer_radius, root_radius, tooth) = gear_calculations(teeth, pitch, angle, clearance, ring_gear, profile_shift)
+    points = generate_spur_points(teeth, base_radius, pitch_radius, outer_radius, root_radius,
+                                  accuracy_involute, accuracy_circular)
+    points.flags.writeable = False
+    return points
 
 def inkbool(val):
     return val not in ("False", False, "0", 0, "None", None)
@@ -256,6 +287,129 @@ class OptionParser(argparse.ArgumentParser):
             names.append("--" + long_.replace("-", "_")[2:])
         self.add_argument(*names, **kw)
 
+def _option(short, long_, type_, default, help_):
+    return field(default=default, metadata={"short": short, "long": long_, "type": type_, "help": help_})
+
+
+@dataclass
+class GearOptions:
+    """Parameters of a gear
+
+    Same names, defaults and types as the command line options of the
+    original Inkscape extension. Create with fromKw() to get values
+    converted like the OptionParser does.
+    """
+
+    teeth: int = _option("-t", "--teeth", "int", 24,
+                         "Number of teeth")
+    system: str = _option("-s", "--system", "string", 'MM',
+                          "Select system: 'CP' (Cyclic Pitch (default)), 'DP' (Diametral Pitch), 'MM' (Metric Module)")
+    dimension: float = _option("-d", "--dimension", "float", 1.0,
+                               "Tooth size, depending on system (which defaults to CP)")
+    angle: float = _option("-a", "--angle", "float", 20.0,
+                           "Pressure Angle (common values: 14.5, 20, 25 degrees)")
+    profile_shift: float = _option("-p", "--profile-shift", "float", 20.0,
+                                   "Profile shift [in percent of the module]. Negative values help against undercut")
+    units: str = _option("-u", "--units", "string", 'mm',
+                         "Units this dialog is using")
+    accuracy: int = _option("-A", "--accuracy", "int", 0,
+                            "Accuracy of involute: automatic: 5..20 (default), best: 20(default), medium 10, low: 5; good accuracy is important with a low tooth count")
+    # Clearance: Radial distance between top of tooth on one gear to bottom of gap on another.
+    clearance: float = _option("", "--clearance", "float", 0.0,
+                               "Clearance between bottom of gap of this gear and top of tooth of another")
+    annotation: bool = _option("", "--annotation", "inkbool", False,
+                               "Draw annotation text")
+    internal_ring: bool = _option("-i", "--internal-ring", "inkbool", False,
+                                  "Ring (or Internal) gear style (default: normal spur gear)")
+    mount_hole: float = _option("", "--mount-hole", "float", 0.0,
+                                "Mount hole diameter")
+    mount_diameter: float = _option("", "--mount-diameter", "float", 15.0,
+                                    "Mount support diameter")
+    spoke_count: int = _option("", "--spoke-count", "int", 3,
+                               "Spokes count")
+    spoke_width: float = _option("", "--spoke-width", "float", 5.0,
+                                 "Spoke width")
+    holes_rounding: float = _option("", "--holes-rounding", "float", 5.0,
+                                    "Holes rounding")
+    active_tab: str = _option("", "--active-tab", "string", '',
+                              "Active tab. Not used now.")
+    centercross: bool = _option("-x", "--centercross", "inkbool", False,
+                                "Draw cross in center")
+    pitchcircle: bool = _option("-c", "--pitchcircle", "inkbool", False,
+                                "Draw pitch circle (for mating)")
+    drawrack: bool = _option("-r", "--draw-rack", "inkbool", False,
+                             "Draw rack gear instead of spur gear")
+    teeth_length: int = _option("", "--rack-teeth-length", "int", 12,
+                                "Length (in teeth) of rack")
+    base_height: float = _option("", "--rack-base-height", "float", 8.0,
+                                 "Height of base of rack")
+    base_tab: float = _option("", "--rack-base-tab", "float", 14.0,
+                              "Length of tabs on ends of rack")
+    undercut_alert: bool = _option("", "--undercut-alert", "inkbool", False,
+                                   "Let the user confirm a warning dialog if undercut occurs. This dialog also shows helpful hints against undercut")
+
+    def __post_init__(self) -> None:
+        if self.system not in ("CP", "DP", "MM"):
+            raise ValueError("unknown system '%s', try CP, DP, MM" % self.system)
+
+    @staticmethod
+    def _convert(convert, value):
+        if convert is int:
+            if isinstance(value, int) and not isinstance(value, bool):
+                return value
+            return int(str(value))
+        if convert is float and isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+        if convert is str:
+            return str(value)
+        return convert(value)
+
+    def replace(self, **kw) -> GearOptions:
+        """Return a copy with the given parameters changed
+
+        Accepts the field names as well as the long option names
+        (with "_" instead of "-"). Values are converted to the type of
+        the option.
+        """
+        values = {}
+        for name, value in kw.items():
+            try:
+                field_name, convert = _OPTION_NAMES[name]
+            except KeyError:
+                raise ValueError(f"Unknown gear parameter '{name}'") from None
+            try:
+                values[field_name] = self._convert(convert, value)
+            except ValueError:
+                raise ValueError(f"Invalid value for gear parameter '{name}': {value!r}") from None
+        return dataclasses.replace(self, **values)
+
+    @classmethod
+    def fromKw(cls, **kw) -> GearOptions:
+        """Create from keyword arguments as taken by Gears.__call__()"""
+        return _DEFAULT_OPTIONS.replace(**kw)
+
+    @classmethod
+    def optionParser(cls) -> OptionParser:
+        """Command line parser with all options"""
+        parser = OptionParser()
+        for f in fields(cls):
+            parser.add_option(f.metadata["short"], f.metadata["long"],
+                              action="store", type=f.metadata["type"],
+                              dest=f.name, default=f.default,
+                              help=f.metadata["help"])
+        return parser
+
+
+_DEFAULT_OPTIONS = GearOptions()
+# accepted parameter names -> field name, type conversion
+_OPTION_NAMES: dict[str, tuple[str, Any]] = {}
+for _f in fields(GearOptions):
+    _OPTION_NAMES[_f.name] = (_f.name, OptionParser.types[_f.metadata["type"]])
+    if _f.metadata["long"]:
+        _OPTION_NAMES[_f.metadata["long"][2:].replace("-", "_")] = _OPTION_NAMES[_f.name]
+del _f
+
+
 class Gears:
 
     def __init__(self, boxes, **kw) -> None:
@@ -268,122 +422,21 @@ class Gears:
         #    # print >>self.tty, "gears-dev " + __version__
 
         self.boxes = boxes
-        self.OptionParser = OptionParser()
-        self.OptionParser.add_option("-t", "--teeth",
-                                     action="store", type="int",
-                                     dest="teeth", default=24,
-                                     help="Number of teeth")
-
-        self.OptionParser.add_option("-s", "--system",
-                                     action="store", type="string",
-                                     dest="system", default='MM',
-                                     help="Select system: 'CP' (Cyclic Pitch (default)), 'DP' (Diametral Pitch), 'MM' (Metric Module)")
-
-        self.OptionParser.add_option("-d", "--dimension",
-                                     action="store", type="float",
-                                     dest="dimension", default=1.0,
-                                     help="Tooth size, depending on system (which defaults to CP)")
-
-
-        self.OptionParser.add_option("-a", "--angle",
-                                     action="store", type="float",
-                                     dest="angle", default=20.0,
-                                     help="Pressure Angle (common values: 14.5, 20, 25 degrees)")
-
-        self.OptionParser.add_option("-p", "--profile-shift",
-                                     action="store", type="float",
-                                     dest="profile_shift", default=20.0,
-                                     help="Profile shift [in percent of the module]. Negative values help against undercut")
-
-        self.OptionParser.add_option("-u", "--units",
-                                     action="store", type="string",
-                                     dest="units", default='mm',
-                                     help="Units this dialog is using")
-
-        self.OptionParser.add_option("-A", "--accuracy",
-                                     action="store", type="int",
-                                     dest="accuracy", default=0,
-                                     help="Accuracy of involute: automatic: 5..20 (default), best: 20(default), medium 10, low: 5; good accuracy is important with a low tooth count")
-        # Clearance: Radial distance between top of tooth on one gear to bottom of gap on another.
-        self.OptionParser.add_option("", "--clearance",
-                                     action="store", type="float",
-                                     dest="clearance", default=0.0,
-                                     help="Clearance between bottom of gap of this gear and top of tooth of another")
-
-        self.OptionParser.add_option("", "--annotation",
-                                     action="store", type="inkbool",
-                                     dest="annotation", default=False,
-                                     help="Draw annotation text")
-
-        self.OptionParser.add_option("-i", "--internal-ring",
-                                     action="store", type="inkbool",
-                                     dest="internal_ring", default=False,
-                                     help="Ring (or Internal) gear style (default: normal spur gear)")
-
-        self.OptionParser.add_option("", "--mount-hole",
-                                     action="store", type="float",
-                                     dest="mount_hole", default=0.,
-                                     help="Mount hole diameter")
-
-        self.OptionParser.add_option("", "--mount-diameter",
-                                     action="store", type="float",
-                                     dest="mount_diameter", default=15,
-                                     help="Mount support diameter")
-
-        self.OptionParser.add_option("", "--spoke-count",
-                                     action="store", type="int",
-                                     dest="spoke_count", default=3,
-                                     help="Spokes count")
-
-        self.OptionParser.add_option("", "--spoke-width",
-                                     action="store", type="float",
-                                     dest="spoke_width", default=5,
-                                     help="Spoke width")
-
-        self.OptionParser.add_option("", "--holes-rounding",
-                                     action="store", type="float",
-                                     dest="holes_rounding", default=5,
-                                     help="Holes rounding")
-
-        self.OptionParser.add_option("", "--active-tab",
-                                     action="store", type="string",
-                                     dest="active_tab", default='',
-                                     help="Active tab. Not used now.")
-
-        self.OptionParser.add_option("-x", "--centercross",
-                                     action="store", type="inkbool",
-                                     dest="centercross", default=False,
-                                     help="Draw cross in center")
-
-        self.OptionParser.add_option("-c", "--pitchcircle",
-                                     action="store", type="inkbool",
-                                     dest="pitchcircle", default=False,
-                                     help="Draw pitch circle (for mating)")
-
-        self.OptionParser.add_option("-r", "--draw-rack",
-                                     action="store", type="inkbool",
-                                     dest="drawrack", default=False,
-                                     help="Draw rack gear instead of spur gear")
-
-        self.OptionParser.add_option("", "--rack-teeth-length",
-                                     action="store", type="int",
-                                     dest="teeth_length", default=12,
-                                     help="Length (in teeth) of rack")
-
-        self.OptionParser.add_option("", "--rack-base-height",
-                                     action="store", type="float",
-                                     dest="base_height", default=8,
-                                     help="Height of base of rack")
-
-        self.OptionParser.add_option("", "--rack-base-tab",
-                                     action="store", type="float",
-                                     dest="base_tab", default=14,
-                                     help="Length of tabs on ends of rack")
-
-        self.OptionParser.add_option("", "--undercut-alert",
-                                     action="store", type="inkbool",
-                                     dest="undercut_alert", default=False,
-                                     help="Let the user confirm a warning dialog if undercut occurs. This dialog also shows helpful hints against undercut")
+        self._OptionParser: OptionParser | None = None
+
+    @property
+    def OptionParser(self) -> OptionParser:
+        """Legacy argparse interface - not used for drawing any longer"""
+        if self._OptionParser is None:
+            self._OptionParser = GearOptions.optionParser()
+        return self._OptionParser
+
+    def _options(self, options: GearOptions | None, kw) -> GearOptions:
+        if options is None:
+            return GearOptions.fromKw(**kw)
+        if kw:
+            return options.replace(**kw)
+        return options
 
     def calc_circular_pitch(self):
         """We use math based on circular pitch."""
@@ -487,8 +540,12 @@ class Gears:
 
         return messages
 
-    def sizes(self, **kw):
-        self.options = self.OptionParser.parse_args([f"--{name}={value}" for name, value in kw.items()])
+    def sizes(self, options: GearOptions | None = None, **kw):
+        """Return pitch radius, width and height of a gear
+
+        :param options: GearOptions (Default value = None) - may be combined with keyword arguments overriding them
+        """
+        self.options = self._options(options, kw)
         # Pitch (circular pitch): Length of the arc from one tooth to the next)
         # Pitch diameter: Diameter of pitch circle.
         pitch = self.calc_circular_pitch()
@@ -545,13 +602,15 @@ class Gears:
         self.boxes.ctx.restore()
         self.boxes.move(width, width, move)
 
-    def __call__(self, teeth_only=False, move="", callback=None, **kw):
+    def __call__(self, teeth_only=False, move="", callback=None, options: GearOptions | None = None, **kw):
         """ Calculate Gear factors from inputs.
             - Make list of radii, angles, and centers for each tooth and
               iterate through them
             - Turn on other visual features e.g. cross, rack, annotations, etc
+            - parameters are given as GearOptions and/or as keyword
+              arguments with the names of the command line options
         """
-        self.options = self.OptionParser.parse_args([f"--{name}={value}" for name, value in kw.items()])
+        self.options = self._options(options, kw)
 
         warnings = [] # list of extra messages to be shown in annotations
         # calculate unit factor for units defined in dialog.
@@ -638,7 +697,8 @@ class Gears:
             warnings.extend(msg.split("\n"))
 
         # All base calcs done. Start building gear
-        points = generate_spur_points(teeth, base_radius, pitch_radius, outer_radius, root_radius, accuracy_involute, accuracy_circular)
+        points = spur_gear_points(teeth, pitch, angle, clearance, self.options.internal_ring, self.options.profile_shift*0.01,
+                                  accuracy_involute, accuracy_circular)
 
         if not teeth_only:
             self.boxes.moveTo(width/2, height/2)
@@ -172,6 +172,7 @@ for canned tomatoes:
                     bspace=min(2*self.thickness, self.fillHoles_space_to_border)  if self.fillHoles_fill_pattern in ["hbar", "vbar"] else min(2*self.thickness, self.width/20),
                     bar_length=self.fillHoles_bar_length,
                     max_random=self.fillHoles_max_random,
+                    seed=self.fillHoles_random_seed or None,
                     )
 
     def cb_top(self, nr):
@@ -193,6 +194,7 @@ for canned tomatoes:
                     bspace=min(2*self.thickness, self.fillHoles_space_to_border)  if self.fillHoles_fill_pattern in ["hbar", "vbar"] else min(2*self.thickness, self.width/20),
                     bar_length=self.fillHoles_bar_length,
                     max_random=self.fillHoles_max_random,
+                    seed=self.fillHoles_random_seed or None,
                     )
 
     def cb_bottom_chute(self, nr):
@@ -285,6 +287,7 @@ for canned tomatoes:
                 style=self.fillHoles_hole_style,
                 bar_length=self.fillHoles_bar_length,
                 max_random=self.fillHoles_max_random,
+                seed=self.fillHoles_random_seed or None,
                 )
 
     def render(self):
@@ -49,8 +49,7 @@ You need (permanent) baking paper to create the conveyor. With that you can pick
 
     def holesCB(self, d):
         def cb():
-            for i in range(5):
-                self.hole((self.x-3)/5 * (i+0.5), 20, d=d)
+            self.holesAt([((self.x-3)/5 * (i+0.5), 20) for i in range(5)], d=d)
         return cb
 
     def gripCB(self, top):
@@ -0,0 +1,154 @@
+# Copyright (C) 2026 Florian Festi
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Resource limits for rendering a generator
+
+Limits are unlimited by default. boxes sets them with --max-segments,
+--max-parts, --max-time and --max-output, other programs with the
+BOXES_MAX_SEGMENTS, BOXES_MAX_PARTS, BOXES_MAX_TIME and BOXES_MAX_OUTPUT
+environment variables or by assigning Boxes.limits. boxesserver uses
+SERVER_LIMITS unless configured otherwise.
+"""
+from __future__ import annotations
+
+import os
+import time
+
+
+class ResourceLimitExceeded(ValueError):
+    """Rendering was stopped as it needs more resources than allowed"""
+
+
+class ResourceLimits:
+    """Budget for rendering one generator - None means unlimited
+
+    :param max_segments: number of lines, curves and texts drawn
+    :param max_parts: number of parts
+    :param max_time: wall time in seconds from opening to finishing the output
+    :param max_output: size of the output file in bytes
+    """
+
+    # Time and output size are checked every CHECK_INTERVAL segments
+    CHECK_INTERVAL = 1000
+
+    ENVIRONMENT = {
+        "max_segments": ("BOXES_MAX_SEGMENTS", int),
+        "max_parts": ("BOXES_MAX_PARTS", int),
+        "max_time": ("BOXES_MAX_TIME", float),
+        "max_output": ("BOXES_MAX_OUTPUT", int),
+    }
+
+    def __init__(self, max_segments: int | None = None, max_parts: int | None = None,
+                 max_time: float | None = None, max_output: int | None = None) -> None:
+        self.max_segments = max_segments
+        self.max_parts = max_parts
+        self.max_time = max_time
+        self.max_output = max_output
+
+    def __repr__(self) -> str:
+        return (f"ResourceLimits(max_segments={self.max_segments}, max_parts={self.max_parts}, "
+                f"max_time={self.max_time}, max_output={self.max_output})")
+
+    @classmethod
+    def fromEnvironment(cls) -> ResourceLimits:
+        """Limits set by the BOXES_MAX_* environment variables"""
+        kw = {}
+        for name, (var, type_) in cls.ENVIRONMENT.items():
+            value = os.environ.get(var)
+            if value:
+                try:
+                    kw[name] = type_(value)
+                except ValueError:
+                    raise ValueError(f"{var} must be a number, not {value!r}")
+        return cls(**kw)
+
+    def setEnvironment(self) -> None:
+        """Pass the limits to sub processes and the render daemon"""
+        for name, (var, _) in self.ENVIRONMENT.items():
+            value = getattr(self, name)
+            if value is not None:
+                os.environ[var] = str(value)
+
+    def updated(self, other: ResourceLimits) -> ResourceLimits:
+        """Copy with the limits set in other replacing these"""
+        kw = {name: getattr(self, name) for name in self.ENVIRONMENT}
+        kw.update((name, getattr(other, name)) for name in self.ENVIRONMENT
+                  if getattr(other, name) is not None)
+        return ResourceLimits(**kw)
+
+    def start(self) -> Budget:
+        """Start rendering with these limits"""
+        return Budget(self)
+
+
+class Budget:
+    """Resources left while rendering - checked by the Surface"""
+
+    def __init__(self, limits: ResourceLimits) -> None:
+        self.limits = limits
+        self.start = time.monotonic()
+        self.deadline = None if limits.max_time is None else self.start + limits.max_time
+
+    def nextCheck(self, segments: int) -> int:
+        """Number of segments at which check() has to be called next"""
+        n = segments + self.limits.CHECK_INTERVAL
+        if self.limits.max_segments is not None:
+            n = min(n, self.limits.max_segments)
+        return n
+
+    def check(self, segments: int = 0, output: int = 0) -> None:
+        """Raise ResourceLimitExceeded if any limit is exceeded
+
+        :param segments: segments drawn so far
+        :param output: bytes written so far
+        """
+        limits = self.limits
+        if limits.max_segments is not None and segments > limits.max_segments:
+            raise ResourceLimitExceeded(
+                f"Too many lines: more than {limits.max_segments} segments")
+        if limits.max_output is not None and output > limits.max_output:
+            raise ResourceLimitExceeded(
+                f"Output too large: more than {limits.max_output} bytes")
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise ResourceLimitExceeded(
+                f"Rendering took too long: more than {limits.max_time:g} seconds")
+
+    def timeLeft(self) -> float | None:
+        """Seconds until max_time is reached - None if unlimited"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def remaining(self, output: int = 0) -> ResourceLimits:
+        """Limits for a follow up rendering sharing the time and output of this one
+
+        :param output: bytes already used up
+        :raises ResourceLimitExceeded: if nothing is left
+        """
+        self.check(output=output)
+        limits = self.limits
+        max_output = None if limits.max_output is None else limits.max_output - output
+        return ResourceLimits(max_segments=limits.max_segments, max_parts=limits.max_parts,
+                              max_time=self.timeLeft(), max_output=max_output)
+
+    def checkParts(self, parts: int) -> None:
+        if self.limits.max_parts is not None and parts > self.limits.max_parts:
+            raise ResourceLimitExceeded(
+                f"Too many parts: more than {self.limits.max_parts}")
+
+
+# Defaults of boxesserver - generous for real projects but keeping a
+# single request from tying up the server
+SERVER_LIMITS = ResourceLimits(max_segments=1000000, max_parts=2000,
+                               max_time=60.0, max_output=100 * 1024 * 1024)
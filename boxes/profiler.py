@@ -0,0 +1,242 @@
+# Copyright (C) 2026 Florian Festi
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Instrumentation of the turtle graphics layer
+
+Counts calls and time spent per turtle graphics method of Boxes and
+per edge class and the segments drawn per part. Switched on with
+``boxes --profile`` or by setting the BOXES_PROFILE environment
+variable (e.g. for boxesserver). The report is written to stderr when
+the generator is closed.
+
+``--profile-stacks FILE`` or BOXES_PROFILE_STACKS=FILE append the call
+stacks with the time spent in them (in µs) to FILE in the collapsed
+format read by flamegraph.pl, speedscope and similar tools.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from functools import wraps
+from typing import Any, TextIO
+
+# Methods of the Boxes object that are measured
+METHODS = (
+    "render",
+    "edge", "corner", "polyline", "curveTo", "moveTo", "step",
+    "edgeCorner", "move", "text", "drawCached",
+    "hole", "rectangularHole", "dHole", "flatHole", "bedBoltHole",
+    "holesAt", "rectangularHolesAt", "fillHoles",
+    "hexHolesRectangle", "hexHolesCircle", "hexHolesPlate", "hexHolesHex",
+    "rectangularWall", "flangedWall", "rectangularTriangle",
+    "trapezoidWall", "trapezoidSideWall", "polygonWall", "polygonWalls",
+    "regularPolygonWall", "roundedPlate", "surroundingWall", "partsMatrix",
+)
+
+
+class Profiler:
+    """Collects call counts and times of one generator run
+
+    :param output: file the report is written to (default: stderr)
+    :param stacks: file name to append the collapsed call stacks to
+    """
+
+    def __init__(self, output: TextIO | None = None, stacks: str | None = None) -> None:
+        self.output = output
+        self.stacks_file = stacks
+        self.name = ""
+        self.stats: dict[str, list[Any]] = {}  # name -> [calls, total time, own time]
+        self.stacks: dict[tuple[str, ...], float] = {}  # call stack -> own time
+        self.parts: list[tuple[int, int]] = []  # (paths, segments) per part
+        self.replayed = 0  # drawings replayed by Boxes.drawCached()
+        self.edgeClasses: set[type] = set()  # classes instrumented for this profiler
+        self._stack: list[list[Any]] = []  # [name, object, time in callees, call stack]
+        self._instrumented: list[type] = []  # classes to restore, see _instrumentEdgeClass()
+        self._box = None  # Boxes object with measured methods
+
+    @classmethod
+    def fromEnvironment(cls) -> Profiler | None:
+        """Profiler configured by BOXES_PROFILE(_STACKS) - None if not set"""
+        stacks = os.environ.get("BOXES_PROFILE_STACKS") or None
+        if not (os.environ.get("BOXES_PROFILE") or stacks):
+            return None
+        return cls(stacks=stacks)
+
+    def call(self, name: str, obj, func, *args, **kw):
+        """Call func(*args, **kw) accounting the time spent to name
+
+        :param obj: the edge called - None for Boxes methods
+        """
+        stack = self._stack
+        if stack:
+            parent = stack[-1]
+            if obj is not None and parent[1] is obj and parent[0] == name:
+                # super().__call__() within an edge - counted already
+                return func(*args, **kw)
+            path = parent[3] + (name,)
+        else:
+            path = (self.name, name)
+        frame = [name, obj, 0.0, path]
+        stack.append(frame)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kw)
+        finally:
+            t = time.perf_counter() - start
+            stack.pop()
+            if stack:
+                stack[-1][2] += t
+            own = t - frame[2]
+            stat = self.stats.get(name)
+            if stat is None:
+                stat = self.stats[name] = [0, 0.0, 0.0]
+            stat[0] += 1
+            stat[1] += t
+            stat[2] += own
+            self.stacks[path] = self.stacks.get(path, 0.0) + own
+
+    def wrap(self, name: str, func):
+        @wraps(func)
+        def wrapper(*args, **kw):
+            return self.call(name, None, func, *args, **kw)
+        return wrapper
+
+    def instrument(self, box) -> None:
+        """Measure the turtle graphics methods of a Boxes object
+
+        Edges are instrumented when they are created.
+        """
+        cls = type(box)
+        self.name = cls.__name__
+        self._box = box
+        for name in METHODS:
+            func = getattr(cls, name, None)
+            if callable(func):
+                # take the method from the class to not wrap twice
+                setattr(box, name, self.wrap(name, func.__get__(box, cls)))
+
+    def instrumentEdge(self, edge) -> None:
+        """Measure the calls of edge - and of all edges of its class
+
+        The classes are restored by restore().
+        """
+        cls = type(edge)
+        if cls in self.edgeClasses:
+            return
+        self.edgeClasses.add(cls)
+        klass = _instrumentEdgeClass(cls)
+        if klass is not None:
+            self._instrumented.append(klass)
+
+    def countSegments(self, surface) -> None:
+        """Store the number of paths and segments of all parts of surface"""
+        self.parts = [(len(part.pathes), sum(len(p.path) for p in part.pathes))
+                      for part in surface.parts]
+
+    def report(self) -> str:
+        """Table of the measured methods and edges and the parts drawn
+
+        Total time includes the time of the methods and edges called -
+        and is counted more than once for recursive calls.
+        """
+        lines = [f"Profile of {self.name}",
+                 f"{'calls':>8} {'total ms':>10} {'own ms':>10}  name"]
+        for name, (calls, total, own) in sorted(
+                self.stats.items(), key=lambda i: -i[1][2]):
+            lines.append(f"{calls:8d} {total * 1e3:10.2f} {own * 1e3:10.2f}  {name}")
+        lines.append("")
+        lines.append(f"{'part':>8} {'paths':>10} {'segments':>10}")
+        for nr, (paths, segments) in enumerate(self.parts):
+            lines.append(f"{nr:8d} {paths:10d} {segments:10d}")
+        lines.append(f"{'total':>8} {sum(p for p, _ in self.parts):10d} "
+                     f"{sum(s for _, s in self.parts):10d}")
+        if self.replayed:
+            lines.append("")
+            lines.append(f"{self.replayed} drawings were replayed by drawCached(). "
+                         "The methods and edges in them are counted only once.")
+        return "\n".join(lines) + "\n"
+
+    def collapsedStacks(self) -> str:
+        """Call stacks with the time spent in µs, one per line"""
+        return "".join(f"{';'.join(path)} {round(t * 1e6)}\n"
+                       for path, t in self.stacks.items())
+
+    def restore(self) -> None:
+        """Undo instrument() and instrumentEdge() - may be called more than once"""
+        for klass in self._instrumented:
+            _restoreEdgeClass(klass)
+        self._instrumented = []
+        self.edgeClasses = set()
+        if self._box is not None:
+            for name in METHODS:
+                vars(self._box).pop(name, None)
+            self._box = None
+
+    def finish(self) -> None:
+        """Restore the edge classes and write the report and the call stacks"""
+        self.restore()
+        (self.output or sys.stderr).write(self.report())
+        if self.stacks_file:
+            with open(self.stacks_file, "a") as f:
+                f.write(self.collapsedStacks())
+
+
+# Edge classes with a measuring __call__: class -> [original __call__,
+# number of profilers using it]
+_edgeClasses: dict[type, list[Any]] = {}
+_lock = threading.Lock()
+
+
+def _instrumentEdgeClass(cls) -> type | None:
+    """Replace the __call__ method the class uses by one measuring it
+
+    Edges of Boxes objects without profiler are not affected apart from
+    the check for it.
+
+    :return: the class the method was replaced in - None if there is none
+    """
+    for klass in cls.__mro__:
+        if "__call__" in vars(klass):
+            break
+    else:
+        return None
+    with _lock:
+        entry = _edgeClasses.get(klass)
+        if entry is not None:
+            entry[1] += 1
+            return klass
+        call = vars(klass)["__call__"]
+
+        @wraps(call)
+        def __call__(self, *args, **kw):
+            profiler = getattr(self.boxes, "_profiler", None)
+            if profiler is None:
+                return call(self, *args, **kw)
+            return profiler.call(type(self).__name__, self, call, self, *args, **kw)
+
+        _edgeClasses[klass] = [call, 1]
+        klass.__call__ = __call__
+    return klass
+
+
+def _restoreEdgeClass(klass) -> None:
+    """Put back the original __call__ when no profiler needs it any more"""
+    with _lock:
+        entry = _edgeClasses[klass]
+        entry[1] -= 1
+        if entry[1] == 0:
+            klass.__call__ = entry[0]
+            del _edgeClasses[klass]
@@ -11,8 +11,11 @@
 // dxf tooth data from http://oem.cadregister.com/asp/PPOW_Entry.asp?company=915217&elementID=07807803/METRIC/URETH/WV0025/F
 // pulley diameter checked and modelled from data at https://www.sdp-si.com/D265/HTML/D265T016.html
 """
+from functools import lru_cache
 from math import *
 
+import numpy
+
 from boxes.vectors import *
 
 
@@ -79,6 +82,16 @@ class Pulley:
               "GT2_5mm" : [[-1.975908,-0.75],[-1.975908,0],[-1.797959,0.03212],[-1.646634,0.121224],[-1.534534,0.256431],[-1.474258,0.426861],[-1.446911,0.570808],[-1.411774,0.712722],[-1.368964,0.852287],[-1.318597,0.989189],[-1.260788,1.123115],[-1.195654,1.25375],[-1.12331,1.380781],[-1.043869,1.503892],[-0.935264,1.612278],[-0.817959,1.706414],[-0.693181,1.786237],[-0.562151,1.851687],[-0.426095,1.9027],[-0.286235,1.939214],[-0.143795,1.961168],[0,1.9685],[0.143796,1.961168],[0.286235,1.939214],[0.426095,1.9027],[0.562151,1.851687],[0.693181,1.786237],[0.817959,1.706414],[0.935263,1.612278],[1.043869,1.503892],[1.123207,1.380781],[1.195509,1.25375],[1.26065,1.123115],[1.318507,0.989189],[1.368956,0.852287],[1.411872,0.712722],[1.447132,0.570808],[1.474611,0.426861],[1.534583,0.256431],[1.646678,0.121223],[1.798064,0.03212],[1.975908,0],[1.975908,-0.75]],
     }
 
+    # ********************************
+    # ** Scaling tooth for good fit **
+    # ********************************
+    # To improve fit of belt to pulley, set the following constant. Decrease or increase by 0.1mm at a time. We are modelling the *BELT* tooth here, not the tooth on the pulley. Increasing the number will *decrease* the pulley tooth size. Increasing the tooth width will also scale proportionately the tooth depth, to maintain the shape of the tooth, and increase how far into the pulley the tooth is indented. Can be negative
+
+    additional_tooth_width = 0.2  # mm
+
+    # If you need more tooth depth than this provides, adjust the following constant. However, this will cause the shape of the tooth to change.
+    additional_tooth_depth = 0  # mm
+
     def __init__(self, boxes) -> None:
         self.boxes = boxes
 
@@ -86,28 +99,30 @@ class Pulley:
     def getProfiles(cls):
         return sorted(cls.teeth.keys())
 
-    def diameter(self, teeth, profile):
-        if self.spacing[profile][0]:
-            return tooth_spaceing_curvefit(teeth, *self.spacing[profile][1:])
-
-        return tooth_spacing(teeth, *self.spacing[profile][1:])
+    @classmethod
+    def diameter(cls, teeth, profile):
+        if cls.spacing[profile][0]:
+            return tooth_spaceing_curvefit(teeth, *cls.spacing[profile][1:])
 
-    def __call__(self, teeth, profile, insideout=False, r_axle=None,
-                 callback=None, move=""):
+        return tooth_spacing(teeth, *cls.spacing[profile][1:])
 
-        # ********************************
-        # ** Scaling tooth for good fit **
-        # ********************************
-        # To improve fit of belt to pulley, set the following constant. Decrease or increase by 0.1mm at a time. We are modelling the *BELT* tooth here, not the tooth on the pulley. Increasing the number will *decrease* the pulley tooth size. Increasing the tooth width will also scale proportionately the tooth depth, to maintain the shape of the tooth, and increase how far into the pulley the tooth is indented. Can be negative
+    @classmethod
+    def outline(cls, teeth, profile, insideout=False):
+        """Outer diameter and outline of a pulley centered at the origin
 
-        additional_tooth_width = 0.2  # mm
+        Outlines are cached - the returned array is read only.
 
-        # If you need more tooth depth than this provides, adjust the following constant. However, this will cause the shape of the tooth to change.
-        additional_tooth_depth = 0  # mm
+        :return: (diameter, numpy array of shape (n, 2))
+        """
+        return cls._outline(teeth, profile, insideout,
+                            cls.additional_tooth_width, cls.additional_tooth_depth)
 
-        pulley_OD = self.diameter(teeth, profile)
+    @classmethod
+    @lru_cache(maxsize=128)
+    def _outline(cls, teeth, profile, insideout, additional_tooth_width, additional_tooth_depth):
+        pulley_OD = cls.diameter(teeth, profile)
 
-        tooth_depth, tooth_width = self.profile_data[profile]
+        tooth_depth, tooth_width = cls.profile_data[profile]
         tooth_distance_from_centre = ((pulley_OD / 2) ** 2 - ((tooth_width + additional_tooth_width) / 2) ** 2) ** 0.5
         tooth_width_scale = (tooth_width + additional_tooth_width) / tooth_width
         tooth_depth_scale = ((tooth_depth + additional_tooth_depth) / tooth_depth)
@@ -116,6 +131,25 @@ class Pulley:
             pulley_OD += 2*tooth_depth * tooth_depth_scale
             tooth_depth_scale *= -1
 
+        # one matrix per tooth, applied to all points of the profile at once
+        matrices = numpy.array([
+            mmul([[tooth_width_scale, 0, 0],
+                  [0, tooth_depth_scale, -tooth_distance_from_centre]],
+                 rotm(i * 2 * pi / teeth))
+            for i in range(teeth)], dtype=float)
+        profile_points = numpy.array(cls.teeth[profile][1:-1], dtype=float)
+        x, y = profile_points[:, 0], profile_points[:, 1]
+        m = matrices[:, :, :, None]
+        points = numpy.stack((m[:, 0, 0] * x + m[:, 0, 1] * y + m[:, 0, 2],
+                              m[:, 1, 0] * x + m[:, 1, 1] * y + m[:, 1, 2]), axis=-1).reshape(-1, 2)
+        points.flags.writeable = False
+        return pulley_OD, points
+
+    def __call__(self, teeth, profile, insideout=False, r_axle=None,
+                 callback=None, move=""):
+
+        pulley_OD, points = self.outline(teeth, profile, insideout)
+
         total_width = max(pulley_OD, 2*(r_axle or 0.0))
 
         if self.boxes.move(total_width, total_width, move, before=True):
@@ -130,12 +164,5 @@ class Pulley:
             else:
                 self.boxes.hole(0, 0, r_axle)
 
-        points = []
-        for i in range(teeth):
-            m = [[tooth_width_scale, 0, 0],
-                 [0, tooth_depth_scale, -tooth_distance_from_centre]]
-            m = mmul(m, rotm(i * 2 * pi / teeth))
-            points.extend(vtransl(pt, m) for pt in self.teeth[profile][1:-1])
-
         self.boxes.drawPoints(points, kerfdir=-1 if insideout else 1)
         self.boxes.move(total_width, total_width, move)
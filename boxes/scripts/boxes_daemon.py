@@ -0,0 +1,137 @@
+# Copyright (C) 2026 Florian Festi
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Local render daemon
+
+Keeps the generators imported so the ``boxes`` command line tool and
+the Inkscape extension do not have to pay the start up cost on every
+call. The daemon listens on a Unix domain socket only accessible by
+the current user. For each request it forks, takes over the
+stdin/stdout/stderr and working directory of the client and then runs
+the command line interface as if it had been called directly.
+
+Clients only talk to a socket owned by themselves that no one else can
+access - in a directory no one else can access - and only if the
+process at the other end runs as the same user. Only the BOXES_* and
+locale environment variables are passed to the daemon.
+
+Start it with ``boxes --daemon``. Clients (see boxes_client) fall back
+to rendering in-process if no daemon is running.
+"""
+from __future__ import annotations
+
+import json
+import os
+import signal
+import socket
+import socketserver
+import stat
+import sys
+import traceback
+
+# The client side lives outside of the boxes package
+from boxes_client import (_HEADER, _STATUS, _is_private, _recv_exactly, forward,
+                          forwarded_environment, is_private_socket, is_running,
+                          peer_uid, socket_path, supported)
+
+
+class RenderHandler(socketserver.BaseRequestHandler):
+    """Runs in the forked child serving exactly one request"""
+
+    def handle(self) -> None:
+        if peer_uid(self.request) != os.getuid():
+            return
+        msg, fds, _, _ = socket.recv_fds(self.request, _HEADER.size, 3)
+        if not msg: # connection check only
+            return
+        msg += _recv_exactly(self.request, _HEADER.size - len(msg))
+        length, = _HEADER.unpack(msg)
+        request = json.loads(_recv_exactly(self.request, length))
+
+        for f in (sys.stdout, sys.stderr):
+            f.flush()
+        for target, fd in enumerate(fds):
+            os.dup2(fd, target)
+            os.close(fd)
+        # keep the daemon's environment (e.g. PATH for pstoedit)
+        for key in forwarded_environment():
+            del os.environ[key]
+        os.environ.update(forwarded_environment(request["env"]))
+        os.chdir(request["cwd"])
+
+        status = 0
+        try:
+            from boxes.scripts import boxes_main
+            sys.argv = ["boxes"] + request["argv"]
+            boxes_main.main(request["argv"], daemon=False)
+        except SystemExit as e:
+            if e.code is None:
+                status = 0
+            elif isinstance(e.code, int):
+                status = e.code
+            else:
+                sys.stderr.write(f"{e.code}\n")
+                status = 1
+        except Exception:
+            traceback.print_exc()
+            status = 1
+        finally:
+            for f in (sys.stdout, sys.stderr):
+                try:
+                    f.flush()
+                except OSError:
+                    pass
+        self.request.sendall(_STATUS.pack(status))
+
+
+class RenderServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    pass
+
+
+def serve(path: str | None = None) -> None:
+    """Listen on the socket and serve render requests until interrupted"""
+    if not supported():
+        raise OSError("The render daemon needs Unix domain sockets")
+    path = path or socket_path()
+    directory = os.path.dirname(os.path.abspath(path))
+    if not os.path.isdir(directory):
+        os.mkdir(directory, 0o700)
+    if not _is_private(directory, stat.S_ISDIR):
+        raise OSError(f"{directory} must be owned by the current user and not be accessible by others")
+
+    if os.path.lexists(path):
+        if is_running(path):
+            raise OSError(f"A render daemon is already listening on {path}")
+        os.unlink(path)
+
+    # Import everything up front so the forked children start warm
+    import boxes.generators
+    from boxes.scripts import boxes_main
+    boxes.generators.getAllBoxGenerators()
+    boxes_main.get_translation()
+
+    old_umask = os.umask(0o177)
+    try:
+        server = RenderServer(path, RenderHandler)
+    finally:
+        os.umask(old_umask)
+    print(f"boxes render daemon listening on {path}", file=sys.stderr)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.unlink(path)
@@ -208,24 +208,16 @@ def generate(cut, output_prefix, format="svg"):
             else:
                 box.layout = settings["layout"]
 
-        box_args = []
+        box_values = {}
         for kk, vv in settings.items():
             # Handle layout and format separately
             if kk in ("format", "layout"):
                 continue
-            box_args.append(f"--{kk}={vv}")
-        box_args.append(f"--format={format}")
+            box_values[kk] = vv
+        box_values["format"] = format
         try:
-            # Ignore unknown arguments by pre-parsing. This two stage
-            # approach was performed to avoid modifying parseArgs and
-            # changing it's behavior.  A long-term better solution
-            # might be to allow parseArgs to take a 'strict' argument
-            # the can enable/disable strict parsing of arguments
-            args, argv = box.argparser.parse_known_args(box_args)
-            if len(argv) > 0:
-                for unknown_arg in argv:
-                    box_args.remove(unknown_arg)
-            box.parseArgs(box_args)
+            # Ignore unknown arguments as the defaults are shared by all boxes
+            box.parseDict(box_values, strict=False)
         except ArgumentParserError:
             logging.exception("Error parsing box args")
             continue
@@ -21,9 +21,13 @@ except ImportError:
     sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../..'))
     import boxes
 
+import boxes.batch
+from boxes import archive
 import boxes.generators
-import boxes.svgmerge
+import boxes.limits
+from boxes.scripts import boxes_daemon
 
+import boxes_client
 import yaml
 
 
@@ -58,6 +62,12 @@ def multi_generate(config_path : Path|str|TextIO, output_path : Path|str, output
     else:
         config_data = yaml.safe_load(config_path)
 
+    # output_path is a directory or an archive (.zip, .tar, .tar.gz, ...)
+    with archive.openOutput(output_path) as writer:
+        return _multi_generate(config_data, writer, output_name_formater, format)
+
+
+def _multi_generate(config_data, writer, output_name_formater, format) -> list[str]:
     all_generators = boxes.generators.getAllBoxGenerators()
     generators_by_name = {b.__name__: b for b in all_generators.values()}
 
@@ -105,14 +115,14 @@ def multi_generate(config_path : Path|str|TextIO, output_path : Path|str, output
                 else:
                     box.layout = settings["layout"]
 
-            # Turn the settings into arguments, but ignore format
-            # in the YAML file if provided and use the argument to the function
-            box_args = []
+            # Ignore format in the YAML file if provided and use the
+            # argument to the function
+            box_values = {}
             for kk, vv in settings.items():
                 # Handle format separately
                 if kk in ("format","layout"):
                     continue
-                box_args.append(f"--{kk}={vv}")
+                box_values[kk] = vv
 
             # Layout has three options:
             #  - provided verbatim in the YAML file
@@ -124,28 +134,20 @@ def multi_generate(config_path : Path|str|TextIO, output_path : Path|str, output
                         layout = ff.read()
                 else:
                     layout = settings["layout"]
-                box_args.append(f"--layout={layout}")
+                box_values["layout"] = layout
 
             # SVG is default, only apply argument if changing default
             if format != "svg":
-                box_args.append(f"--format={format}")
+                box_values["format"] = format
 
             # Parse the box arguments - because we allow arguments at the
             # top-level defaults, we ignore unknown arguments
             try:
-                # Ignore unknown arguments by pre-parsing. This two stage
-                # approach was performed to avoid modifying parseArgs and
-                # changing it's behavior.  A long-term better solution
-                # might be to allow parseArgs to take a 'strict' argument
-                # the can enable/disable strict parsing of arguments
-                args, argv = box.argparser.parse_known_args(box_args)
-                if len(argv) > 0:
-                    for unknown_arg in argv:
-                        box_args.remove(unknown_arg)
-                box.parseArgs(box_args)
+                unknown = box.parseDict(box_values, strict=False)
             except ArgumentParserError:
                 print("Error parsing box args for box %s : %s", ii, box_cls_name)
                 continue
+            box_args = [f"--{kk}={vv}" for kk, vv in box_values.items() if kk not in unknown]
 
             # handle __GENERATE__ which must be called after parseArgs
             if getattr(box, "layout", None) == "__GENERATE__":
@@ -158,9 +160,12 @@ def multi_generate(config_path : Path|str|TextIO, output_path : Path|str, output
             box.metadata["reproducible"] = True
 
             # Render the box SVG
-            box.open()
-            box.render()
-            data = box.close()
+            try:
+                box.open()
+                box.render()
+                data = box.close()
+            finally:
+                box.stopProfiling()
 
             if callable(output_name_formater):
                 output_fname = output_name_formater(
@@ -180,19 +185,12 @@ def multi_generate(config_path : Path|str|TextIO, output_path : Path|str, output
 
             # Write the output - if count is provided generate multiple copies
             if box_settings.get("count") is not None:
-                for jj in range(int(box_settings.get("count"))):
-                    output_file = os.path.join(output_path, f"{output_fname}_{jj}.{format}")
-                    print(f"Writing {output_file}")
-                    with open(output_file, "wb") as ff:
-                        ff.write(data.read())
-                        data.seek(0)
-                    generated_files.append(output_file)
-
+                names = [f"{output_fname}_{jj}.{format}" for jj in range(int(box_settings.get("count")))]
             else:
-                output_file = os.path.join(output_path, f"{output_fname}.{format}")
+                names = [f"{output_fname}.{format}"]
+            for name in names:
+                output_file = writer.add(name, data.getvalue())
                 print(f"Writing {output_file}")
-                with open(output_file, "wb") as ff:
-                    ff.write(data.read())
                 generated_files.append(output_file)
 
     return generated_files
@@ -212,9 +210,14 @@ def run_generator(name: str, args) -> None:
         box = generators[lower_name]()
         box.translations = get_translation()
         box.parseArgs(args)
-        box.open()
-        box.render()
-        data = box.close()
+        try:
+            box.open()
+            box.render()
+            data = box.close()
+        except boxes.limits.ResourceLimitExceeded as e:
+            sys.exit(f"{box.__class__.__name__}: {e}")
+        finally:
+            box.stopProfiling()
         with os.fdopen(sys.stdout.fileno(), "wb", closefd=False) if box.output == "-" else open(box.output, 'wb') as f:
             f.write(data.getvalue())
     else:
@@ -259,7 +262,7 @@ def example_output_fname_formatter(box_type, name, box_idx, metadata, box_args):
         return f"{name}_{args_hash[0:8]}"
 
 
-def main() -> None:
+def main(argv: list[str] | None = None, daemon: bool = True) -> None:
     parser = argparse.ArgumentParser(formatter_class=argparse.RawDescriptionHelpFormatter, description=__doc__, add_help=False)
     parser.allow_abbrev = False
     parser.add_argument("--generator", type=str, default=None)
@@ -270,15 +273,48 @@ def main() -> None:
     parser.add_argument("--examples", action="store_true", default=False, help='Generates an SVG for every generator into the "examples" folder.')
     parser.add_argument("--help", action="store_true", default=False)
     parser.add_argument("--multi-generator", type=argparse.FileType('r', encoding='UTF-8'), help="Generate multiple boxes from a configuration YAML")
+    parser.add_argument("--batch", type=argparse.FileType('r', encoding='UTF-8'), help="Render a generator for all parameter combinations of a sweep given in a YAML file")
+    parser.add_argument("--jobs", type=int, default=None, help="Number of worker processes for --batch (default: number of CPUs)")
     parser.add_argument("--merge", action="store_true", default=False, help="Merge multiple SVG files into optimal cuts for a given panel size")
-    args, extra = parser.parse_known_args()
-    if args.generator and (args.examples or args.multi_generator or args.list):
+    parser.add_argument("--daemon", action="store_true", default=False, help="Run a local render daemon other invocations connect to")
+    parser.add_argument("--no-daemon", action="store_true", default=False, help="Render in-process even if a render daemon is running")
+    parser.add_argument("--profile", action="store_true", default=False, help="Report calls and time per turtle graphics method and edge type to stderr")
+    parser.add_argument("--profile-stacks", type=str, default=None, metavar="FILE", help="Append call stacks for flame graphs to FILE (implies --profile)")
+    parser.add_argument("--max-segments", type=int, default=None, help="Stop if a generator draws more lines and curves (default: unlimited)")
+    parser.add_argument("--max-parts", type=int, default=None, help="Stop if a generator draws more parts (default: unlimited)")
+    parser.add_argument("--max-time", type=float, default=None, metavar="SECONDS", help="Stop if rendering a generator takes longer (default: unlimited)")
+    parser.add_argument("--max-output", type=int, default=None, metavar="BYTES", help="Stop if the output file gets larger (default: unlimited)")
+    parser.add_argument("--spill-after", type=int, default=None, metavar="SEGMENTS", help="Move finished parts to a temporary file once more segments are drawn to bound memory usage (default: keep everything in memory)")
+    args, extra = parser.parse_known_args(argv)
+    if args.generator and (args.examples or args.multi_generator or args.batch or args.list):
         parser.error("cannot combine --generator with other commands")
 
     # if debug is True set logging level
     if args.debug:
         logging.getLogger().setLevel(logging.DEBUG)
 
+    if args.profile or args.profile_stacks:
+        # also picked up by the worker processes of --batch
+        os.environ["BOXES_PROFILE"] = "1"
+        if args.profile_stacks:
+            os.environ["BOXES_PROFILE_STACKS"] = args.profile_stacks
+
+    # passed on to --batch workers and the render daemon
+    boxes.limits.ResourceLimits(args.max_segments, args.max_parts,
+                                args.max_time, args.max_output).setEnvironment()
+    if args.spill_after is not None:
+        os.environ["BOXES_SPILL_AFTER"] = str(args.spill_after)
+
+    if args.daemon:
+        boxes_daemon.serve()
+        return
+    if argv is None:
+        argv = sys.argv[1:]
+    if daemon and boxes_client.use_daemon(argv):
+        status = boxes_client.forward(argv)
+        if status is not None:
+            sys.exit(status)
+
     # Handle various actions
     if args.version:
         print_version()
@@ -291,7 +327,11 @@ def main() -> None:
         multi_generate(config_path, output_path, example_output_fname_formatter)
     elif args.multi_generator:
         try:
-            if os.path.isdir(extra[0]):
+            if archive.isArchive(extra[0]):
+                # write all files into a zip or tar archive
+                output_path = Path(extra[0])
+                output_fname_format = "{name}_{box_idx}"
+            elif os.path.isdir(extra[0]):
                 # if the output path is a folder assume the default name format
                 # and write all files to the sub-folder
                 output_path = Path(extra[0])
@@ -311,8 +351,19 @@ def main() -> None:
             output_path = Path(".")
             output_fname_format = "{name}_{box_idx}"
         multi_generate(args.multi_generator, output_path, output_fname_format)
+    elif args.batch:
+        # output is a directory or a .zip or .tar(.gz|.bz2|.xz) archive
+        output_path = extra[0] if extra else "."
+        spec = yaml.safe_load(args.batch)
+        try:
+            boxes.batch.renderSpec(spec, output_path, jobs=args.jobs,
+                                   callback=lambda fn: print(f"Writing {fn}"))
+        except boxes.batch.BatchError as e:
+            sys.exit(str(e))
     elif args.merge:
-        merger = boxes.svgmerge.SvgMerge()
+        # imported here as svgpathtools takes long to load
+        from boxes import svgmerge
+        merger = svgmerge.SvgMerge()
         merger.parseArgs(extra)
         merger.render(extra)
         data = merger.close()
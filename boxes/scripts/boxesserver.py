@@ -40,6 +40,8 @@ except ImportError:
     sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), "../.."))
     import boxes.generators
 import boxes
+from boxes import archive
+from boxes.limits import SERVER_LIMITS, ResourceLimitExceeded, ResourceLimits
 
 
 class FileChecker(threading.Thread):
@@ -119,7 +121,8 @@ boxes.ArgumentParser = ThrowingArgumentParser  # type: ignore
 class BServer:
     lang_re = re.compile(r"([a-z]{2,3}(-[-a-zA-Z0-9]*)?)\s*(;\s*q=(\d\.?\d*))?")
 
-    def __init__(self, url_prefix="", static_url="static", static_path="../static/", legal_url="") -> None:
+    def __init__(self, url_prefix="", static_url="static", static_path="../static/", legal_url="",
+                 limits: ResourceLimits | None = None, spill_after: int | None = None) -> None:
         self.boxes = {b.__name__: b for b in boxes.generators.getAllBoxGenerators().values() if b.webinterface}
         self.groups = boxes.generators.ui_groups
         self.groups_by_name = boxes.generators.ui_groups_by_name
@@ -140,6 +143,10 @@ class BServer:
         self.url_prefix = url_prefix
         self.static_url = static_url
         self.legal_url = legal_url
+        # SERVER_LIMITS overridden by the BOXES_MAX_* environment variables
+        self.limits = limits or SERVER_LIMITS.updated(ResourceLimits.fromEnvironment())
+        # None: BOXES_SPILL_AFTER or keeping everything in memory
+        self.spill_after = spill_after
 
     def getLanguages(self, domain=None, localedir=None):
         if self._languages is not None:
@@ -288,6 +295,7 @@ class BServer:
     <button name="render" value="2" formtarget="_self">{_("Download")}</button>
     <button name="render" value="0" formtarget="_self">{_("Save to URL")}</button>
     <button name="render" value="3" formtarget="_blank">{_("QR Code")}</button>
+    <button name="render" value="5" formtarget="_self">{_("Download all formats")}</button>
 </p>
 </form>
 </div>
@@ -621,6 +629,56 @@ class BServer:
         self._cache[("Gallery", lang_name)] = [s.encode("utf-8") for s in result]
         return self._cache[("Gallery", lang_name)]
 
+    @staticmethod
+    def formatFileName(name: str, fmt: str) -> str:
+        fmt, _, variant = fmt.partition("_")
+        if variant:
+            return f"{name}_{variant}.{fmt}"
+        return f"{name}.{fmt}"
+
+    def renderFormats(self, box, box_cls, values, data, formats=None):
+        """Yield file names and data of box in several formats
+
+        Each format is only rendered when the previous one has been
+        sent to keep memory usage down. All formats share the time and
+        output budget of the request that rendered box. Once it is used
+        up the remaining formats are skipped.
+
+        :param box: the box already rendered into data
+        :param formats: list of formats (Default value = None) - all available formats
+        """
+        name = box_cls.__name__
+        output = data.getbuffer().nbytes
+        yield self.formatFileName(name, box.format), data.getvalue()
+        available = box.formats.getFormats()
+        formats = [f for f in formats or available if f in available and f != box.format]
+        budget = box.surface.budget
+        for fmt in formats:
+            fn = self.formatFileName(name, fmt)
+            try:
+                b = box_cls()
+                b.limits = budget.remaining(output)
+                b.spill_after = box.spill_after
+                b.translations = box.translations
+                b.parseDict({**values, "format": fmt})
+                b.metadata["url"] = box.metadata["url"]
+                b.metadata["url_short"] = box.metadata["url_short"]
+                try:
+                    b.open()
+                    b.render()
+                    result = b.close()
+                finally:
+                    b.stopProfiling()
+                output += result.getbuffer().nbytes
+                yield fn, result.getvalue()
+            except Exception as e:
+                if not isinstance(e, (ValueError, ArgumentParserError)):
+                    print("Exception during rendering:")
+                    traceback.print_exc()
+                yield fn + ".error.txt", str(e).encode("utf-8")
+                if isinstance(e, ResourceLimitExceeded):
+                    break
+
     def serve(self, environ, start_response):
         # serve favicon from static for generated SVGs
         if environ["PATH_INFO"] == "favicon.ico":
@@ -659,6 +717,8 @@ class BServer:
             return self._cache[lang_name]
 
         box = box_cls()
+        box.limits = self.limits
+        box.spill_after = self.spill_after
 
         box.translations = lang
 
@@ -672,9 +732,17 @@ class BServer:
             start_response(status, headers)
             return self.args2html_cached(name, box, lang, "./" + name, defaults=defaults)
 
-        args = ["--" + arg for arg in args if not arg.startswith("render=")]
+        values = {}
+        formats = None
+        for arg in args:
+            if arg.startswith("formats="):
+                # for render=5: comma separated list of formats to put into the zip
+                formats = [f for f in arg[len("formats="):].split(",") if f]
+            elif arg and not arg.startswith("render="):
+                key, _, value = arg.partition("=")
+                values[key] = value
         try:
-            box.parseArgs(args)
+            box.parseDict(values)
         except ArgumentParserError as e:
             if render == "4":
                 start_response(status, box.formats.http_headers["svg"])
@@ -700,6 +768,8 @@ class BServer:
             else:
                 start_response("500 Internal Server Error", headers)
                 return self.genPageError(name, e, lang)
+        finally:
+            box.stopProfiling()
 
         http_headers = box.formats.http_headers.get(box.format, [('Content-type', 'application/unknown; charset=utf-8')])[:]
         # Prevent crawlers.
@@ -714,6 +784,13 @@ class BServer:
             qrcode = get_qrcode(box.metadata["url_short"], qr_format)
             return (qrcode,)
 
+        if render == "5":
+            http_headers = [('Content-type', 'application/zip'),
+                            ('Content-Disposition', f'attachment; filename="{box.__class__.__name__}.zip"'),
+                            ('X-Robots-Tag', 'noindex,nofollow')]
+            start_response(status, http_headers)
+            return archive.iterZip(self.renderFormats(box, box_cls, values, data, formats))
+
         if box.format != "svg" or render == "2":
             extension = box.format
             if extension == "svg_Ponoko":
@@ -745,10 +822,23 @@ def main() -> None:
                         help="location of static content on disk")
     parser.add_argument("--legal_url", default="",
                         help="URL of legal web page")
+    parser.add_argument("--max_segments", type=int, default=None,
+                        help=f"lines and curves per request (default: {SERVER_LIMITS.max_segments})")
+    parser.add_argument("--max_parts", type=int, default=None,
+                        help=f"parts per request (default: {SERVER_LIMITS.max_parts})")
+    parser.add_argument("--max_time", type=float, default=None,
+                        help=f"seconds of rendering per request (default: {SERVER_LIMITS.max_time:g})")
+    parser.add_argument("--max_output", type=int, default=None,
+                        help=f"bytes of output per request (default: {SERVER_LIMITS.max_output})")
+    parser.add_argument("--spill_after", type=int, default=None,
+                        help="segments kept in memory per request before finished parts are moved to a temporary file (default: keep everything in memory)")
     args = parser.parse_args()
 
+    limits = SERVER_LIMITS.updated(ResourceLimits.fromEnvironment()).updated(
+        ResourceLimits(args.max_segments, args.max_parts, args.max_time, args.max_output))
     boxserver = BServer(url_prefix=args.url_prefix, static_url=args.static_url,
-                        static_path=args.static_path)
+                        static_path=args.static_path, limits=limits,
+                        spill_after=args.spill_after)
 
     fc = FileChecker()
     fc.start()
@@ -14,6 +14,8 @@
 #   along with this program.  If not, see <http://www.gnu.org/licenses/>.
 import math
 
+import numpy
+
 
 def normalize(v):
     """set length of vector to one"""
@@ -91,27 +93,57 @@ def mmul(m0, m1):
     return result
 
 
-def kerf(points, k, closed=True):
+def kerf(points, k, closed=True, miter_limit=None):
     """Outset points by k
-    Assumes a closed loop of points
+
+    All points are processed at once as numpy array.
+
+    :param points: list of (x, y) tuples or numpy array of shape (n, 2)
+    :param k: distance to move the outline
+    :param closed: (Default value = True) points form a closed loop
+    :param miter_limit: (Default value = None) max distance a point is moved in multiples of k. Without limit very sharp vertices create long spikes and reversing paths raise ZeroDivisionError
+    :return: numpy array of shape (n, 2)
     """
-    result = []
-    lp = len(points)
+    points = numpy.asarray(points, dtype=float)
+    if len(points) == 0:
+        return points.reshape(0, 2)
 
-    for i in range(len(points)):
-        # get normalized orthogonals of both segments
-        v1 = vorthogonal(normalize(vdiff(points[i - 1], points[i])))
-        v2 = vorthogonal(normalize(vdiff(points[i], points[(i + 1) % lp])))
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        # normalized orthogonals of the segments ending (v1) and starting (v2) at each point
+        v1 = _vorthogonals(_normalize(points - numpy.roll(points, 1, axis=0)))
+        v2 = numpy.roll(v1, -1, axis=0)
 
         if not closed:
-            if i == 0:
-                v1 = v2
-            if i == lp-1:
-                v2 = v1
+            v1[0] = v2[0]
+            v2[-1] = v1[-1]
         # direction the point has to move
-        d = normalize(vadd(v1, v2))
+        d = _normalize(v1 + v2)
         # cos of the half the angle between the segments
-        cos_alpha = dotproduct(v1, d)
-        result.append(vadd(points[i], vscalmul(d, -k / cos_alpha)))
-
+        cos_alpha = v1[:, 0] * d[:, 0] + v1[:, 1] * d[:, 1]
+
+        degenerated = cos_alpha == 0
+        if degenerated.any():
+            if miter_limit is None:
+                raise ZeroDivisionError("kerf: path reverses direction")
+            # move sideways
+            d[degenerated] = v1[degenerated]
+            cos_alpha[degenerated] = 1.0
+        factor = -k / cos_alpha
+    if miter_limit is not None:
+        limit = abs(k) * miter_limit
+        factor = numpy.clip(factor, -limit, limit)
+
+    return points + d * factor[:, None]
+
+
+def _normalize(v):
+    """set length of all vectors in a (n, 2) array to one (or zero)"""
+    l = (v[:, 0] ** 2 + v[:, 1] ** 2) ** 0.5
+    result = v / l[:, None]
+    result[l == 0.0] = 0.0
     return result
+
+
+def _vorthogonals(v):
+    """Orthogonal vectors of a (n, 2) array"""
+    return numpy.column_stack((-v[:, 1], v[:, 0]))
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# Copyright (C) 2026 Florian Festi
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Entry point of the ``boxes`` command line tool
+
+Forwards the command to the local render daemon (see
+boxes.scripts.boxes_daemon) if one is running. Only imports the
+standard library so forwarding does not pay for importing boxes,
+numpy and shapely. The boxes package is only loaded when rendering
+in-process.
+
+This is a top level module as importing anything from the boxes
+package runs boxes/__init__.py.
+"""
+from __future__ import annotations
+
+import json
+import os
+import socket
+import stat
+import struct
+import sys
+import tempfile
+
+_HEADER = struct.Struct("!I")
+_STATUS = struct.Struct("!i")
+
+
+def supported() -> bool:
+    return hasattr(socket, "AF_UNIX") and hasattr(socket, "send_fds")
+
+
+def socket_path() -> str:
+    """Path of the daemon socket
+
+    Can be overridden with the BOXES_DAEMON_SOCKET environment variable.
+    Without XDG_RUNTIME_DIR the socket is put into a private directory
+    in the temp dir.
+    """
+    path = os.environ.get("BOXES_DAEMON_SOCKET")
+    if path:
+        return path
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, "boxes.sock")
+    return os.path.join(tempfile.gettempdir(), f"boxes-{os.getuid()}", "boxes.sock")
+
+
+def _is_private(path: str, kind) -> bool:
+    """Check that path is of the kind given, owned by us and not
+    accessible by anyone else. Symlinks are not followed."""
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return (kind(st.st_mode) and st.st_uid == os.getuid()
+            and not st.st_mode & 0o077)
+
+
+def is_private_socket(path: str) -> bool:
+    """Check the socket and its directory belong to the current user only"""
+    directory = os.path.dirname(os.path.abspath(path))
+    return (_is_private(directory, stat.S_ISDIR) and
+            _is_private(path, stat.S_ISSOCK))
+
+
+def peer_uid(sock: socket.socket) -> int | None:
+    """User id of the process at the other end - None if unknown"""
+    if not hasattr(socket, "SO_PEERCRED"):
+        return None
+    creds = struct.Struct("3i")
+    try:
+        _, uid, _ = creds.unpack(sock.getsockopt(
+            socket.SOL_SOCKET, socket.SO_PEERCRED, creds.size))
+    except OSError:
+        return None
+    return uid
+
+
+def forwarded_environment(environ=os.environ) -> dict[str, str]:
+    """The environment variables rendering depends on"""
+    return {key: value for key, value in environ.items()
+            if key.startswith(("BOXES_", "LC_")) or key in ("LANG", "LANGUAGE")}
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Connection closed by peer")
+        data += chunk
+    return data
+
+
+def forward(argv: list[str], fds: tuple[int, int, int] = (0, 1, 2), path: str | None = None) -> int | None:
+    """Run the command line interface with argv inside the daemon
+
+    :param argv: command line arguments (without the program name)
+    :param fds: file descriptors to be used as stdin, stdout and stderr
+    :param path: socket path (Default value = socket_path())
+    :return: exit status or None if no daemon is running
+    """
+    if not supported():
+        return None
+    path = path or socket_path()
+    if not is_private_socket(path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            sock.connect(path)
+        except OSError:
+            return None
+        if peer_uid(sock) != os.getuid():
+            return None
+        payload = json.dumps({
+            "argv": list(argv),
+            "cwd": os.getcwd(),
+            "env": forwarded_environment(),
+        }).encode("utf-8")
+        for f in (sys.stdout, sys.stderr):
+            f.flush()
+        socket.send_fds(sock, [_HEADER.pack(len(payload))], list(fds))
+        sock.sendall(payload)
+        try:
+            status, = _STATUS.unpack(_recv_exactly(sock, _STATUS.size))
+        except ConnectionError:
+            return 1
+        return status
+    finally:
+        sock.close()
+
+
+def is_running(path: str) -> bool:
+    """Check if a daemon is accepting connections on path"""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+def use_daemon(argv: list[str], environ=os.environ) -> bool:
+    """Check if the command may be forwarded to the daemon"""
+    if environ.get("BOXES_PROFILE"):
+        return False
+    for arg in argv:
+        if arg in ("--daemon", "--no-daemon", "--profile") or arg.startswith("--profile-stacks"):
+            return False
+    return True
+
+
+def main(argv: list[str] | None = None) -> None:
+    if argv is None:
+        argv = sys.argv[1:]
+    if use_daemon(argv):
+        status = forward(argv)
+        if status is not None:
+            sys.exit(status)
+
+    from boxes.scripts import boxes_main
+    boxes_main.main(argv, daemon=False)
+
+
+if __name__ == '__main__':
+    import logging
+    logging.basicConfig(level=logging.INFO)
+
+    main()
@@ -25,7 +25,7 @@ class CustomBuildExtCommand(build_py):
     def updatePOT(self) -> None:
         try:
             subprocess.run([sys.executable, str(self.script_path / "boxes2pot"), "po/boxes.py.pot"], check=True, capture_output=True, text=True)
-            subprocess.run(["xgettext -L Python -j --from-code=utf-8 -o po/boxes.py.pot boxes/*.py scripts/boxesserver scripts/boxes"], shell=True, check=True, capture_output=True, text=True)
+            subprocess.run(["xgettext -L Python -j --from-code=utf-8 -o po/boxes.py.pot boxes/*.py scripts/boxesserver boxes/scripts/boxes_main.py"], shell=True, check=True, capture_output=True, text=True)
         except CalledProcessError as e:
             print("Could not process translation because of error: ", e)
             print("Output: ", e.stdout, e.stderr)
@@ -78,6 +78,8 @@ class CustomBuildExtCommand(build_py):
 
 setup(
     packages=find_packages(),
+    # the boxes command - outside of the package so it starts fast
+    py_modules=["boxes_client"],
     cmdclass={
         'build_py': CustomBuildExtCommand,
     },
@@ -0,0 +1,72 @@
+"""Helpers shared by the tests - import them with ``from conftest import ...``"""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+try:
+    import boxes
+except ImportError:
+    sys.path.append(Path(__file__).resolve().parent.parent.__str__())
+    import boxes
+
+import boxes.generators
+from boxes import edges
+
+
+def new_box(*args, generator=None, settings=(), **attributes):
+    """Opened box ready for drawing
+
+    :param args: command line arguments - "--reference=0" is always added
+    :param generator: class name of a generator (Default value = boxes.Boxes)
+    :param settings: settings classes to add the arguments of
+    :param attributes: set on the box before opening it
+    """
+    if generator is None:
+        box = boxes.Boxes()
+    else:
+        box = boxes.generators.getAllBoxGenerators()[
+            f"boxes.generators.{generator.lower()}.{generator}"]()
+    for s in settings:
+        box.addSettingsArgs(s)
+    box.parseArgs(["--reference=0", *args])
+    box.metadata["reproducible"] = True
+    for name, value in attributes.items():
+        setattr(box, name, value)
+    box.open()
+    return box
+
+
+def finger_joint_box(*args):
+    """Plain Boxes with the finger joint arguments - for drawing edges directly"""
+    return new_box(*args, settings=[edges.FingerJointSettings])
+
+
+def render(func=None, *args, **kw) -> bytes:
+    """Output of func(box) - or of the generator if func is None
+
+    Takes the same arguments as new_box().
+    """
+    box = new_box(*args, **kw)
+    if func is None:
+        box.render()
+    else:
+        func(box)
+    return box.close().getvalue()
+
+
+def full_precision(c):
+    return tuple(c[:7])
+
+
+def paths(box, command=full_precision):
+    """All paths drawn so far - each command passed through command()"""
+    box.ctx.stroke()
+    return [[command(c) for c in p.path] for part in box.surface.parts for p in part.pathes]
+
+
+def draw(func, *args, command=full_precision, **kw):
+    """Paths func(box) creates - takes the arguments of new_box()"""
+    box = new_box(*args, **kw)
+    func(box)
+    return paths(box, command)
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import io
+import sys
+import tarfile
+import zipfile
+from pathlib import Path
+
+import pytest
+
+try:
+    import boxes
+except ImportError:
+    sys.path.append(Path(__file__).resolve().parent.parent.__str__())
+    import boxes
+
+from boxes import archive
+from boxes.limits import ResourceLimits
+from boxes.scripts import boxes_main, boxesserver
+
+
+class TestWriters:
+
+    @pytest.mark.parametrize("name, cls", [
+        ("out", archive.DirectoryWriter), ("out.zip", archive.ZipWriter),
+        ("out.tar", archive.TarWriter), ("out.tar.gz", archive.TarWriter),
+        ("out.tgz", archive.TarWriter), ("out.tar.xz", archive.TarWriter)])
+    def test_open_output(self, tmp_path, name, cls) -> None:
+        with archive.openOutput(str(tmp_path / name)) as writer:
+            assert type(writer) is cls
+            writer.add("a.svg", b"a")
+
+    def test_zip(self, tmp_path) -> None:
+        path = tmp_path / "out.zip"
+        with archive.ZipWriter(str(path)) as writer:
+            assert writer.add("a.svg", b"a") == f"{path}:a.svg"
+            writer.add("b.svg", b"b")
+        with zipfile.ZipFile(path) as z:
+            assert {n: z.read(n) for n in z.namelist()} == {"a.svg": b"a", "b.svg": b"b"}
+
+    def test_tar(self, tmp_path) -> None:
+        path = tmp_path / "out.tar.gz"
+        with archive.openOutput(str(path)) as writer:
+            writer.add("a.svg", b"a")
+            writer.add("b.svg", b"bb")
+        with tarfile.open(path) as t:
+            assert t.getnames() == ["a.svg", "b.svg"]
+            assert t.extractfile("b.svg").read() == b"bb"
+
+
+def test_iter_zip() -> None:
+    consumed = []
+
+    def entries():
+        for name in ("a.svg", "b.svg"):
+            consumed.append(name)
+            yield name, name.encode() * 1000
+
+    chunks = archive.iterZip(entries())
+    first = next(chunks)
+    # entries are only requested when needed
+    assert consumed == ["a.svg"]
+    data = first + b"".join(chunks)
+    with zipfile.ZipFile(io.BytesIO(data)) as z:
+        assert z.namelist() == ["a.svg", "b.svg"]
+        assert z.read("b.svg") == b"b.svg" * 1000
+
+
+def test_multi_generate_zip(tmp_path) -> None:
+    config = io.StringIO("""
+Defaults:
+  reference: 0
+Boxes:
+  - box_type: ABox
+    name: first
+  - box_type: ABox
+    name: second
+    count: 2
+""")
+    path = tmp_path / "boxes.zip"
+    written = boxes_main.multi_generate(config, str(path), "{name}")
+    assert written == [f"{path}:{n}" for n in ("first.svg", "second_0.svg", "second_1.svg")]
+    with zipfile.ZipFile(path) as z:
+        assert z.namelist() == ["first.svg", "second_0.svg", "second_1.svg"]
+
+
+class TestServerAllFormats:
+
+    def serve(self, server, query):
+        status = []
+        environ = {"PATH_INFO": "/ABox", "QUERY_STRING": query,
+                   "HTTP_HOST": "localhost", "SERVER_NAME": "localhost", "SERVER_PORT": "80",
+                   "wsgi.url_scheme": "http"}
+        body = b"".join(server.serve(environ, lambda s, h: status.append((s, dict(h)))))
+        return status[0], zipfile.ZipFile(io.BytesIO(body))
+
+    def test_formats(self) -> None:
+        (status, headers), z = self.serve(boxesserver.BServer(),
+                                          "render=5&reference=0&formats=svg_Ponoko,lbrn2,nope")
+        assert status == "200 OK"
+        assert headers["Content-type"] == "application/zip"
+        assert z.namelist() == ["ABox.svg", "ABox_Ponoko.svg", "ABox.lbrn2"]
+
+    def test_shared_budget(self) -> None:
+        _, z = self.serve(boxesserver.BServer(), "render=5&reference=0&formats=svg")
+        size = len(z.read("ABox.svg"))
+        # enough for the first file only - the rest has to be skipped
+        server = boxesserver.BServer(limits=ResourceLimits(max_output=size + 100))
+        _, z = self.serve(server, "render=5&reference=0&formats=svg_Ponoko,lbrn2")
+        assert z.namelist() == ["ABox.svg", "ABox_Ponoko.svg.error.txt"]
+        assert b"Output too large" in z.read("ABox_Ponoko.svg.error.txt")
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+try:
+    import boxes
+except ImportError:
+    sys.path.append(Path(__file__).resolve().parent.parent.__str__())
+    import boxes
+
+import boxes.generators
+from boxes import edges
+
+
+def action(box: boxes.Boxes, dest: str) -> argparse.Action:
+    for a in box.argparser._actions:
+        if a.dest == dest:
+            return a
+    raise KeyError(dest)
+
+
+class TestSharedActions:
+    """Argument set up is cached per class but instances must stay independent"""
+
+    def test_copy_action(self) -> None:
+        parser = argparse.ArgumentParser()
+        a = parser.add_argument("--x", choices=["a", "b"], default=["a"])
+        b = edges.copyAction(a)
+        assert b.choices == a.choices and b.choices is not a.choices
+        assert b.default == a.default and b.default is not a.default
+        assert b.option_strings == a.option_strings
+
+    def test_choices_not_shared(self) -> None:
+        b1, b2 = boxes.Boxes(), boxes.Boxes()
+        action(b1, "format").choices.append("foo")
+        assert "foo" not in action(b2, "format").choices
+        assert "foo" not in action(boxes.Boxes(), "format").choices
+
+    def test_defaults_not_shared(self) -> None:
+        ABox = boxes.generators.getAllBoxGenerators()["boxes.generators.abox.ABox"]
+        b1 = ABox()
+        b1.argparser.set_defaults(x=42.0, FingerJoint_finger=5.0)
+        b2 = ABox()
+        assert action(b2, "x").default != 42.0
+        assert action(b2, "FingerJoint_finger").default == 2.0
+        b2.parseArgs([])
+        assert b2.x != 42.0
+        assert b2.edgesettings["FingerJoint"]["finger"] == 2.0
+
+    def test_settings_defaults_cached(self) -> None:
+        p1, p2 = argparse.ArgumentParser(), argparse.ArgumentParser()
+        edges.FingerJointSettings.parserArguments(p1, finger=3.0)
+        edges.FingerJointSettings.parserArguments(p2, finger=4.0)
+        assert p1.get_default("FingerJoint_finger") == 3.0
+        assert p2.get_default("FingerJoint_finger") == 4.0
+
+    def test_unhashable_defaults(self) -> None:
+        before = len(edges._parserActions)
+        parser = argparse.ArgumentParser()
+        edges.FingerJointSettings.parserArguments(parser, unused=[1, 2])
+        assert parser.get_default("FingerJoint_finger") == 2.0
+        assert len(edges._parserActions) == before
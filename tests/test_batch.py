@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import io
+import sys
+import zipfile
+from pathlib import Path
+
+import pytest
+
+try:
+    import boxes
+except ImportError:
+    sys.path.append(Path(__file__).resolve().parent.parent.__str__())
+    import boxes
+
+from boxes import archive, batch
+
+
+class TestSweep:
+
+    def test_points(self) -> None:
+        points = batch.sweepPoints({"x": [1, 2], "y": 3, "z": ("a", "b")})
+        assert points == [{"x": 1, "y": 3, "z": "a"}, {"x": 1, "y": 3, "z": "b"},
+                          {"x": 2, "y": 3, "z": "a"}, {"x": 2, "y": 3, "z": "b"}]
+
+    def test_default_name(self) -> None:
+        assert batch.defaultName({"x": [1, 2], "y": 3}) == "{generator}_x{x}"
+
+    def test_unknown_generator(self) -> None:
+        with pytest.raises(batch.BatchError):
+            batch.getGenerator("NoSuchBox")
+
+
+class TestRenderBatch:
+
+    def test_directory(self, tmp_path) -> None:
+        written = batch.renderBatch("ABox", {"x": [50, 60]}, str(tmp_path),
+                                    args={"reference": 0}, jobs=1)
+        assert sorted(Path(fn).name for fn in written) == ["ABox_x50.svg", "ABox_x60.svg"]
+        for fn in written:
+            assert Path(fn).read_bytes().startswith(b"<?xml")
+
+    def test_zip(self, tmp_path) -> None:
+        path = tmp_path / "boxes.zip"
+        batch.renderBatch("ABox", {"x": [50, 60]}, str(path), args={"reference": 0},
+                          name="{index}_{x:.1f}", jobs=1)
+        with zipfile.ZipFile(path) as z:
+            assert sorted(z.namelist()) == ["0_50.0.svg", "1_60.0.svg"]
+
+    def test_value_separators_replaced(self, tmp_path) -> None:
+        out = tmp_path / "out"
+        written = batch.renderBatch("BurnTest", {"id": "../../evil"}, str(out),
+                                    args={"reference": 0}, name="{id}", jobs=1)
+        assert [Path(fn).name for fn in written] == [".._.._evil.svg"]
+        assert Path(written[0]).parent == out
+
+    @pytest.mark.parametrize("name", ["../{x}", "/tmp/{x}", "a/../../{x}", "{x}/"])
+    def test_template_outside_rejected(self, tmp_path, name) -> None:
+        with pytest.raises(batch.BatchError):
+            batch.renderBatch("ABox", {"x": [50]}, str(tmp_path / "out"), name=name, jobs=1)
+
+    def test_bad_field(self, tmp_path) -> None:
+        with pytest.raises(batch.BatchError):
+            batch.renderBatch("ABox", {"x": [50]}, str(tmp_path), name="{nope}", jobs=1)
+
+
+class TestWriters:
+
+    @pytest.mark.parametrize("name", ["../x.svg", "/x.svg", "a/../../x.svg", "..", ""])
+    def test_directory_rejects_outside(self, tmp_path, name) -> None:
+        writer = archive.DirectoryWriter(str(tmp_path / "out"))
+        with pytest.raises(ValueError):
+            writer.add(name, b"data")
+        assert list(tmp_path.iterdir()) == [tmp_path / "out"]
+
+    def test_directory_rejects_symlink(self, tmp_path) -> None:
+        (tmp_path / "out").mkdir()
+        (tmp_path / "out" / "link").symlink_to(tmp_path)
+        writer = archive.DirectoryWriter(str(tmp_path / "out"))
+        with pytest.raises(ValueError):
+            writer.add("link/x.svg", b"data")
+
+    def test_directory_subdir(self, tmp_path) -> None:
+        writer = archive.DirectoryWriter(str(tmp_path))
+        fn = writer.add("a/b.svg", b"data")
+        assert Path(fn) == tmp_path / "a" / "b.svg"
+        assert Path(fn).read_bytes() == b"data"
+
+    def test_zip_rejects_outside(self, tmp_path) -> None:
+        with archive.ZipWriter(str(tmp_path / "x.zip")) as writer:
+            with pytest.raises(ValueError):
+                writer.add("../x.svg", b"data")
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import copy
+import importlib.machinery
+import importlib.util
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+try:
+    import boxes
+except ImportError:
+    sys.path.append(Path(__file__).resolve().parent.parent.__str__())
+    import boxes
+
+import boxes.generators
+
+
+def load_boxesbench():
+    path = Path(__file__).resolve().parent.parent / "scripts" / "boxesbench"
+    loader = importlib.machinery.SourceFileLoader("boxesbench", str(path))
+    spec = importlib.util.spec_from_loader("boxesbench", loader)
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+    return module
+
+
+boxesbench = load_boxesbench()
+
+
+def result(t=0.01, rss=10000, segments=100, size=5000):
+    case = {phase: {"time": t, "rss": rss} for phase in boxesbench.PHASES}
+    case.update(segments=segments, bytes=size, generator="ABox", args={})
+    return case
+
+
+def compare(old, new, threshold=0.2, min_time=0.002, memory_threshold=0.2):
+    return boxesbench.compareResults({"cases": old}, {"cases": new},
+                                     threshold, min_time, memory_threshold)
+
+
+class TestCompareResults:
+
+    def test_no_regressions(self) -> None:
+        assert compare({"a": result()}, {"a": result(t=0.011, rss=11000)}) == []
+
+    def test_slower(self) -> None:
+        problems = compare({"a": result()}, {"a": result(t=0.02)})
+        assert len(problems) == len(boxesbench.PHASES)
+        assert problems[0] == "a: parseArgs 10.0 -> 20.0 ms (+100%)"
+
+    def test_min_time(self) -> None:
+        # doubled, but too short to be measured reliably
+        assert compare({"a": result(t=0.001)}, {"a": result(t=0.002)}) == []
+        assert compare({"a": result(t=0.01)}, {"a": result(t=0.02)}, min_time=0.02) == []
+
+    def test_memory(self) -> None:
+        problems = compare({"a": result()}, {"a": result(rss=20000)})
+        assert problems[0] == "a: parseArgs peak memory 9.8 -> 19.5 MB"
+        # small absolute increases are ignored
+        assert compare({"a": result(rss=1000)}, {"a": result(rss=2000)}) == []
+        # not measured
+        assert compare({"a": result(rss=None)}, {"a": result(rss=20000)}) == []
+
+    def test_output_changed(self) -> None:
+        assert compare({"a": result()}, {"a": result(segments=101, size=5001)}) == [
+            "a: segments changed 100 -> 101", "a: bytes changed 5000 -> 5001"]
+
+    def test_errors(self) -> None:
+        assert compare({"a": result()}, {"a": {"error": "ValueError: x"}}) == [
+            "a: fails: ValueError: x"]
+        assert compare({"a": {"error": "ValueError: x"}}, {"a": result()}) == []
+
+    def test_missing_and_new(self) -> None:
+        assert compare({"a": result(), "b": result()}, {"a": result(), "c": result()}) == [
+            "b: missing"]
+
+
+class TestSuite:
+
+    def test_run_case(self) -> None:
+        cls = boxes.generators.getAllBoxGenerators()["boxes.generators.abox.ABox"]
+        r = boxesbench.runCase(cls, {"x": 50})
+        for phase in boxesbench.PHASES:
+            assert r[phase]["time"] >= 0
+        assert r["segments"] > 0 and r["paths"] > 0
+        assert r["bytes"] > 0
+
+    def test_bench_case(self) -> None:
+        cls = boxes.generators.getAllBoxGenerators()["boxes.generators.abox.ABox"]
+        r = boxesbench.benchCase(cls, {}, 2)
+        assert set(boxesbench.PHASES) <= set(r)
+
+    def test_cases(self) -> None:
+        cases = boxesbench.suiteCases()
+        names = [name for name, _, _ in cases]
+        assert len(names) == len(set(names))
+        for name, _, _ in boxesbench.STRESS_CASES:
+            assert name in names
+
+    def test_tray_layout(self) -> None:
+        cls = boxes.generators.getAllBoxGenerators()[
+            "boxes.generators.traylayout.TrayLayout"]
+        r = boxesbench.runCase(cls, {"h": 30, "layout": boxesbench.trayLayout(3, 2, 20)})
+        assert r["segments"] > 0
+
+    def test_compare_command(self, tmp_path, monkeypatch, capsys) -> None:
+        old = {"cases": {"a": result()}}
+        new = copy.deepcopy(old)
+        (tmp_path / "old.json").write_text(json.dumps(old))
+        (tmp_path / "new.json").write_text(json.dumps(new))
+        monkeypatch.setattr(sys, "argv", ["boxesbench", "compare",
+                                          str(tmp_path / "old.json"), str(tmp_path / "new.json")])
+        boxesbench.main()
+        assert capsys.readouterr().out == "No regressions\n"
+
+        new["cases"]["a"]["segments"] = 1
+        (tmp_path / "new.json").write_text(json.dumps(new))
+        with pytest.raises(SystemExit) as e:
+            boxesbench.main()
+        assert e.value.code == 1
+        assert capsys.readouterr().out == "a: segments changed 100 -> 1\n"
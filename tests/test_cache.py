@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+try:
+    import boxes
+except ImportError:
+    sys.path.append(Path(__file__).resolve().parent.parent.__str__())
+    import boxes
+
+from boxes import edges
+from conftest import finger_joint_box, paths
+
+
+def uncached(self, key, draw, *args, **kw):
+    draw(*args, **kw)
+
+
+def finger_joints(box):
+    for angle in (0, 30, 90):
+        box.moveTo(10, 10, angle)
+        box.edges["f"](50)
+        box.edges["F"](50)
+        box.fingerHolesAt(0, 20, 50, 0)
+        box.fingerHolesAt(0, 40, 50, 45)
+
+
+class TestDrawCached:
+
+    def test_draws_once(self) -> None:
+        box = finger_joint_box()
+        calls = []
+
+        def draw(length):
+            calls.append(length)
+            box.edge(length)
+            box.corner(90, 2)
+
+        for i in range(3):
+            box.moveTo(10, 0)
+            box.drawCached("line", draw, 10)
+        assert calls == [10]
+        assert len(box._templates) == 1
+        cached = paths(box)
+
+        box = finger_joint_box()
+        for i in range(3):
+            box.moveTo(10, 0)
+            draw(10)
+        assert cached == paths(box)
+
+    def test_key_includes_state(self) -> None:
+        box = finger_joint_box()
+        calls = []
+
+        def draw():
+            calls.append(1)
+            box.edge(10)
+
+        box.drawCached("line", draw)
+        box.set_source_color(boxes.Color.RED)
+        box.drawCached("line", draw)
+        box.burn = 0.2
+        box.drawCached("line", draw)
+        box.ctx.move_to(1, 0)
+        box.drawCached("line", draw)
+        assert len(calls) == 4
+
+    def test_unhashable_key(self) -> None:
+        box = finger_joint_box()
+        calls = []
+
+        def draw():
+            calls.append(1)
+            box.edge(10)
+
+        box.drawCached(["line"], draw)
+        box.drawCached(["line"], draw)
+        assert len(calls) == 2
+        assert not box._templates
+
+    def test_unbalanced_not_cached(self) -> None:
+        box = finger_joint_box()
+        calls = []
+
+        def draw():
+            calls.append(1)
+            box.ctx.restore()
+            box.ctx.save()
+
+        box.ctx.save()
+        box.drawCached("restore", draw)
+        box.drawCached("restore", draw)
+        box.ctx.restore()
+        assert len(calls) == 2
+        assert not box._templates
+
+
+class TestFingerJoints:
+
+    @pytest.mark.parametrize("args", [[], ["--burn=0.2", "--FingerJoint_style=springs"],
+                                      ["--FingerJoint_play=0.1", "--debug=1"]])
+    def test_same_as_uncached(self, args, monkeypatch) -> None:
+        box = finger_joint_box(*args)
+        finger_joints(box)
+        cached = paths(box)
+        assert box._templates
+
+        monkeypatch.setattr(boxes.Boxes, "drawCached", uncached)
+        box = finger_joint_box(*args)
+        finger_joints(box)
+        assert cached == paths(box)
+
+    def test_settings_key(self) -> None:
+        box = finger_joint_box()
+        edge = box.edges["f"]
+        key = edge.settingsKey()
+        assert hash(key) == hash(edge.settingsKey())
+        edge.settings.setValues(edge.settings.thickness, finger=4.0)
+        assert key != edge.settingsKey()
+
+    def test_settings_change_draws_again(self) -> None:
+        box = finger_joint_box()
+        edge = box.edges["f"]
+        edge(50)
+        edge.settings.setValues(edge.settings.thickness, finger=4.0)
+        edge(50)
+        assert len(box._templates) == 2
+
+    def test_bed_bolts_not_cached(self) -> None:
+        box = finger_joint_box()
+        bolts = edges.Bolts(2)
+        box.edges["f"](50, bedBolts=bolts)
+        box.fingerHolesAt(0, 20, 50, 0, bedBolts=bolts)
+        assert not box._templates
+
+
+def walls(box):
+    for move in ("right", "right", "up"):
+        box.rectangularWall(30, 20, "fFeh", move=move)
+    box.rectangularWall(30, 20, "fFeh", ignore_widths=[1, 6], move="right")
+    box.trapezoidWall(30, 20, 25, "fFeE", move="right")
+    box.trapezoidWall(30, 20, 25, "fFeE", move="right")
+    box.polygonWall((30, 90, 20, 90, 30, 90, 20, 90), "f", move="right")
+    box.polygonWall((30, 90, 20, 90, 30, 90, 20, 90), "f", move="right")
+
+
+def part_keys(box):
+    """Names of the parts in the cache"""
+    return sorted(k[0][0][0] for k in box._templates
+                  if isinstance(k[0][0], tuple) and isinstance(k[0][0][0], str))
+
+
+class TestCachedParts:
+
+    def test_same_as_uncached(self, monkeypatch) -> None:
+        box = finger_joint_box()
+        walls(box)
+        cached = paths(box)
+        assert part_keys(box) == ["polygonWall", "rectangularWall", "rectangularWall",
+                                  "trapezoidWall"]
+
+        monkeypatch.setattr(boxes.Boxes, "drawCached", uncached)
+        box = finger_joint_box()
+        walls(box)
+        assert cached == paths(box)
+
+    def test_edges_without_key(self) -> None:
+        box = finger_joint_box()
+        box.rectangularWall(30, 20, "fFed", move="right")
+        box.rectangularWall(30, 20, "fFed", move="right")
+        assert part_keys(box) == []
+
+    def test_callback_not_cached(self) -> None:
+        box = finger_joint_box()
+        calls = []
+        for i in range(2):
+            box.rectangularWall(30, 20, "ffff", callback=[lambda: calls.append(1)],
+                                move="right")
+        assert calls == [1, 1]
+        assert part_keys(box) == []
+
+    def test_edge_keys(self) -> None:
+        box = finger_joint_box()
+        assert box.edges["e"].cacheKey() == (edges.Edge, None)
+        assert box.edges["E"].cacheKey() == (edges.OutSetEdge, None)
+        assert box.edges["f"].cacheKey() != box.edges["F"].cacheKey()
+        assert box.edges["h"].cacheKey() is not None
+        assert box.edges["d"].cacheKey() is None
+        assert box.edges["š"].cacheKey() is None
+
+        class MyEdge(edges.Edge):
+            pass
+
+        assert MyEdge(box, None).cacheKey() is None
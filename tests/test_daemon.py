@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+try:
+    import boxes
+except ImportError:
+    sys.path.append(Path(__file__).resolve().parent.parent.__str__())
+    import boxes
+
+from boxes.scripts import boxes_daemon
+
+import boxes_client
+
+pytestmark = pytest.mark.skipif(not boxes_daemon.supported(),
+                                reason="needs Unix domain sockets")
+
+
+@pytest.fixture
+def private_dir(tmp_path):
+    path = tmp_path / "run"
+    path.mkdir(mode=0o700)
+    return path
+
+
+def listen(path: Path) -> socket.socket:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(str(path))
+    sock.listen(1)
+    return sock
+
+
+class TestSocketPath:
+
+    def test_environment_override(self, monkeypatch) -> None:
+        monkeypatch.setenv("BOXES_DAEMON_SOCKET", "/some/where.sock")
+        assert boxes_daemon.socket_path() == "/some/where.sock"
+
+    def test_runtime_dir(self, monkeypatch, private_dir) -> None:
+        monkeypatch.delenv("BOXES_DAEMON_SOCKET", raising=False)
+        monkeypatch.setenv("XDG_RUNTIME_DIR", str(private_dir))
+        assert boxes_daemon.socket_path() == str(private_dir / "boxes.sock")
+
+    def test_private_dir_in_tmp(self, monkeypatch) -> None:
+        monkeypatch.delenv("BOXES_DAEMON_SOCKET", raising=False)
+        monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+        path = boxes_daemon.socket_path()
+        assert path == os.path.join(tempfile.gettempdir(), f"boxes-{os.getuid()}", "boxes.sock")
+
+
+class TestOwnership:
+
+    def test_private_socket(self, private_dir) -> None:
+        path = private_dir / "boxes.sock"
+        with listen(path):
+            os.chmod(path, 0o600)
+            assert boxes_daemon.is_private_socket(str(path))
+
+    def test_refuses_missing_socket(self, private_dir) -> None:
+        path = private_dir / "boxes.sock"
+        assert boxes_daemon.forward(["--list"], path=str(path)) is None
+
+    def test_refuses_accessible_socket(self, private_dir) -> None:
+        path = private_dir / "boxes.sock"
+        with listen(path):
+            os.chmod(path, 0o666)
+            assert not boxes_daemon.is_private_socket(str(path))
+            assert boxes_daemon.forward(["--list"], path=str(path)) is None
+
+    def test_refuses_accessible_directory(self, private_dir) -> None:
+        path = private_dir / "boxes.sock"
+        with listen(path):
+            os.chmod(path, 0o600)
+            os.chmod(private_dir, 0o755)
+            assert not boxes_daemon.is_private_socket(str(path))
+
+    def test_refuses_other_owner(self, private_dir, monkeypatch) -> None:
+        path = private_dir / "boxes.sock"
+        with listen(path):
+            os.chmod(path, 0o600)
+            uid = os.getuid()
+            monkeypatch.setattr(os, "getuid", lambda: uid + 1)
+            assert not boxes_daemon.is_private_socket(str(path))
+            assert boxes_daemon.forward(["--list"], path=str(path)) is None
+
+    def test_refuses_other_peer(self, private_dir, monkeypatch) -> None:
+        path = private_dir / "boxes.sock"
+        with listen(path):
+            os.chmod(path, 0o600)
+            monkeypatch.setattr(boxes_client, "peer_uid", lambda sock: None)
+            assert boxes_daemon.forward(["--list"], path=str(path)) is None
+
+    def test_forwarded_environment(self) -> None:
+        env = {"BOXES_MAX_TIME": "3", "LANG": "de_DE.UTF-8", "LC_ALL": "C",
+               "HOME": "/root", "AWS_SECRET_ACCESS_KEY": "secret", "PATH": "/bin"}
+        assert boxes_daemon.forwarded_environment(env) == {
+            "BOXES_MAX_TIME": "3", "LANG": "de_DE.UTF-8", "LC_ALL": "C"}
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def daemon(private_dir):
+    path = private_dir / "boxes.sock"
+    process = subprocess.Popen(
+        [sys.executable, "-c",
+         "import sys; from boxes.scripts import boxes_daemon; boxes_daemon.serve(sys.argv[1])",
+         str(path)],
+        env={**os.environ, "PYTHONPATH": str(ROOT)},
+        stderr=subprocess.DEVNULL)
+    try:
+        for _ in range(300):
+            if path.exists() and boxes_daemon.is_running(str(path)):
+                break
+            time.sleep(0.1)
+        else:
+            pytest.fail("render daemon did not start")
+        yield path
+    finally:
+        process.terminate()
+        process.wait(10)
+
+
+def test_forward_render(daemon, tmp_path) -> None:
+    output = tmp_path / "box.svg"
+    with open(os.devnull, "rb") as devnull, open(tmp_path / "err", "wb") as err:
+        status = boxes_daemon.forward(
+            ["ABox", "--reference=0", "--output", str(output)],
+            (devnull.fileno(), err.fileno(), err.fileno()), path=str(daemon))
+    assert status == 0
+    assert output.read_bytes().startswith(b"<?xml")
+
+
+def test_client_does_not_import_boxes(daemon, tmp_path) -> None:
+    output = tmp_path / "box.svg"
+    script = ("import sys, boxes_client\n"
+              "try:\n"
+              "    boxes_client.main(sys.argv[1:])\n"
+              "except SystemExit as e:\n"
+              "    print(e.code, *sorted(m for m in ('boxes', 'boxes.generators', 'numpy', 'shapely')\n"
+              "                          if m in sys.modules))\n")
+    result = subprocess.run(
+        [sys.executable, "-c", script, "ABox", "--reference=0", "--output", str(output)],
+        env={**os.environ, "PYTHONPATH": str(ROOT), "BOXES_DAEMON_SOCKET": str(daemon)},
+        capture_output=True, text=True, check=True)
+    assert result.stdout == "0\n"
+    assert output.read_bytes().startswith(b"<?xml")
+
+
+class TestUseDaemon:
+
+    def test_render(self) -> None:
+        assert boxes_client.use_daemon(["ABox", "--x=100"], {})
+
+    @pytest.mark.parametrize("arg", ["--daemon", "--no-daemon", "--profile",
+                                     "--profile-stacks=stacks"])
+    def test_in_process(self, arg) -> None:
+        assert not boxes_client.use_daemon(["ABox", arg], {})
+
+    def test_profile_environment(self) -> None:
+        assert not boxes_client.use_daemon(["ABox"], {"BOXES_PROFILE": "1"})
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import math
+import re
+import sys
+from pathlib import Path
+
+import pytest
+from affine import Affine
+
+try:
+    import boxes
+except ImportError:
+    sys.path.append(Path(__file__).resolve().parent.parent.__str__())
+    import boxes
+
+from boxes import drawing
+from conftest import new_box, render
+
+
+def path_data(svg):
+    return " ".join(re.findall(r' d="([^"]*)"', svg))
+
+
+def circle(box):
+    box.ctx.circles([(20, 20)], 10)
+
+
+class TestMatrices:
+
+    def test_same_as_affine(self) -> None:
+        m = Affine.translation(3.5, -2) * Affine.rotation(33) * Affine.scale(1.5, -1)
+        n = Affine.rotation(-71) * Affine.translation(0.1, 7)
+        assert drawing.mul_matrix(tuple(m)[:6], tuple(n)[:6]) == tuple(m * n)[:6]
+        assert drawing.transform_point(tuple(m)[:6], 1.25, -3.5) == m * (1.25, -3.5)
+
+    def test_context(self) -> None:
+        box = new_box()
+        ctx = box.ctx
+        expected = ctx.get_matrix()
+        ctx.translate(10, 5)
+        ctx.rotate(math.radians(30))
+        ctx.scale(2, 2)
+        expected *= Affine.translation(10, 5) * Affine.rotation(30) * Affine.scale(2, 2)
+        assert ctx.get_matrix().almost_equals(expected)
+        assert isinstance(ctx._m, tuple) and len(ctx._m) == 6
+
+    def test_right_angles_exact(self) -> None:
+        box = new_box()
+        m = box.ctx._m
+        for i in range(4):
+            box.ctx.rotate(math.pi / 2)
+        assert box.ctx._m == m
+
+
+class TestArcs:
+
+    def test_arc_to_curves(self) -> None:
+        c = ("A", 0.0, -10.0, 0.0, 0.0, 10.0, 0.0, -math.pi / 2, (1, 0, 0, 0, 1, 0))
+        curves = drawing.arc_to_curves(c)
+        assert len(curves) == 3
+        assert curves[-1][1:3] == (0.0, -10.0)
+        for curve in curves:
+            assert math.hypot(*curve[1:3]) == pytest.approx(10.0)
+
+    def test_split_keeps_end_point(self) -> None:
+        c = ("A", 3.0, 4.0, 0.0, 0.0, 5.0, 0.0, math.atan2(4, 3), (1, 0, 0, 0, 1, 0))
+        arcs = drawing.split_arc(c, 3)
+        for i, a in enumerate(arcs):
+            assert a[6:8] == pytest.approx([i * c[7] / 3, (i + 1) * c[7] / 3])
+        assert arcs[-1][1:3] == [3.0, 4.0]
+
+    def test_conformal(self) -> None:
+        assert drawing.is_conformal((0, -2, 5, 2, 0, 7))
+        assert drawing.is_conformal((1, 0, 0, 0, -1, 0))
+        assert not drawing.is_conformal((1, 0, 0, 0, 2, 0))
+
+    def test_center_mirrored(self) -> None:
+        # mirroring swaps the direction
+        c = ("A", 10.0, 0.0, 0.0, 0.0, 10.0, math.pi / 2, 0.0, (1, 0, 0, 0, -1, 0))
+        cx, cy, r, a1, a2, ccw = drawing.arc_center(c)
+        assert (cx, cy, r) == pytest.approx((0, 0, 10))
+        assert (a1, a2) == pytest.approx((-90, 0))
+        assert ccw
+
+    def test_extents(self) -> None:
+        box = new_box()
+        box.moveTo(30, 30)
+        circle(box)
+        box.ctx.stroke()
+        e = box.surface.parts[-1].extents()
+        assert (e.xmin, e.ymin, e.xmax, e.ymax) == pytest.approx((40, 40, 60, 60))
+
+    def test_corner_single_arc(self) -> None:
+        box = new_box()
+        box.corner(270, 10)
+        assert [c[0] for c in box.surface.parts[-1].path] == ["M", "A"]
+
+
+class TestSVGArcs:
+
+    def test_native_arc(self) -> None:
+        d = path_data(render(lambda box: box.polyline(10, (90, 5), 10)).decode())
+        assert "A 5.100 5.100 0 0 0 25.100 20.000" in d
+        assert "C" not in d
+
+    def test_direction(self) -> None:
+        # sweep flag 1 is clockwise on screen
+        left = path_data(render(lambda box: box.corner(90, 5)).decode())
+        right = path_data(render(lambda box: box.corner(-90, 5)).decode())
+        assert left == "M 10.000 15.100 A 5.100 5.100 0 0 0 15.100 10.000"
+        assert right == "M 10.000 10.000 A 4.900 4.900 0 0 1 14.900 14.900"
+
+    def test_full_circle(self) -> None:
+        d = path_data(render(circle).decode())
+        arcs = re.findall(r"A [^A]*", d)
+        assert len(arcs) == 3
+        assert arcs[-1] == "A 10.000 10.000 0 0 1 30.000 20.000 Z"
+
+    def test_not_conformal(self) -> None:
+        def ellipse(box):
+            box.ctx.scale(1, 2)
+            circle(box)
+        d = path_data(render(ellipse).decode())
+        assert "A" not in d
+        assert d.count("C") == 11
+
+
+class TestOtherFormats:
+
+    def test_ps_arcs(self) -> None:
+        ps = render(lambda box: box.corner(90, 5), "--format=ps").decode()
+        assert re.search(r" arcn?\n", ps)
+        assert "curveto" not in ps
+
+    def test_ps_full_circle(self) -> None:
+        ps = render(circle, "--format=ps").decode()
+        assert len(re.findall(r" arcn?\n", ps)) == 2
+
+    def test_lbrn2_circle(self) -> None:
+        lbrn = render(circle, "--format=lbrn2").decode()
+        assert '<Shape Type="Ellipse" CutIndex="0" Rx="10.000" Ry="10.000">' in lbrn
+        assert "<XForm>1 0 0 1 20.000 20.000</XForm>" in lbrn
+
+    def test_lbrn2_curves(self) -> None:
+        lbrn = render(lambda box: box.polyline(10, (90, 5), 10), "--format=lbrn2").decode()
+        assert "Ellipse" not in lbrn
+        assert "B" in re.search(r"<PrimList>([^<]*)</PrimList>", lbrn).group(1)
+
+
+def labelled_lines(box):
+    box.moveTo(0, 0)
+    box.edge(10)
+    box.ctx.stroke()
+    box.text("first", 5, 5)
+    box.moveTo(0, 20)
+    box.edge(10)
+    box.ctx.stroke()
+    box.text("last", 5, 25)
+
+
+def new_part():
+    part = drawing.Part("part")
+    part.append("M", 0.0, 0.0)
+    part.append("L", 10.0, 0.0)
+    part.stroke(rgb=(0, 0, 0), lw=0.1)
+    return part
+
+
+class TestTexts:
+
+    def test_table(self) -> None:
+        box = new_box()
+        labelled_lines(box)
+        part = box.surface.parts[-1]
+        assert [t[0] for t in part.texts] == [1, 2]
+        assert [t[4] for t in part.texts] == ["first", "last"]
+        assert all(c[0] != "T" for p in part.pathes for c in p.path)
+        texts = part.texts_by_path()
+        assert len(texts) == len(part.pathes) + 1 == 3
+        assert [[t[1] for t in ts] for ts in texts] == [[], ["first"], ["last"]]
+        box.close()
+
+    def test_styles_shared(self) -> None:
+        box = new_box()
+        labelled_lines(box)
+        box.text("bold", fontsize=6)
+        box.text("bolder", fontsize=6.0)
+        first, last, six, six_f = (t[5] for t in box.surface.parts[-1].texts)
+        assert first is last
+        assert isinstance(first, drawing.TextStyle)
+        assert first.fs == 10 and first.rgb == (0.0, 0.0, 0.0)
+        # written as given so kept apart
+        assert six == six_f and six is not six_f
+        box.close()
+
+    @pytest.mark.parametrize("format", ["svg", "ps", "lbrn2"])
+    def test_order(self, format) -> None:
+        out = render(labelled_lines, f"--format={format}").decode()
+        first, last = out.find("first"), out.find("last")
+        assert 0 < first < last
+        if format == "svg":
+            paths = [m.start() for m in re.finditer("<path", out)]
+            assert len(paths) == 2
+            assert paths[0] < first < paths[1] < last
+
+    def test_only_texts(self) -> None:
+        out = render(lambda box: box.text("alone", 5, 5)).decode()
+        assert "alone" in out
+
+    def test_draw_texts(self, monkeypatch) -> None:
+        monkeypatch.setattr(drawing.Surface, "draw_texts", False)
+        box = new_box()
+        labelled_lines(box)
+        assert not box.surface.parts[-1].texts
+        # texts are not counted as segments either
+        assert box.surface.count == 2
+        out = box.close().getvalue().decode()
+        assert "<text" not in out
+        assert "first" not in out
+
+    def test_transform(self) -> None:
+        part = new_part()
+        style = drawing.TextStyle(("sans-serif", False, False), 10, (0, 0, 0))
+        part.add_text(5.0, 5.0, Affine.translation(5, 5), "x", style)
+        e = part.extents()
+        assert (e.xmin, e.ymin, e.xmax, e.ymax) == (0, 0, 12, 15)
+        assert part.extents() is not e and part._text_extents is not None
+
+        part.transform(1.0, Affine.translation(1, 2), invert_y=True)
+        t = part.texts[0]
+        assert (t[1], t[2]) == (6.0, 7.0)
+        assert t[3] == Affine.translation(6, 7) * Affine.scale(1, -1)
+        assert part._text_extents is None
+        e = part.extents()
+        assert (e.xmin, e.ymin, e.xmax, e.ymax) == (1, -3, 13, 7)
+
+    def test_empty(self) -> None:
+        style = drawing.TextStyle(("sans-serif", False, False), 10, (0, 0, 0))
+        part = drawing.Part("part")
+        assert part.empty()
+        part.add_text(0.0, 0.0, Affine.identity(), "x", style)
+        assert part.empty()
+        part.stroke(rgb=(0, 0, 0), lw=0.1)
+        assert not part.empty()
+        assert new_part().texts_by_path() == [[], []]
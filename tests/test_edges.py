@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+try:
+    import boxes
+except ImportError:
+    sys.path.append(Path(__file__).resolve().parent.parent.__str__())
+    import boxes
+
+from boxes import edges
+from conftest import finger_joint_box, new_box
+
+
+class TestSettingsAttributes:
+
+    def test_value_cached(self) -> None:
+        settings = edges.FingerJointSettings(3.0)
+        assert "play" not in vars(settings)
+        assert settings.play == 0.0
+        assert vars(settings)["play"] == 0.0
+
+    def test_set_values_updates_copy(self) -> None:
+        settings = edges.FingerJointSettings(3.0)
+        assert settings.finger == 6.0
+        settings.setValues(3.0, finger=3.0)
+        assert settings.finger == 9.0
+        assert settings.values["finger"] == 9.0
+        settings.setValues(3.0, False, space=1.5)
+        assert settings.space == 1.5
+
+    def test_set_values_before_read(self) -> None:
+        settings = edges.FingerJointSettings(3.0)
+        settings.setValues(3.0, finger=3.0)
+        assert settings.finger == 9.0
+
+    def test_other_attributes_kept(self) -> None:
+        # attributes set directly take precedence over values of the same name
+        settings = edges.FingerJointSettings(3.0)
+        settings.finger = 1.0
+        settings.setValues(3.0, finger=3.0)
+        assert settings.finger == 1.0
+        assert settings.values["finger"] == 9.0
+
+    def test_unknown_attribute(self) -> None:
+        settings = edges.FingerJointSettings(3.0)
+        assert not hasattr(settings, "foo")
+        assert "foo" not in vars(settings)
+
+
+class TestEdgeAttributes:
+
+    def test_methods_cached(self) -> None:
+        box = finger_joint_box()
+        edge = box.edges["f"]
+        assert "corner" not in vars(edge)
+        assert edge.corner == box.corner
+        assert vars(edge)["corner"] == box.corner
+
+    def test_values_not_cached(self) -> None:
+        box = finger_joint_box()
+        edge = box.edges["f"]
+        assert edge.burn == box.burn
+        box.burn = 0.3
+        assert edge.burn == 0.3
+        assert "burn" not in vars(edge)
+
+
+class Dummy:
+    def __init__(self, char) -> None:
+        self.char = char
+
+
+class TestEdgeRegistry:
+
+    def registry(self, calls):
+        def factory(chars):
+            def create():
+                calls.append(chars)
+                return [Dummy(c) for c in chars]
+            return create
+
+        r = edges.EdgeRegistry()
+        r.register("ab", factory("ab"))
+        r.register("c", factory("c"))
+        r.register("bd", factory("bd"))
+        return r
+
+    def test_lazy(self) -> None:
+        calls: list[str] = []
+        r = self.registry(calls)
+        assert not calls
+        assert r["c"].char == "c"
+        assert calls == ["c"]
+        r["c"]
+        assert calls == ["c"]
+
+    def test_first_factory_wins(self) -> None:
+        calls: list[str] = []
+        r = self.registry(calls)
+        b = r["b"]
+        assert calls == ["ab"]
+        r["d"]
+        assert calls == ["ab", "bd"]
+        assert r["b"] is b
+
+    def test_contains_and_get(self) -> None:
+        calls: list[str] = []
+        r = self.registry(calls)
+        assert "a" in r
+        assert calls == ["ab"]
+        assert r.get("d").char == "d"
+        assert calls == ["ab", "bd"]
+        assert "x" not in r
+        assert r.get("x", 42) == 42
+        assert r.get(["unhashable"]) is None
+        assert ["unhashable"] not in r
+        assert calls == ["ab", "bd", "c"]
+
+    def test_items_in_order(self) -> None:
+        calls: list[str] = []
+        r = self.registry(calls)
+        r["d"]
+        assert [c for c, e in r.items()] == ["a", "b", "c", "d"]
+        assert list(r) == ["a", "b", "c", "d"]
+        assert len(r) == 4
+        assert calls == ["bd", "ab", "c"]
+
+    def test_override(self) -> None:
+        calls: list[str] = []
+        r = self.registry(calls)
+        mine = Dummy("a")
+        r["a"] = mine
+        assert r["a"] is mine
+        assert r["b"].char == "b"
+        assert r["a"] is mine
+        assert list(r) == ["a", "b", "c", "d"]
+
+    def test_missing(self) -> None:
+        r = self.registry([])
+        with pytest.raises(KeyError):
+            r["x"]
+
+
+class TestReopen:
+
+    def test_new_objects(self) -> None:
+        box = new_box()
+        old = (box.edges["f"], box.parts, box.lid, box.gears, box.hexHolesSettings)
+        box.close()
+        box.parseArgs(["--reference=0", "--thickness=4"])
+        box.open()
+        assert box.edges["f"] is not old[0]
+        assert box.edges["f"].ctx is box.ctx
+        assert box.parts is not old[1] and box.parts.boxes is box
+        assert box.lid is not old[2]
+        assert box.gears is not old[3]
+        assert box.hexHolesSettings is not old[4]
+        assert box.lidSettings.thickness == 4.0
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import math
+import random
+import sys
+from pathlib import Path
+
+import numpy
+import pytest
+from shapely.geometry import LineString, Point, Polygon
+
+try:
+    import boxes
+except ImportError:
+    sys.path.append(Path(__file__).resolve().parent.parent.__str__())
+    import boxes
+
+from boxes import fill
+
+BORDER = [(0, 0), (120, 0), (120, 80), (60, 40), (0, 80)]
+
+
+class TestPolygonIndex:
+
+    def test_contains_and_distance(self) -> None:
+        index = fill.PolygonIndex(BORDER + [BORDER[0]])
+        polygon = Polygon(BORDER)
+        rnd = random.Random(3)
+        points = numpy.array([(rnd.uniform(-10, 130), rnd.uniform(-10, 90)) for _ in range(500)])
+        inside = index.contains(points)
+        distance = index.distance(points)
+        for (x, y), i, d in zip(points, inside, distance):
+            p = Point(x, y)
+            assert i == polygon.contains(p)
+            assert d == pytest.approx(polygon.exterior.distance(p))
+
+
+class TestHoleGrid:
+
+    def test_space_matches_brute_force(self) -> None:
+        grid = fill.HoleGrid(5, 2)
+        rnd = random.Random(1)
+        holes = []
+        for _ in range(200):
+            x, y, r = rnd.uniform(0, 100), rnd.uniform(0, 100), rnd.uniform(0.5, 5)
+            grid.add(x, y, r)
+            holes.append((x, y, r))
+        for _ in range(500):
+            x, y = rnd.uniform(-10, 110), rnd.uniform(-10, 110)
+            expected = min([5] + [math.hypot(x - x2, y - y2) - r2 - 2 for x2, y2, r2 in holes])
+            space = grid.space(x, y, 0.5)
+            if expected < 0.5:
+                assert space == 0
+            else:
+                assert space == pytest.approx(expected)
+
+
+class TestRandomHoles:
+
+    def test_holes_fit(self) -> None:
+        holes = fill.randomHoles(BORDER, 6, hspace=2, bspace=1, min_radius=1, seed=5)
+        assert len(holes) > 20
+        polygon = Polygon(BORDER)
+        for i, (x, y, r) in enumerate(holes):
+            assert 1 <= r <= 6
+            assert polygon.contains(Point(x, y))
+            assert polygon.exterior.distance(Point(x, y)) - r >= 1 - 1e-9
+            for x2, y2, r2 in holes[:i]:
+                assert math.hypot(x - x2, y - y2) >= r + r2 + 2 - 1e-9
+
+    def test_seed(self) -> None:
+        assert fill.randomHoles(BORDER, 6, seed=7) == fill.randomHoles(BORDER, 6, seed=7)
+        assert fill.randomHoles(BORDER, 6, seed=7) != fill.randomHoles(BORDER, 6, seed=8)
+
+    def test_max_random(self) -> None:
+        assert len(fill.randomHoles(BORDER, 6, max_random=5, seed=1)) <= 5
+        assert fill.randomHoles(BORDER, 6, bspace=100, seed=1) == []
+
+
+class TestScanlines:
+
+    def test_intervals_match_shapely(self) -> None:
+        polygon = Polygon(BORDER, [[(10, 10), (30, 10), (30, 30), (10, 30)]])
+        scanlines = fill.Scanlines(polygon)
+        for y in numpy.arange(0.5, 80, 3.7):
+            line = LineString([(-10, y), (130, y)]).intersection(polygon)
+            pieces = getattr(line, "geoms", [line])
+            expected = sorted((min(p.coords[0][0], p.coords[-1][0]),
+                               max(p.coords[0][0], p.coords[-1][0])) for p in pieces if not p.is_empty)
+            intervals = scanlines.intervals(y)
+            assert len(intervals) == len(expected)
+            assert numpy.array(intervals) == pytest.approx(numpy.array(expected))
+
+    def test_empty(self) -> None:
+        assert fill.Scanlines(Polygon()).intervals(5) == []
+
+
+class TestGridHoles:
+
+    @pytest.mark.parametrize("pattern", ["square", "hex"])
+    def test_holes_fit(self, pattern) -> None:
+        holes = fill.gridHoles(pattern, BORDER, 5, hspace=2, bspace=1, min_radius=1)
+        assert len(holes) > 20
+        polygon = Polygon(BORDER)
+        radius = max(r for x, y, r in holes)
+        assert radius <= 5
+        for i, (x, y, r) in enumerate(holes):
+            assert 1 <= r <= radius
+            assert polygon.exterior.distance(Point(x, y)) - r >= 1 - 1e-3
+            assert polygon.contains(Point(x, y))
+            for x2, y2, r2 in holes[:i]:
+                assert math.hypot(x - x2, y - y2) >= r + r2 + 2 - 1e-3
+
+    def test_square_grid(self) -> None:
+        holes = fill.gridHoles("square", [(0, 0), (100, 0), (100, 100), (0, 100)], 5, hspace=2)
+        xs = sorted({round(x, 3) for x, y, r in holes})
+        ys = sorted({round(y, 3) for x, y, r in holes})
+        assert len(holes) == len(xs) * len(ys)
+        assert numpy.diff(xs) == pytest.approx(xs[1] - xs[0], abs=2e-3)
+
+    def test_too_small(self) -> None:
+        assert fill.gridHoles("hex", [(0, 0), (100, 0), (100, 5), (0, 5)], 5) == []
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy
+import pytest
+
+try:
+    import boxes
+except ImportError:
+    sys.path.append(Path(__file__).resolve().parent.parent.__str__())
+    import boxes
+
+from boxes import gears
+
+
+def reference_spur_points(teeth, base_radius, pitch_radius, outer_radius, root_radius,
+                          accuracy_involute, accuracy_circular):
+    """Former point by point implementation of generate_spur_points()"""
+    half_thick_angle = gears.two_pi / (4.0 * teeth)
+    pitch_to_base_angle = gears.involute_intersect_angle(base_radius, pitch_radius)
+    radii = gears.linspace(max(base_radius, root_radius), outer_radius, accuracy_involute)
+    angles = [gears.involute_intersect_angle(base_radius, r) for r in radii]
+    points = []
+    for c in [x * gears.two_pi / float(teeth) for x in range(teeth)]:
+        pitch1 = c - half_thick_angle
+        base1 = pitch1 - pitch_to_base_angle
+        offsetangles1 = [base1 + x for x in angles]
+        points1 = [gears.point_on_circle(radii[i], offsetangles1[i]) for i in range(len(radii))]
+        pitch2 = c + half_thick_angle
+        base2 = pitch2 + pitch_to_base_angle
+        offsetangles2 = [base2 - x for x in angles]
+        points2 = [gears.point_on_circle(radii[i], offsetangles2[i]) for i in range(len(radii))]
+        outer = [gears.point_on_circle(outer_radius, x) for x in
+                 gears.linspace(offsetangles1[-1], offsetangles2[-1], accuracy_circular)]
+        if root_radius > base_radius:
+            pitch_to_root_angle = pitch_to_base_angle - gears.involute_intersect_angle(base_radius, root_radius)
+            root = [gears.point_on_circle(root_radius, x) for x in
+                    gears.linspace(pitch2 + pitch_to_root_angle,
+                                   pitch1 - pitch_to_root_angle + gears.two_pi / teeth,
+                                   accuracy_circular)][1:-1]
+        else:
+            root = [gears.point_on_circle(root_radius, x) for x in
+                    gears.linspace(base2, base1 + gears.two_pi / teeth, accuracy_circular)]
+        points.extend(points1 + outer[1:-1] + points2[::-1] + root)
+    return points
+
+
+class TestSpurPoints:
+
+    @pytest.mark.parametrize("teeth, ring_gear, profile_shift", [
+        (8, False, 0.0), (24, False, 0.2), (60, False, -0.1), (40, True, 0.0)])
+    def test_matches_reference(self, teeth, ring_gear, profile_shift) -> None:
+        (pitch_radius, base_radius, addendum, dedendum, outer_radius, root_radius,
+         tooth) = gears.gear_calculations(teeth, 3.0, 20.0, 0.1, ring_gear, profile_shift)
+        args = (teeth, base_radius, pitch_radius, outer_radius, root_radius, 10, 9)
+        points = gears.generate_spur_points(*args)
+        expected = numpy.array(reference_spur_points(*args))
+        assert points.shape == expected.shape
+        numpy.testing.assert_allclose(points, expected, rtol=0, atol=1e-9)
+
+    def test_cached_read_only(self) -> None:
+        points = gears.spur_gear_points(17, 3.0, 20.0)
+        assert gears.spur_gear_points(17, 3.0, 20.0) is points
+        assert gears.spur_gear_points(17, 3.0, 25.0) is not points
+        with pytest.raises(ValueError):
+            points[0, 0] = 1.0
+
+
+class TestGearOptions:
+
+    def test_defaults_match_option_parser(self) -> None:
+        args = gears.GearOptions.optionParser().parse_args([])
+        assert gears.GearOptions() == gears.GearOptions(**vars(args))
+
+    def test_from_kw_converts(self) -> None:
+        options = gears.GearOptions.fromKw(teeth="12", dimension=3, internal_ring="False",
+                                           draw_rack=1, rack_teeth_length="7")
+        assert options.teeth == 12
+        assert options.dimension == 3.0 and type(options.dimension) is float
+        assert options.internal_ring is False
+        assert options.drawrack is True
+        assert options.teeth_length == 7
+
+    def test_replace_keeps_other_values(self) -> None:
+        options = gears.GearOptions(teeth=30, dimension=2.0)
+        changed = options.replace(teeth=10)
+        assert (changed.teeth, changed.dimension) == (10, 2.0)
+        assert options.teeth == 30
+
+    @pytest.mark.parametrize("kw", [{"nope": 1}, {"teeth": "many"}, {"system": "XY"}])
+    def test_invalid(self, kw) -> None:
+        with pytest.raises(ValueError):
+            gears.GearOptions.fromKw(**kw)
+
+    def test_gears_sizes(self) -> None:
+        g = gears.Gears(None)
+        options = gears.GearOptions(teeth=20, dimension=2.0)
+        assert g.sizes(options) == g.sizes(teeth=20, dimension=2.0)
+        assert g.sizes(options, teeth=40)[0] == pytest.approx(2 * g.sizes(options)[0])
+        # parser is only built on demand
+        assert g._OptionParser is None
+        assert g.OptionParser.get_default("teeth") == 24
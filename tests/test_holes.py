@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import math
+import sys
+from pathlib import Path
+
+import numpy
+import pytest
+
+try:
+    import boxes
+except ImportError:
+    sys.path.append(Path(__file__).resolve().parent.parent.__str__())
+    import boxes
+
+from boxes import drawing, fill
+from conftest import draw as draw_paths
+
+
+def command(c):
+    if c[0] == "A":
+        cx, cy, r, _, _, ccw = drawing.arc_center(c)
+        return ("A", *(round(v, 3) for v in (*c[1:3], cx, cy, r)), ccw)
+    return (c[0], *(round(v, 3) for v in c[1:7 if c[0] == "C" else 3]))
+
+
+def draw(func, *args):
+    """Paths func(box) creates - coordinates rounded like in the SVG"""
+    return draw_paths(func, *args, command=command)
+
+
+def reference_hex_grid(x, y, r, b):
+    """Former loop of hexHolesRectangle()"""
+    w = r + b / 2.0
+    dist = w * math.cos(math.pi / 6.0)
+    cx = int((x - 2 * r) // (w)) + 2
+    cy = int((y - 2 * r) // (dist)) + 2
+    lx = (x - (2 * r + (cx - 2) * w)) / 2.0
+    ly = (y - (2 * r + ((cy // 2) * 2) * dist - 2 * dist)) / 2.0
+    points = []
+    for i in range(cy // 2):
+        for j in range((cx - (i % 2)) // 2):
+            px = 2 * j * w + r + lx
+            py = i * 2 * dist + r + ly
+            if i % 2:
+                px += w
+            points.append((px, py))
+    return points
+
+
+class TestHexHoles:
+
+    @pytest.mark.parametrize("x, y, r, b", [(100, 60, 3, 2), (37.5, 81, 1.5, 0.7), (5, 5, 3, 1)])
+    def test_grid(self, x, y, r, b) -> None:
+        expected = reference_hex_grid(x, y, r, b)
+        points = fill.hexGrid(x, y, r, b)
+        assert points.shape == (len(expected), 2)
+        assert points.tolist() == [list(p) for p in expected]
+
+    def test_circle_mask(self) -> None:
+        d, r, b = 80, 3, 2
+        points = fill.hexGrid(d, d, r, b)
+        mask = fill.circleMask(d, d, r, b, points[:, 0], points[:, 1])
+        expected = [math.hypot(px - d / 2, py - d / 2) <= d / 2 - r for px, py in points.tolist()]
+        assert mask.tolist() == expected
+        assert 0 < mask.sum() < len(points)
+
+    def test_plate_mask(self) -> None:
+        x, y, rc, r, b = 100, 100, 40, 3, 2
+        points = fill.hexGrid(x, y, r, b)
+        mask = fill.plateMask(rc)(x, y, r, b, points[:, 0], points[:, 1])
+        expected = []
+        for px, py in points.tolist():
+            posx, posy = abs(px - x / 2), abs(py - y / 2)
+            wx, wy = 0.5 * x - rc - r, 0.5 * y - rc - r
+            expected.append(posx <= wx or posy <= wx or math.hypot(posx - wx, posy - wy) <= rc)
+        assert mask.tolist() == expected
+        assert 0 < mask.sum() < len(points)
+
+    def test_rectangle_same_as_single_holes(self) -> None:
+        def single(box):
+            s = box.hexHolesSettings
+            for px, py in reference_hex_grid(50, 30, s.diameter / 2, s.distance):
+                box.hole(px, py, r=s.diameter / 2)
+
+        assert draw(lambda box: box.hexHolesRectangle(50, 30)) == draw(single)
+
+    def test_skip(self) -> None:
+        holes = draw(lambda box: box.hexHolesRectangle(50, 30))
+        skipped = draw(lambda box: box.hexHolesRectangle(
+            50, 30, skip=lambda x, y, r, b, px, py: px < 25))
+        assert 0 < len(skipped) < len(holes)
+
+    def test_hex(self) -> None:
+        # used to fail with a TypeError
+        assert len(draw(lambda box: box.hexHolesHex(100))) > 10
+
+
+class TestBulkHoles:
+
+    positions = [(10, 10), (30, 12.5), (55, 40)]
+
+    def test_holes_at(self) -> None:
+        def single(box):
+            for x, y in self.positions:
+                box.hole(x, y, d=6)
+
+        assert draw(lambda box: box.holesAt(self.positions, d=6)) == draw(single)
+        assert draw(lambda box: box.holesAt(numpy.array(self.positions), r=3)) == draw(single)
+        assert draw(lambda box: box.holesAt([], r=3)) == []
+
+    def test_holes_at_tabs(self) -> None:
+        def single(box):
+            for x, y in self.positions:
+                box.hole(x, y, r=5, tabs=2)
+
+        paths = draw(lambda box: box.holesAt(self.positions, r=5, tabs=2), "--burn=0")
+        # stroked together
+        assert len(paths) == 1
+        assert paths[0] == [c for p in draw(single, "--burn=0") for c in p]
+
+    def test_rectangular_holes_at(self) -> None:
+        def single(box):
+            for x, y in self.positions:
+                box.rectangularHole(x, y, 8, 5, r=1)
+
+        paths = draw(lambda box: box.rectangularHolesAt(self.positions, 8, 5, r=1))
+        # one path with one closed outline per hole
+        assert len(paths) == 1
+        assert paths[0] == [c for p in draw(single) for c in p]
+        assert [c for c in paths[0] if c[0] == "M"] == [p[0] for p in draw(single)]
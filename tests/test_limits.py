@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import io
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+try:
+    import boxes
+except ImportError:
+    sys.path.append(Path(__file__).resolve().parent.parent.__str__())
+    import boxes
+
+from boxes import formats, limits
+from boxes.limits import ResourceLimitExceeded, ResourceLimits
+from boxes.scripts import boxes_main
+from conftest import new_box, render
+
+
+@pytest.fixture(autouse=True)
+def environment(monkeypatch):
+    """No limits from the environment - restored after each test"""
+    for var, _ in ResourceLimits.ENVIRONMENT.values():
+        monkeypatch.setenv(var, "")
+
+
+class Clock:
+    """Replacement for time.monotonic() advancing only when told to"""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(limits.time, "monotonic", clock)
+    return clock
+
+
+class TestLimits:
+
+    def test_unlimited(self) -> None:
+        assert render(generator="ABox", limits=ResourceLimits()) == render(generator="ABox")
+
+    def test_segments(self) -> None:
+        with pytest.raises(ResourceLimitExceeded, match="^Too many lines: more than 10 segments$"):
+            render(generator="ABox", limits=ResourceLimits(max_segments=10))
+
+    def test_segments_checked_while_drawing(self) -> None:
+        box = new_box(generator="ABox", limits=ResourceLimits(max_segments=10))
+        with pytest.raises(ResourceLimitExceeded):
+            box.render()
+        assert box.surface.count == 11
+
+    def test_parts(self) -> None:
+        with pytest.raises(ResourceLimitExceeded, match="^Too many parts: more than 2$"):
+            render(generator="ABox", limits=ResourceLimits(max_parts=2))
+
+    def test_time(self, clock) -> None:
+        box = new_box(generator="ABox", limits=ResourceLimits(max_time=5))
+        box.render()
+        clock.now += 6
+        with pytest.raises(ResourceLimitExceeded,
+                           match="^Rendering took too long: more than 5 seconds$"):
+            box.close()
+
+    def test_output(self) -> None:
+        with pytest.raises(ResourceLimitExceeded, match="^Output too large: more than 1000 bytes$"):
+            render(generator="ABox", limits=ResourceLimits(max_output=1000))
+
+    def test_below_limits(self) -> None:
+        data = render(generator="ABox")
+        box = new_box(generator="ABox")
+        box.render()
+        count = box.surface.count
+        allowed = ResourceLimits(max_segments=count, max_parts=6, max_output=len(data))
+        assert render(generator="ABox", limits=allowed) == data
+
+
+class TestBudget:
+
+    def test_time_left(self, clock) -> None:
+        assert ResourceLimits().start().timeLeft() is None
+        budget = ResourceLimits(max_time=5).start()
+        clock.now += 2
+        assert budget.timeLeft() == 3
+        clock.now += 4
+        assert budget.timeLeft() == 0
+
+    def test_remaining(self, clock) -> None:
+        budget = ResourceLimits(max_segments=100, max_time=5, max_output=1000).start()
+        clock.now += 2
+        left = budget.remaining(400)
+        assert (left.max_segments, left.max_parts, left.max_time, left.max_output) == (
+            100, None, 3, 600)
+        with pytest.raises(ResourceLimitExceeded):
+            budget.remaining(1001)
+
+    def test_next_check(self) -> None:
+        budget = ResourceLimits().start()
+        assert budget.nextCheck(10) == 10 + ResourceLimits.CHECK_INTERVAL
+        budget = ResourceLimits(max_segments=50).start()
+        assert budget.nextCheck(10) == 50
+
+
+class TestEnvironment:
+
+    def test_from_environment(self, monkeypatch) -> None:
+        assert repr(ResourceLimits.fromEnvironment()) == repr(ResourceLimits())
+        monkeypatch.setenv("BOXES_MAX_SEGMENTS", "100")
+        monkeypatch.setenv("BOXES_MAX_PARTS", "3")
+        monkeypatch.setenv("BOXES_MAX_TIME", "2.5")
+        monkeypatch.setenv("BOXES_MAX_OUTPUT", "4096")
+        l = ResourceLimits.fromEnvironment()
+        assert (l.max_segments, l.max_parts, l.max_time, l.max_output) == (100, 3, 2.5, 4096)
+
+    def test_invalid(self, monkeypatch) -> None:
+        monkeypatch.setenv("BOXES_MAX_PARTS", "many")
+        with pytest.raises(ValueError, match="BOXES_MAX_PARTS must be a number"):
+            ResourceLimits.fromEnvironment()
+
+    def test_set_environment(self) -> None:
+        ResourceLimits(max_segments=100, max_time=2.5).setEnvironment()
+        l = ResourceLimits.fromEnvironment()
+        assert (l.max_segments, l.max_parts, l.max_time, l.max_output) == (100, None, 2.5, None)
+
+    def test_used_by_open(self, monkeypatch) -> None:
+        monkeypatch.setenv("BOXES_MAX_SEGMENTS", "10")
+        with pytest.raises(ResourceLimitExceeded):
+            render(generator="ABox")
+
+    def test_assigned_limits_win(self, monkeypatch) -> None:
+        monkeypatch.setenv("BOXES_MAX_SEGMENTS", "10")
+        render(generator="ABox", limits=ResourceLimits())
+
+    def test_updated(self) -> None:
+        l = ResourceLimits(max_segments=100, max_parts=3).updated(
+            ResourceLimits(max_parts=5, max_time=1.0))
+        assert (l.max_segments, l.max_parts, l.max_time, l.max_output) == (100, 5, 1.0, None)
+
+
+class TestCommandLine:
+
+    def test_exceeded(self, tmp_path) -> None:
+        output = tmp_path / "abox.svg"
+        with pytest.raises(SystemExit) as e:
+            boxes_main.main(["--max-segments=10", "abox", "--reference=0",
+                             f"--output={output}"], daemon=False)
+        assert e.value.code == "ABox: Too many lines: more than 10 segments"
+        assert not output.exists()
+
+    def test_sets_environment(self, tmp_path) -> None:
+        output = tmp_path / "abox.svg"
+        boxes_main.main(["--max-parts=6", "--max-time=30", "abox", "--reference=0",
+                         f"--output={output}"], daemon=False)
+        assert output.exists()
+        l = ResourceLimits.fromEnvironment()
+        assert (l.max_segments, l.max_parts, l.max_time) == (None, 6, 30.0)
+
+
+class TestConvert:
+
+    def fake_run(self, calls):
+        def run(cmd, timeout=None):
+            calls.append(timeout)
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        return run
+
+    def test_timeout(self, monkeypatch) -> None:
+        calls: list[float | None] = []
+        monkeypatch.setattr(subprocess, "run", self.fake_run(calls))
+        with pytest.raises(ResourceLimitExceeded,
+                           match="^Rendering took too long: converting to dxf did not finish within 2.5 seconds$"):
+            formats.Formats().convert(io.BytesIO(b"%!PS"), "dxf", 2.5)
+        assert calls == [2.5]
+
+    def test_time_left_passed(self, monkeypatch, clock) -> None:
+        calls: list[float | None] = []
+        monkeypatch.setattr(subprocess, "run", self.fake_run(calls))
+        box = new_box(generator="ABox", limits=ResourceLimits(max_time=30))
+        box.format = "dxf"
+        box.render()
+        clock.now += 10
+        with pytest.raises(ResourceLimitExceeded):
+            box.close()
+        assert calls == [20]
+
+    def test_base_formats_not_converted(self, monkeypatch) -> None:
+        calls: list[float | None] = []
+        monkeypatch.setattr(subprocess, "run", self.fake_run(calls))
+        data = io.BytesIO(b"<svg/>")
+        assert formats.Formats().convert(data, "svg", 0.1) is data
+        assert calls == []
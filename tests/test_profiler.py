@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+try:
+    import boxes
+except ImportError:
+    sys.path.append(Path(__file__).resolve().parent.parent.__str__())
+    import boxes
+
+import boxes.batch
+from boxes import edges, profiler
+from boxes.limits import ResourceLimitExceeded, ResourceLimits
+from boxes.scripts import boxes_main
+from conftest import new_box, render
+
+
+class TestProfiler:
+
+    def test_report(self) -> None:
+        out = io.StringIO()
+        render(generator="ABox", _profiler=profiler.Profiler(out))
+        report = out.getvalue()
+        assert report.startswith("Profile of ABox\n")
+        for name in ("render", "rectangularWall", "FingerJointEdge", "finish"):
+            assert f"  {name}\n" in report
+        assert "   total " in report
+
+    def test_counts(self) -> None:
+        prof = profiler.Profiler(io.StringIO())
+        render(generator="ABox", _profiler=prof)
+        assert prof.stats["render"][0] == 1
+        calls, total, own = prof.stats["rectangularWall"]
+        assert calls == 6
+        assert 0 <= own <= total
+
+    def test_same_output(self) -> None:
+        prof = profiler.Profiler(io.StringIO())
+        assert render(generator="ABox", _profiler=prof) == render(generator="ABox")
+
+    def test_environment(self, monkeypatch) -> None:
+        monkeypatch.delenv("BOXES_PROFILE", raising=False)
+        monkeypatch.delenv("BOXES_PROFILE_STACKS", raising=False)
+        assert profiler.Profiler.fromEnvironment() is None
+        monkeypatch.setenv("BOXES_PROFILE", "1")
+        assert profiler.Profiler.fromEnvironment() is not None
+
+    def test_stacks(self, tmp_path) -> None:
+        stacks = tmp_path / "stacks"
+        render(generator="ABox", _profiler=profiler.Profiler(io.StringIO(), str(stacks)))
+        lines = stacks.read_text().splitlines()
+        assert lines
+        for line in lines:
+            path, t = line.rsplit(" ", 1)
+            assert path.startswith(("ABox;render", "ABox;finish"))
+            assert int(t) >= 0
+
+    def test_replayed(self) -> None:
+        prof = profiler.Profiler(io.StringIO())
+        render(generator="ABox", _profiler=prof)
+        assert prof.replayed > 0
+        assert "replayed by drawCached()" in prof.report()
+
+
+class TestEdgeClasses:
+
+    def test_restored(self) -> None:
+        call = vars(edges.FingerJointEdge)["__call__"]
+        render(generator="ABox", _profiler=profiler.Profiler(io.StringIO()))
+        assert vars(edges.FingerJointEdge)["__call__"] is call
+        assert not profiler._edgeClasses
+
+    def test_instrumented_while_profiling(self) -> None:
+        call = vars(edges.Edge)["__call__"]
+        prof = profiler.Profiler(io.StringIO())
+        box = new_box(_profiler=prof)
+        box.edges["e"](10)
+        assert vars(edges.Edge)["__call__"] is not call
+        assert prof.stats["Edge"][0] == 1
+        box.close()
+        assert vars(edges.Edge)["__call__"] is call
+
+    def test_other_boxes_not_counted(self) -> None:
+        prof = profiler.Profiler(io.StringIO())
+        box = new_box(_profiler=prof)
+        box.edges["e"](10)
+
+        other = new_box()
+        other.edges["e"](10)
+        assert prof.stats["Edge"][0] == 1
+        box.close()
+
+    def test_nested_profilers(self) -> None:
+        call = vars(edges.Edge)["__call__"]
+        box1 = new_box(_profiler=profiler.Profiler(io.StringIO()))
+        box2 = new_box(_profiler=profiler.Profiler(io.StringIO()))
+        for box in (box1, box2):
+            box.edges["e"](10)
+        box1.close()
+        # still needed by the second profiler
+        assert vars(edges.Edge)["__call__"] is not call
+        box2.edges["e"](10)
+        assert box2._profiler.stats["Edge"][0] == 2
+        box2.close()
+        assert vars(edges.Edge)["__call__"] is call
+
+
+class Failing(boxes.Boxes):
+    """Draws some edges and then fails"""
+
+    def render(self):
+        self.edges["f"](20)
+        self.edges["e"](10)
+        raise ValueError("broken")
+
+
+def assert_restored(calls) -> None:
+    for cls, call in calls.items():
+        assert vars(cls)["__call__"] is call
+    assert not profiler._edgeClasses
+
+
+class TestFailures:
+
+    def calls(self):
+        return {cls: vars(cls)["__call__"] for cls in (edges.Edge, edges.FingerJointEdge)}
+
+    def test_close_clears_profiler(self) -> None:
+        box = new_box(_profiler=profiler.Profiler(io.StringIO()))
+        assert "edge" in vars(box)
+        box.close()
+        assert box._profiler is None
+        assert "edge" not in vars(box)
+
+    def test_render_raises(self, monkeypatch) -> None:
+        monkeypatch.setenv("BOXES_PROFILE", "1")
+        calls = self.calls()
+        with pytest.raises(ValueError, match="broken"):
+            boxes.batch.render(Failing, {})
+        assert_restored(calls)
+
+    def test_close_raises(self) -> None:
+        calls = self.calls()
+        out = io.StringIO()
+        box = new_box(generator="ABox", _profiler=profiler.Profiler(out),
+                      limits=ResourceLimits(max_output=1000))
+        box.render()
+        with pytest.raises(ResourceLimitExceeded):
+            box.close()
+        assert_restored(calls)
+        assert box._profiler is None
+        assert out.getvalue() == ""
+
+    def test_command_line(self, monkeypatch, capsys) -> None:
+        monkeypatch.setenv("BOXES_PROFILE", "1")
+        monkeypatch.setenv("BOXES_MAX_SEGMENTS", "10")
+        calls = self.calls()
+        with pytest.raises(SystemExit):
+            boxes_main.run_generator("abox", ["--reference=0"])
+        assert_restored(calls)
+
+    def test_stop_profiling(self) -> None:
+        calls = self.calls()
+        box = new_box(_profiler=profiler.Profiler(io.StringIO()))
+        box.edges["f"](20)
+        box.stopProfiling()
+        box.stopProfiling()
+        assert_restored(calls)
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import sys
+from math import pi
+from pathlib import Path
+
+import numpy
+import pytest
+
+try:
+    import boxes
+except ImportError:
+    sys.path.append(Path(__file__).resolve().parent.parent.__str__())
+    import boxes
+
+from boxes.pulley import Pulley
+from boxes.vectors import mmul, rotm, vtransl
+
+
+def reference_outline(teeth, profile, insideout):
+    """Former per tooth placement from Pulley.__call__()"""
+    pulley_OD = Pulley.diameter(teeth, profile)
+    tooth_depth, tooth_width = Pulley.profile_data[profile]
+    width = tooth_width + Pulley.additional_tooth_width
+    tooth_distance_from_centre = ((pulley_OD / 2) ** 2 - (width / 2) ** 2) ** 0.5
+    tooth_width_scale = width / tooth_width
+    tooth_depth_scale = (tooth_depth + Pulley.additional_tooth_depth) / tooth_depth
+    if insideout:
+        pulley_OD += 2 * tooth_depth * tooth_depth_scale
+        tooth_depth_scale *= -1
+    points = []
+    for i in range(teeth):
+        m = mmul([[tooth_width_scale, 0, 0], [0, tooth_depth_scale, -tooth_distance_from_centre]],
+                 rotm(i * 2 * pi / teeth))
+        points.extend(vtransl(pt, m) for pt in Pulley.teeth[profile][1:-1])
+    return pulley_OD, points
+
+
+@pytest.mark.parametrize("profile", Pulley.getProfiles())
+@pytest.mark.parametrize("insideout", [False, True])
+def test_outline_matches_reference(profile, insideout) -> None:
+    diameter, points = Pulley.outline(20, profile, insideout)
+    expected_diameter, expected = reference_outline(20, profile, insideout)
+    assert diameter == expected_diameter
+    assert (points == numpy.array(expected)).all()
+
+
+def test_outline_cached() -> None:
+    diameter, points = Pulley.outline(30, "GT2_2mm")
+    assert Pulley.outline(30, "GT2_2mm")[1] is points
+    assert Pulley.outline(30, "GT2_2mm", insideout=True)[1] is not points
+    with pytest.raises(ValueError):
+        points[0, 0] = 0.0
+
+
+def test_outline_follows_class_constants() -> None:
+
+    class WidePulley(Pulley):
+        additional_tooth_width = 0.5
+
+    assert (WidePulley.outline(30, "GT2_2mm")[1] != Pulley.outline(30, "GT2_2mm")[1]).any()
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import io
+import re
+import sys
+import zipfile
+from pathlib import Path
+
+import pytest
+
+try:
+    import boxes
+except ImportError:
+    sys.path.append(Path(__file__).resolve().parent.parent.__str__())
+    import boxes
+
+import boxes.batch
+import boxes.generators
+from boxes import drawing
+from boxes.scripts import boxes_main, boxesserver
+from conftest import new_box
+
+
+@pytest.fixture(autouse=True)
+def environment(monkeypatch):
+    """No BOXES_SPILL_AFTER - restored after each test"""
+    monkeypatch.setenv("BOXES_SPILL_AFTER", "")
+
+
+@pytest.fixture
+def spills(monkeypatch):
+    """Number of times parts were moved to the temporary file"""
+    calls = []
+    spill = drawing.Surface._spill
+
+    def _spill(self):
+        calls.append(1)
+        spill(self)
+
+    monkeypatch.setattr(drawing.Surface, "_spill", _spill)
+    return calls
+
+
+def without_dates(data):
+    return re.sub(rb"\d{4}-\d\d-\d\d[ T][\d:.]+", b"", data)
+
+
+def render(format="svg", spill_after=None):
+    """Output and surface of TypeTray - spilling after spill_after segments"""
+    box = new_box(f"--format={format}", generator="TypeTray", spill_after=spill_after)
+    assert box.surface.spill_after == spill_after
+    box.render()
+    surface = box.surface
+    spilled = sum(isinstance(p, drawing.SpilledPart) for p in surface.parts)
+    return box.close().getvalue(), surface, spilled
+
+
+class TestSpill:
+
+    def test_off_by_default(self) -> None:
+        assert drawing.Surface.spill_after is None
+        _, surface, spilled = render()
+        assert spilled == 0
+        assert surface._spill_file is None
+
+    @pytest.mark.parametrize("format", ["svg", "ps", "lbrn2"])
+    def test_same_output(self, format) -> None:
+        expected, _, _ = render(format)
+        data, _, spilled = render(format, 0)
+        assert spilled > 0
+        assert data == expected
+
+    def test_spill_after(self) -> None:
+        _, surface, all_spilled = render(spill_after=0)
+        _, _, spilled = render(spill_after=surface.count // 2)
+        assert 0 < spilled < all_spilled
+
+    def test_file_closed(self) -> None:
+        box = new_box(generator="TypeTray")
+        box.surface.spill_after = 0
+        box.render()
+        f = box.surface._spill_file
+        assert f is not None and not f.closed
+        box.close()
+        assert f.closed
+        assert box.surface._spill_file is None
+
+    def test_spilled_part(self) -> None:
+        surface = drawing.Surface()
+        surface.move_to(0, 0)
+        surface.append("L", 10.0, 5.0)
+        surface.stroke(rgb=(0, 0, 0), lw=0.1)
+        surface.new_part()
+        surface._spill()
+        part = surface.parts[0]
+        assert isinstance(part, drawing.SpilledPart)
+        e = part.extents()
+        assert (e.xmin, e.ymin, e.xmax, e.ymax) == (0, 0, 10, 5)
+        part.transform(1.0, drawing.Affine.translation(1, 1))
+        assert part.load().pathes[0].path == [["M", 1.0, 1.0], ["L", 11.0, 6.0]]
+        surface._close_spill_file()
+
+
+class TestSwitches:
+
+    TypeTray = boxes.generators.getAllBoxGenerators()["boxes.generators.typetray.TypeTray"]
+
+    def test_environment(self, monkeypatch, spills) -> None:
+        expected, _ = boxes.batch.render(self.TypeTray, {})
+        assert not spills
+        monkeypatch.setenv("BOXES_SPILL_AFTER", "0")
+        data, _ = boxes.batch.render(self.TypeTray, {})
+        assert spills
+        assert data == expected
+
+    def test_attribute_wins(self, monkeypatch, spills) -> None:
+        monkeypatch.setenv("BOXES_SPILL_AFTER", "0")
+        render(spill_after=100000)
+        assert not spills
+
+    def test_invalid(self, monkeypatch) -> None:
+        monkeypatch.setenv("BOXES_SPILL_AFTER", "lots")
+        with pytest.raises(ValueError, match="BOXES_SPILL_AFTER must be a number"):
+            new_box()
+
+    def test_command_line(self, tmp_path, spills) -> None:
+        output = tmp_path / "typetray.svg"
+        results = []
+        for args in ([], ["--spill-after=0"]):
+            boxes_main.main([*args, "typetray", "--reference=0", f"--output={output}"],
+                            daemon=False)
+            results.append(without_dates(output.read_bytes()))
+        assert spills
+        assert drawing.spill_after_from_environment() == 0
+        assert results[0] == results[1]
+
+    def test_server(self, spills) -> None:
+        def serve(server):
+            environ = {"PATH_INFO": "/TypeTray", "QUERY_STRING": "render=5&reference=0",
+                       "HTTP_HOST": "localhost", "SERVER_NAME": "localhost",
+                       "SERVER_PORT": "80", "wsgi.url_scheme": "http"}
+            body = b"".join(server.serve(environ, lambda s, h: None))
+            with zipfile.ZipFile(io.BytesIO(body)) as z:
+                return {n: without_dates(z.read(n)) for n in z.namelist()}
+
+        expected = serve(boxesserver.BServer())
+        assert not spills
+        assert serve(boxesserver.BServer(spill_after=0)) == expected
+        assert spills
@@ -160,6 +160,27 @@ class TestSVG:
             assert referenceData.is_file() is True, "Reference file for comparison does not exist."
             assert referenceData.read_bytes() == boxData.getvalue(), "SVG files are not equal. If change is intended, please update example files."
 
+        @pytest.mark.parametrize(
+            "generator_idx",
+            range(len(additionalTests)),
+            ids=idfunc_args.__func__,
+        )
+        def test_parse_dict(self, generator_idx) -> None:
+            generator_settings = self.additionalTests[generator_idx]
+            generator = self.generators_by_name[generator_settings["box_type"]]
+            boxArgs, argsHash = TestSVG.get_additional_test_args_hash(generator_settings)
+
+            argsBox = generator()
+            argsBox.parseArgs(boxArgs)
+            dictBox = generator()
+            dictBox.parseDict(generator_settings["args"])
+
+            for box in (argsBox, dictBox):
+                del box.metadata["creation_date"]
+            assert argsBox.metadata == dictBox.metadata
+            assert argsBox.non_default_args == dictBox.non_default_args
+            assert argsBox.edgesettings == dictBox.edgesettings
+
     def test_abandoned_examples(self, capsys) -> None:
         # Load the args hash for all defined additionalTests
         validTests: set[tuple[str, str]]  = set()
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+try:
+    import boxes
+except ImportError:
+    sys.path.append(Path(__file__).resolve().parent.parent.__str__())
+    import boxes
+
+from conftest import new_box, paths
+
+
+def draw(func):
+    """Paths and texts func(box) creates - with full precision"""
+    box = new_box()
+    func(box)
+    return paths(box), [[t[1:5] for t in part.texts] for part in box.surface.parts]
+
+
+def shape(box):
+    box.polyline(20, (90, 3), 10, -45, 7, (135, 2), 15)
+    box.text("A", 3, 3)
+    box.rectangularHole(5, 5, 4, 3)
+
+
+class TestRecordReplay:
+
+    def test_replay_same_as_drawing(self) -> None:
+        def replayed(box):
+            box.moveTo(10, 10, 30)
+            box.ctx.record()
+            shape(box)
+            template = box.ctx.stop_recording()
+            assert template is not None
+            box.moveTo(50, 5, 45)
+            box.ctx.replay(template)
+            box.edge(10)
+
+        def direct(box):
+            box.moveTo(10, 10, 30)
+            shape(box)
+            box.moveTo(50, 5, 45)
+            shape(box)
+            box.edge(10)
+
+        assert draw(replayed) == draw(direct)
+
+    def test_nested(self) -> None:
+        def replayed(box):
+            box.ctx.record()
+            box.ctx.record()
+            shape(box)
+            inner = box.ctx.stop_recording()
+            box.moveTo(30, 0)
+            box.ctx.replay(inner)
+            outer = box.ctx.stop_recording()
+            box.moveTo(0, 40)
+            box.ctx.replay(outer)
+
+        def direct(box):
+            shape(box)
+            box.moveTo(30, 0)
+            shape(box)
+            box.moveTo(0, 40)
+            shape(box)
+            box.moveTo(30, 0)
+            shape(box)
+
+        assert draw(replayed) == draw(direct)
+
+    def test_unbalanced(self) -> None:
+        box = new_box()
+        box.ctx.save()
+        box.ctx.record()
+        box.ctx.restore()
+        assert box.ctx.stop_recording() is None
+        box.ctx.record()
+        box.ctx.save()
+        assert box.ctx.stop_recording() is None
+
+
+def test_parts_matrix() -> None:
+    def part(box, move=None):
+        if box.move(30, 20, move, before=True):
+            return
+        shape(box)
+        box.move(30, 20, move)
+
+    def matrix(box):
+        box.partsMatrix(7, 3, "up", part, box)
+
+    def direct(box):
+        for row in (3, 3, 1):
+            with box.saved_context():
+                for i in range(row):
+                    part(box, move="right")
+            part(box, move="up only")
+
+    assert draw(matrix) == draw(direct)
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import random
+import sys
+from pathlib import Path
+
+import numpy
+import pytest
+
+try:
+    import boxes
+except ImportError:
+    sys.path.append(Path(__file__).resolve().parent.parent.__str__())
+    import boxes
+
+from boxes import vectors
+from boxes.vectors import dotproduct, normalize, vadd, vdiff, vorthogonal, vscalmul
+
+
+def reference_kerf(points, k, closed=True):
+    """Former point by point implementation of kerf()"""
+    result = []
+    lp = len(points)
+    for i in range(lp):
+        v1 = vorthogonal(normalize(vdiff(points[i - 1], points[i])))
+        v2 = vorthogonal(normalize(vdiff(points[i], points[(i + 1) % lp])))
+        if not closed:
+            if i == 0:
+                v1 = v2
+            if i == lp - 1:
+                v2 = v1
+        d = normalize(vadd(v1, v2))
+        cos_alpha = dotproduct(v1, d)
+        result.append(vadd(points[i], vscalmul(d, -k / cos_alpha)))
+    return result
+
+
+class TestKerf:
+
+    @pytest.mark.parametrize("closed", [True, False])
+    def test_matches_reference(self, closed) -> None:
+        rnd = random.Random(42)
+        points = [(rnd.uniform(-100, 100), rnd.uniform(-100, 100)) for _ in range(500)]
+        result = vectors.kerf(points, 0.3, closed=closed)
+        assert result.shape == (500, 2)
+        # numpy uses sqrt() where Python's ** 0.5 uses pow() - may differ in the last bit
+        numpy.testing.assert_allclose(result, reference_kerf(points, 0.3, closed), rtol=1e-12, atol=1e-9)
+
+    def test_square(self) -> None:
+        square = [(0, 0), (10, 0), (10, 10), (0, 10)]
+        expected = [(-1, -1), (11, -1), (11, 11), (-1, 11)]
+        numpy.testing.assert_allclose(vectors.kerf(square, 1), expected)
+        numpy.testing.assert_allclose(vectors.kerf(square, -1), [(1, 1), (9, 1), (9, 9), (1, 9)])
+
+    def test_accepts_array(self) -> None:
+        square = numpy.array([(0, 0), (10, 0), (10, 10), (0, 10)], dtype=float)
+        assert (vectors.kerf(square, 0.5) == vectors.kerf(square.tolist(), 0.5)).all()
+        assert vectors.kerf([], 0.5).shape == (0, 2)
+
+    def test_reversing_path(self) -> None:
+        points = [(0, 0), (10, 0), (0, 0.0)]
+        with pytest.raises(ZeroDivisionError):
+            vectors.kerf(points, 1, closed=False)
+        result = vectors.kerf(points, 1, closed=False, miter_limit=2)
+        assert numpy.isfinite(result).all()
+
+    def test_miter_limit(self) -> None:
+        # very sharp spike
+        points = [(0, 0), (50, 0), (100, 1), (50, 2), (0, 2)]
+        spike = numpy.hypot(*(vectors.kerf(points, 1)[2] - points[2]))
+        assert spike > 50
+        limited = vectors.kerf(points, 1, miter_limit=3)
+        moved = numpy.hypot(*(limited - numpy.array(points, dtype=float)).T)
+        assert moved[2] == pytest.approx(3)
+        # vertices below the limit stay untouched
+        assert (numpy.delete(limited, 2, 0) == numpy.delete(vectors.kerf(points, 1), 2, 0)).all()